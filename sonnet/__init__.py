@@ -34,139 +34,140 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-import importlib
-import sys
+# Dependency imports
+from sonnet.python import lazy_loader
 
-import semantic_version
-
-
-def _ensure_dependency_available_at_version(package_name, min_version):
-  """Throw helpful error if required dependencies not available."""
-
-  try:
-    pkg = importlib.import_module(package_name)
-  except ImportError:
-    pip_name = package_name.replace('_', '-')
-    raise SystemError(
-        'Sonnet requires %s (minimum version %s) to be installed. '
-        'If using pip, run `pip install %s` or '
-        '`pip install %s-gpu`' % (
-            package_name, min_version, pip_name, pip_name))
-
-  installed_version = semantic_version.Version(pkg.__version__)
-  version_spec = semantic_version.Spec('>=' + min_version)
-  if not version_spec.match(installed_version):
-    raise SystemError(
-        '%s version %s is installed, but Sonnet requires at least version %s.' %
-        (package_name, pkg.__version__, min_version))
-
-_ensure_dependency_available_at_version('tensorflow', '1.8.0')
-_ensure_dependency_available_at_version('tensorflow_probability', '0.4.0')
-
-# Check some version of TF is available.
-from sonnet.python import custom_getters
-from sonnet.python.modules import experimental
-from sonnet.python.modules import nets
-from sonnet.python.modules.attention import AttentiveRead
-from sonnet.python.modules.base import AbstractModule
-from sonnet.python.modules.base import Module
-from sonnet.python.modules.base import observe_connections
-from sonnet.python.modules.base import Transposable
-from sonnet.python.modules.base_errors import DifferentGraphError
-from sonnet.python.modules.base_errors import Error
-from sonnet.python.modules.base_errors import IncompatibleShapeError
-from sonnet.python.modules.base_errors import ModuleInfoError
-from sonnet.python.modules.base_errors import NotConnectedError
-from sonnet.python.modules.base_errors import NotInitializedError
-from sonnet.python.modules.base_errors import NotSupportedError
-from sonnet.python.modules.base_errors import ParentNotBuiltError
-from sonnet.python.modules.base_errors import UnderspecifiedError
-from sonnet.python.modules.base_info import SONNET_COLLECTION_NAME
-from sonnet.python.modules.basic import AddBias
-from sonnet.python.modules.basic import BatchApply
-from sonnet.python.modules.basic import BatchFlatten
-from sonnet.python.modules.basic import BatchReshape
-from sonnet.python.modules.basic import FlattenTrailingDimensions
-from sonnet.python.modules.basic import Linear
-from sonnet.python.modules.basic import merge_leading_dims
-from sonnet.python.modules.basic import MergeDims
-from sonnet.python.modules.basic import SelectInput
-from sonnet.python.modules.basic import SliceByDim
-from sonnet.python.modules.basic import split_leading_dim
-from sonnet.python.modules.basic import TileByDim
-from sonnet.python.modules.basic import TrainableVariable
-from sonnet.python.modules.basic_rnn import BidirectionalRNN
-from sonnet.python.modules.basic_rnn import DeepRNN
-from sonnet.python.modules.basic_rnn import ModelRNN
-from sonnet.python.modules.basic_rnn import VanillaRNN
-from sonnet.python.modules.batch_norm import BatchNorm
-from sonnet.python.modules.batch_norm_v2 import BatchNormV2
-from sonnet.python.modules.clip_gradient import clip_gradient
-from sonnet.python.modules.conv import CAUSAL
-from sonnet.python.modules.conv import CausalConv1D
-from sonnet.python.modules.conv import Conv1D
-from sonnet.python.modules.conv import Conv1DTranspose
-from sonnet.python.modules.conv import Conv2D
-from sonnet.python.modules.conv import Conv2DTranspose
-from sonnet.python.modules.conv import Conv3D
-from sonnet.python.modules.conv import Conv3DTranspose
-from sonnet.python.modules.conv import DepthwiseConv2D
-from sonnet.python.modules.conv import FULL
-from sonnet.python.modules.conv import InPlaneConv2D
-from sonnet.python.modules.conv import REVERSE_CAUSAL
-from sonnet.python.modules.conv import SAME
-from sonnet.python.modules.conv import SeparableConv1D
-from sonnet.python.modules.conv import SeparableConv2D
-from sonnet.python.modules.conv import VALID
-from sonnet.python.modules.embed import Embed
-from sonnet.python.modules.gated_rnn import BatchNormLSTM
-from sonnet.python.modules.gated_rnn import Conv1DLSTM
-from sonnet.python.modules.gated_rnn import Conv2DLSTM
-from sonnet.python.modules.gated_rnn import GRU
-from sonnet.python.modules.gated_rnn import highway_core_with_recurrent_dropout
-from sonnet.python.modules.gated_rnn import HighwayCore
-from sonnet.python.modules.gated_rnn import LSTM
-from sonnet.python.modules.gated_rnn import lstm_with_recurrent_dropout
-from sonnet.python.modules.gated_rnn import lstm_with_zoneout
-from sonnet.python.modules.gated_rnn import LSTMBlockCell
-from sonnet.python.modules.gated_rnn import LSTMState
-from sonnet.python.modules.layer_norm import LayerNorm
-from sonnet.python.modules.pondering_rnn import ACTCore
-from sonnet.python.modules.relational_memory import RelationalMemory
-from sonnet.python.modules.residual import Residual
-from sonnet.python.modules.residual import ResidualCore
-from sonnet.python.modules.residual import SkipConnectionCore
-from sonnet.python.modules.rnn_core import RNNCellWrapper
-from sonnet.python.modules.rnn_core import RNNCore
-from sonnet.python.modules.rnn_core import trainable_initial_state
-from sonnet.python.modules.rnn_core import TrainableInitialState
-from sonnet.python.modules.rnn_core import wrap_rnn_cell_class
-from sonnet.python.modules.scale_gradient import scale_gradient
-from sonnet.python.modules.sequential import Sequential
-from sonnet.python.modules.spatial_transformer import AffineGridWarper
-from sonnet.python.modules.spatial_transformer import AffineWarpConstraints
-from sonnet.python.modules.spatial_transformer import GridWarper
-from sonnet.python.modules.util import check_initializers
-from sonnet.python.modules.util import check_partitioners
-from sonnet.python.modules.util import check_regularizers
-from sonnet.python.modules.util import count_variables_by_type
-from sonnet.python.modules.util import custom_getter_router
-from sonnet.python.modules.util import deprecation_warning
-from sonnet.python.modules.util import format_variable_map
-from sonnet.python.modules.util import format_variables
-from sonnet.python.modules.util import get_normalized_variable_map
-from sonnet.python.modules.util import get_saver
-from sonnet.python.modules.util import get_variables_in_module
-from sonnet.python.modules.util import get_variables_in_scope
-from sonnet.python.modules.util import has_variable_scope
-from sonnet.python.modules.util import log_variables
-from sonnet.python.modules.util import parse_string_to_constructor
-from sonnet.python.modules.util import reuse_variables
-from sonnet.python.modules.util import summarize_variables
-from sonnet.python.modules.util import variable_map_items
-from sonnet.python.ops import nest
-from sonnet.python.ops.initializers import restore_initializer
 
+lazy_loader.ensure_dependency_available_at_version('tensorflow', '1.8.0')
 
 __version__ = '1.27'
 
+# Everything else is only imported when first accessed, e.g. `snt.Linear` only
+# imports `sonnet.python.modules.basic` and its own dependencies. This must be
+# the last statement, as it replaces this module.
+lazy_loader.install(__name__, [
+    ("sonnet.python", "custom_getters"),
+    ("sonnet.python.modules", "experimental"),
+    ("sonnet.python.modules", "nets"),
+    ("sonnet.python.modules.attention", "AttentiveRead"),
+    ("sonnet.python.modules.base", "AbstractModule"),
+    ("sonnet.python.modules.base", "CONNECTION_TRACKING_FULL"),
+    ("sonnet.python.modules.base", "CONNECTION_TRACKING_OFF"),
+    ("sonnet.python.modules.base", "CONNECTION_TRACKING_SUMMARY"),
+    ("sonnet.python.modules.base", "connection_tracking"),
+    ("sonnet.python.modules.base", "get_connection_tracking"),
+    ("sonnet.python.modules.base", "Module"),
+    ("sonnet.python.modules.base", "observe_connections"),
+    ("sonnet.python.modules.base", "set_connection_tracking"),
+    ("sonnet.python.modules.base", "Transposable"),
+    ("sonnet.python.modules.base_errors", "DifferentGraphError"),
+    ("sonnet.python.modules.base_errors", "Error"),
+    ("sonnet.python.modules.base_errors", "IncompatibleShapeError"),
+    ("sonnet.python.modules.base_errors", "ModuleInfoError"),
+    ("sonnet.python.modules.base_errors", "NotConnectedError"),
+    ("sonnet.python.modules.base_errors", "NotInitializedError"),
+    ("sonnet.python.modules.base_errors", "NotSupportedError"),
+    ("sonnet.python.modules.base_errors", "ParentNotBuiltError"),
+    ("sonnet.python.modules.base_errors", "UnderspecifiedError"),
+    ("sonnet.python.modules.base_info", "SONNET_COLLECTION_NAME"),
+    ("sonnet.python.modules.basic", "AddBias"),
+    ("sonnet.python.modules.basic", "BatchApply"),
+    ("sonnet.python.modules.basic", "BatchFlatten"),
+    ("sonnet.python.modules.basic", "BatchReshape"),
+    ("sonnet.python.modules.basic", "FlattenTrailingDimensions"),
+    ("sonnet.python.modules.basic", "Linear"),
+    ("sonnet.python.modules.basic", "merge_leading_dims"),
+    ("sonnet.python.modules.basic", "MergeDims"),
+    ("sonnet.python.modules.basic", "SelectInput"),
+    ("sonnet.python.modules.basic", "SliceByDim"),
+    ("sonnet.python.modules.basic", "split_leading_dim"),
+    ("sonnet.python.modules.basic", "TileByDim"),
+    ("sonnet.python.modules.basic", "TrainableVariable"),
+    ("sonnet.python.modules.basic_rnn", "BidirectionalRNN"),
+    ("sonnet.python.modules.basic_rnn", "DeepRNN"),
+    ("sonnet.python.modules.basic_rnn", "ModelRNN"),
+    ("sonnet.python.modules.basic_rnn", "VanillaRNN"),
+    ("sonnet.python.modules.batch_norm", "BatchNorm"),
+    ("sonnet.python.modules.batch_norm_v2", "BatchNormV2"),
+    ("sonnet.python.modules.causal_conv_core", "CausalConv1DCore"),
+    ("sonnet.python.modules.clip_gradient", "clip_gradient"),
+    ("sonnet.python.modules.connection_profiler", "ConnectionProfile"),
+    ("sonnet.python.modules.connection_profiler", "ConnectionStats"),
+    ("sonnet.python.modules.connection_profiler", "profile_connections"),
+    ("sonnet.python.modules.conv", "CAUSAL"),
+    ("sonnet.python.modules.conv", "CausalConv1D"),
+    ("sonnet.python.modules.conv", "Conv1D"),
+    ("sonnet.python.modules.conv", "Conv1DTranspose"),
+    ("sonnet.python.modules.conv", "Conv2D"),
+    ("sonnet.python.modules.conv", "Conv2DTranspose"),
+    ("sonnet.python.modules.conv", "Conv3D"),
+    ("sonnet.python.modules.conv", "Conv3DTranspose"),
+    ("sonnet.python.modules.conv", "DepthwiseConv2D"),
+    ("sonnet.python.modules.conv", "FULL"),
+    ("sonnet.python.modules.conv", "InPlaneConv2D"),
+    ("sonnet.python.modules.conv", "REVERSE_CAUSAL"),
+    ("sonnet.python.modules.conv", "SAME"),
+    ("sonnet.python.modules.conv", "SeparableConv1D"),
+    ("sonnet.python.modules.conv", "SeparableConv2D"),
+    ("sonnet.python.modules.conv", "VALID"),
+    ("sonnet.python.modules.embed", "Embed"),
+    ("sonnet.python.modules.gated_rnn", "BatchNormLSTM"),
+    ("sonnet.python.modules.gated_rnn", "Conv1DLSTM"),
+    ("sonnet.python.modules.gated_rnn", "Conv2DLSTM"),
+    ("sonnet.python.modules.gated_rnn", "GRU"),
+    ("sonnet.python.modules.gated_rnn", "highway_core_with_recurrent_dropout"),
+    ("sonnet.python.modules.gated_rnn", "HighwayCore"),
+    ("sonnet.python.modules.gated_rnn", "LSTM"),
+    ("sonnet.python.modules.gated_rnn", "lstm_with_recurrent_dropout"),
+    ("sonnet.python.modules.gated_rnn", "lstm_with_zoneout"),
+    ("sonnet.python.modules.gated_rnn", "LSTMBlockCell"),
+    ("sonnet.python.modules.gated_rnn", "LSTMState"),
+    ("sonnet.python.modules.layer_norm", "LayerNorm"),
+    ("sonnet.python.modules.memory_footprint", "get_memory_footprint"),
+    ("sonnet.python.modules.memory_footprint", "MemoryFootprint"),
+    ("sonnet.python.modules.memory_footprint", "MemoryUsage"),
+    ("sonnet.python.modules.memory_footprint", "MemoryUsageChange"),
+    ("sonnet.python.modules.pondering_rnn", "ACTCore"),
+    ("sonnet.python.modules.relational_memory", "RelationalMemory"),
+    ("sonnet.python.modules.residual", "Residual"),
+    ("sonnet.python.modules.residual", "ResidualCore"),
+    ("sonnet.python.modules.residual", "SkipConnectionCore"),
+    ("sonnet.python.modules.rnn_core", "compacting_dynamic_rnn"),
+    ("sonnet.python.modules.rnn_core", "RNNCellWrapper"),
+    ("sonnet.python.modules.rnn_core", "RNNCore"),
+    ("sonnet.python.modules.rnn_core", "trainable_initial_state"),
+    ("sonnet.python.modules.rnn_core", "TrainableInitialState"),
+    ("sonnet.python.modules.rnn_core", "wrap_rnn_cell_class"),
+    ("sonnet.python.modules.sampling", "beam_search"),
+    ("sonnet.python.modules.sampling", "sample_sequence"),
+    ("sonnet.python.modules.scale_gradient", "scale_gradient"),
+    ("sonnet.python.modules.sequential", "Sequential"),
+    ("sonnet.python.modules.sharded_saver", "get_sharded_saver"),
+    ("sonnet.python.modules.sharded_saver", "ShardedSaver"),
+    ("sonnet.python.modules.spatial_transformer", "AffineGridWarper"),
+    ("sonnet.python.modules.spatial_transformer", "AffineWarpConstraints"),
+    ("sonnet.python.modules.spatial_transformer", "GridWarper"),
+    ("sonnet.python.modules.util", "check_initializers"),
+    ("sonnet.python.modules.util", "check_partitioners"),
+    ("sonnet.python.modules.util", "check_regularizers"),
+    ("sonnet.python.modules.util", "count_variables_by_type"),
+    ("sonnet.python.modules.util", "custom_getter_router"),
+    ("sonnet.python.modules.util", "deprecation_warning"),
+    ("sonnet.python.modules.util", "format_variable_map"),
+    ("sonnet.python.modules.util", "format_variables"),
+    ("sonnet.python.modules.util", "get_gaussian_weights"),
+    ("sonnet.python.modules.util", "get_normalized_variable_map"),
+    ("sonnet.python.modules.util", "get_saver"),
+    ("sonnet.python.modules.util", "get_variables_in_module"),
+    ("sonnet.python.modules.util", "get_variables_in_scope"),
+    ("sonnet.python.modules.util", "has_variable_scope"),
+    ("sonnet.python.modules.util", "log_variables"),
+    ("sonnet.python.modules.util", "parse_string_to_constructor"),
+    ("sonnet.python.modules.util", "register_gaussian_weights"),
+    ("sonnet.python.modules.util", "reuse_variables"),
+    ("sonnet.python.modules.util", "summarize_variables"),
+    ("sonnet.python.modules.util", "variable_map_items"),
+    ("sonnet.python.ops", "nest"),
+    ("sonnet.python.ops.initializers", "batch_restore_initializers"),
+    ("sonnet.python.ops.initializers", "restore_initializer"),
+])
@@ -333,23 +333,20 @@ class TextModel(snt.AbstractModule):
       output_size]`.
     """
 
-    current_logits = initial_logits
-    current_state = initial_state
-
-    generated_letters = []
-    for _ in range(sequence_length):
-      # Sample a character index from distribution.
-      char_index = tf.squeeze(tf.multinomial(current_logits, 1))
+    def embed_char(char_index):
       char_one_hot = tf.one_hot(char_index, self._output_size, 1.0, 0.0)
-      generated_letters.append(char_one_hot)
-
-      # Feed character back into the deep_lstm.
-      gen_out_seq, current_state = self._core(
-          tf.nn.relu(self._embed_module(char_one_hot)),
-          current_state)
-      current_logits = self._output_module(gen_out_seq)
-
-    generated_string = tf.stack(generated_letters)
+      return tf.nn.relu(self._embed_module(char_one_hot))
+
+    # The sampling loop is a `tf.while_loop`, so the size of the graph does
+    # not depend on `sequence_length`.
+    char_indices, _ = snt.sample_sequence(
+        self._core,
+        input_fn=embed_char,
+        output_fn=self._output_module,
+        initial_logits=initial_logits,
+        initial_state=initial_state,
+        num_steps=sequence_length)
+    generated_string = tf.one_hot(char_indices, self._output_size, 1.0, 0.0)
 
     return generated_string
 
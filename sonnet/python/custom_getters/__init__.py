@@ -18,10 +18,20 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-from sonnet.python.custom_getters import bayes_by_backprop
-from sonnet.python.custom_getters.context import Context
-from sonnet.python.custom_getters.non_trainable import non_trainable
-from sonnet.python.custom_getters.override_args import override_args
-from sonnet.python.custom_getters.override_args import override_default_args
-from sonnet.python.custom_getters.restore_initializer import restore_initializer
-from sonnet.python.custom_getters.stop_gradient import stop_gradient
+# Dependency imports
+from sonnet.python import lazy_loader
+
+
+# Must be the last statement, as it replaces this module.
+lazy_loader.install(__name__, [
+    ("sonnet.python.custom_getters", "bayes_by_backprop"),
+    ("sonnet.python.custom_getters.cache_reads", "cache_reads"),
+    ("sonnet.python.custom_getters.context", "Context"),
+    ("sonnet.python.custom_getters.mixed_precision", "DynamicLossScale"),
+    ("sonnet.python.custom_getters.mixed_precision", "mixed_precision"),
+    ("sonnet.python.custom_getters.non_trainable", "non_trainable"),
+    ("sonnet.python.custom_getters.override_args", "override_args"),
+    ("sonnet.python.custom_getters.override_args", "override_default_args"),
+    ("sonnet.python.custom_getters.restore_initializer", "restore_initializer"),
+    ("sonnet.python.custom_getters.stop_gradient", "stop_gradient"),
+])
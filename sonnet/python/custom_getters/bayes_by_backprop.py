@@ -78,6 +78,39 @@ outside a `tf.while_loop` are evaluated only once. You can disable this
 behaviour by passing the argument `keep_control_dependencies=True` to the
 `bayes_by_backprop_getter` factory.
 
+## Multiple samples
+
+Passing `num_samples=K` to the `bayes_by_backprop_getter` factory makes the
+getter return K samples of each variable, stacked along a new leading axis.
+`snt.Linear`, `snt.LSTM` and `snt.Embed` multiply their inputs by all the
+samples at once, and return outputs with the same leading axis of size K, so
+that a K-sample estimate of the ELBO, or a K-member predictive ensemble, takes
+a single connection of the model:
+
+```
+get_bbb_variable_fn = bbb.bayes_by_backprop_getter(num_samples=8)
+mlp = snt.nets.MLP([64, 10], custom_getter=get_bbb_variable_fn)
+logits = mlp(inputs)  # Of shape [8, batch_size, 10].
+nll = tf.reduce_mean(tf.nn.sparse_softmax_cross_entropy_with_logits(
+    labels=tf.tile(labels[None], [8, 1]), logits=logits))
+loss = nll + bbb.get_total_kl_cost() / num_training_examples
+```
+
+The KL cost of each variable is then the average of the KL costs built for
+each of its samples.
+
+## Local reparameterization
+
+Passing `local_reparameterization=True` to the `bayes_by_backprop_getter`
+factory makes `snt.Linear` layers whose weights have a Gaussian posterior,
+such as those of `diagonal_gaussian_posterior_builder`, sample their
+pre-activations directly from their Gaussian distribution, as in
+https://arxiv.org/abs/1506.02557, rather than multiplying the inputs by a
+sample of the weights. Each example then gets independent noise, which
+reduces the variance of the gradients, and no noise of the size of the
+weights is drawn for the layer. The KL cost is unchanged; with
+`analytic_kl_builder`, the weights of these layers are not sampled at all.
+
 ## Contact
 jmenick@
 """
@@ -90,8 +123,16 @@ import collections
 import math
 import weakref
 
+from sonnet.python import lazy_loader
+from sonnet.python.modules import util
 import tensorflow as tf
-import tensorflow_probability as tfp
+
+# The version of TensorFlow Probability is only checked when this module is
+# imported, as importing it is slow. It is checked before the import below, so
+# that a missing package is reported with installation instructions.
+lazy_loader.ensure_dependency_available_at_version(
+    "tensorflow_probability", "0.4.0")
+import tensorflow_probability as tfp  # pylint: disable=g-import-not-at-top
 
 _DEFAULT_SCALE_TRANSFORM = tf.nn.softplus
 _OK_DTYPES_FOR_BBB = (tf.float16, tf.float32, tf.float64, tf.bfloat16)
@@ -266,7 +307,9 @@ def bayes_by_backprop_getter(
     kl_builder=stochastic_kl_builder,
     sampling_mode_tensor=None,
     fresh_noise_per_connection=True,
-    keep_control_dependencies=False):
+    keep_control_dependencies=False,
+    num_samples=None,
+    local_reparameterization=False):
   """Creates a custom getter which does Bayes by Backprop.
 
   Please see `tf.get_variable` for general documentation on custom getters.
@@ -355,11 +398,31 @@ def bayes_by_backprop_getter(
       In all cases, the KL cost is only added once per Variable, which is the
       correct behavior, since if a variable is used multiple times in a model,
       the KL cost should remain unaffected.
+    num_samples: Optional number of samples of each variable to draw at once.
+      If given, the getter returns the samples stacked along a new leading
+      axis, of size `num_samples`, and the KL cost of each variable is the
+      average of the KL costs of its samples. In the mean estimator mode, the
+      mean is repeated `num_samples` times. By default, a single sample is
+      returned, without the new axis.
+    local_reparameterization: A boolean. Indicates that the Gaussian
+      posteriors of the variables should be registered with
+      `snt.register_gaussian_weights`, so that `snt.Linear` layers sample their
+      pre-activations from them with the local reparameterization trick,
+      rather than using the sampled weights. In the mean and last sample
+      modes, these layers use the mean of their weights. Other modules, and
+      posteriors which are not `tfp.distributions.Normal`, use the estimate
+      of the variable as usual. `False` by default.
 
   Returns:
     A `custom_getter` function which implements Bayes by Backprop.
+
+  Raises:
+    ValueError: If `num_samples` is not positive.
   """
 
+  if num_samples is not None and num_samples < 1:
+    raise ValueError("num_samples must be positive, not {}.".format(
+        num_samples))
   if sampling_mode_tensor is None:
     sampling_mode_tensor = tf.constant(EstimatorModes.sample)
 
@@ -418,8 +481,17 @@ def bayes_by_backprop_getter(
 
       posterior_estimator = _produce_posterior_estimate(posterior_dist,
                                                         sampling_mode_tensor,
-                                                        name)
-      kl_cost = kl_builder(posterior_dist, prior_dist, posterior_estimator)
+                                                        name,
+                                                        num_samples)
+      if num_samples is None:
+        kl_cost = kl_builder(posterior_dist, prior_dist, posterior_estimator)
+      else:
+        posterior_estimator.set_shape(
+            tf.TensorShape([num_samples]).concatenate(raw_variable_shape))
+        kl_cost = tf.add_n(
+            [kl_builder(posterior_dist, prior_dist, sample)
+             for sample in tf.unstack(posterior_estimator, num=num_samples)])
+        kl_cost /= tf.cast(num_samples, kl_cost.dtype)
       variable_metadata = _VariableMetadata(
           raw_variable_name=name,
           raw_variable_shape=raw_variable_shape,
@@ -441,6 +513,10 @@ def bayes_by_backprop_getter(
     control_deps = [] if keep_control_dependencies else None
     with tf.control_dependencies(control_deps):
       posterior_estimator, var_metadata = construct_subgraph()
+      if local_reparameterization:
+        _register_gaussian_posterior(posterior_estimator,
+                                     var_metadata.posterior,
+                                     sampling_mode_tensor)
 
     # Only add these ops to a collection once per unique variable.
     # This is to ensure that KL costs are not tallied up more than once.
@@ -452,8 +528,21 @@ def bayes_by_backprop_getter(
   return custom_getter
 
 
+def _register_gaussian_posterior(posterior_estimate, posterior_dist,
+                                 posterior_estimate_mode):
+  """Registers a Gaussian posterior for the local reparameterization trick."""
+  if not isinstance(posterior_dist, tfp.distributions.Normal):
+    return
+  util.register_gaussian_weights(
+      posterior_estimate,
+      mean=posterior_dist.mean(),
+      stddev=posterior_dist.stddev(),
+      sample=tf.equal(posterior_estimate_mode,
+                      tf.constant(EstimatorModes.sample)))
+
+
 def _produce_posterior_estimate(posterior_dist, posterior_estimate_mode,
-                                raw_var_name):
+                                raw_var_name, num_samples=None):
   """Create tensor representing estimate of posterior.
 
   Args:
@@ -463,6 +552,9 @@ def _produce_posterior_estimate(posterior_dist, posterior_estimate_mode,
     posterior_estimate_mode: A `Tensor` of dtype `tf.string`, which
         determines the inference mode.
     raw_var_name: The name of the variable over which inference is done.
+    num_samples: Optional number of estimates to stack along a new leading
+        axis. The mean is repeated, and the last sample is expected to have
+        been drawn with `num_samples`.
 
   Returns:
     `z_sample`, a `Tensor` representing an estimate derived from the
@@ -479,10 +571,15 @@ def _produce_posterior_estimate(posterior_dist, posterior_estimate_mode,
                tf.constant(EstimatorModes.last_sample),
                name="equal_last_sample_mode"),
   ]
+  def mean():
+    if num_samples is None:
+      return posterior_dist.mean()
+    return tf.stack([posterior_dist.mean()] * num_samples)
+
   # pylint: disable=unnecessary-lambda
   results = [
-      lambda: posterior_dist.sample(),
-      lambda: posterior_dist.mean(),
+      lambda: posterior_dist.sample(num_samples or ()),
+      mean,
       lambda: posterior_dist.last_sample()
   ]
 
@@ -490,7 +587,7 @@ def _produce_posterior_estimate(posterior_dist, posterior_estimate_mode,
     err_msg = "Invalid posterior estimate mode."
     raise_err = tf.Assert(tf.constant(False), data=[tf.constant(err_msg)])
     with tf.control_dependencies([raise_err]):
-      return posterior_dist.mean()
+      return mean()
 
   if hasattr(posterior_dist, "last_sample"):
     cases = {conds[0]: results[0], conds[1]: results[1], conds[2]: results[2]}
@@ -486,6 +486,133 @@ class BBBTest(tf.test.TestCase):
           first_run_elem.flatten() - second_run_elem.flatten())
       self.assertGreater(distance, 0.001)
 
+  def _sampling_mode_getter(self, num_samples, **kwargs):
+    self.sampling_mode = tf.placeholder_with_default(
+        tf.constant(bbb.EstimatorModes.sample), shape=())
+    return bbb.bayes_by_backprop_getter(
+        posterior_builder=test_diag_gaussian_builder_builder(0.5, 0.1),
+        sampling_mode_tensor=self.sampling_mode, num_samples=num_samples,
+        **kwargs)
+
+  def testNumSamplesMLP(self):
+    num_samples = 3
+    mlp = snt.nets.MLP(
+        [4, 2], custom_getter=self._sampling_mode_getter(num_samples))
+    outputs = mlp(tf.random_normal([5, 3]))
+    self.assertEqual([num_samples, 5, 2], outputs.get_shape().as_list())
+    self.assertEqual([num_samples, 3, 4],
+                     mlp.layers[0].w.get_shape().as_list())
+
+    with self.test_session() as sess:
+      sess.run(tf.global_variables_initializer())
+      samples = sess.run(outputs)
+      means = sess.run(outputs, feed_dict={
+          self.sampling_mode: bbb.EstimatorModes.mean})
+    # Each sample of the weights gives different outputs, but the mean
+    # repeated gives the same ones.
+    self.assertGreater(np.abs(samples[0] - samples[1]).max(), 1e-3)
+    self.assertAllClose(means[0], means[1])
+    self.assertAllClose(means[0], means[2])
+
+  def testNumSamplesMatchesSingleSamples(self):
+    num_samples = 4
+    inputs = tf.random_normal([2, 3])
+    linear = snt.Linear(5, custom_getter=self._sampling_mode_getter(
+        num_samples))
+    outputs = linear(inputs)
+    # The outputs of each sample are those of the inputs multiplied by it.
+    expected = tf.stack([tf.matmul(inputs, w) + b for w, b in
+                         zip(tf.unstack(linear.w), tf.unstack(linear.b))])
+    with self.test_session() as sess:
+      sess.run(tf.global_variables_initializer())
+      outputs, expected = sess.run([outputs, expected])
+    self.assertAllClose(expected, outputs)
+
+  def testNumSamplesLSTM(self):
+    num_samples = 2
+    lstm = snt.LSTM(
+        4, use_peepholes=True,
+        custom_getter=self._sampling_mode_getter(num_samples))
+    state = lstm.initial_state(3)
+    for _ in range(3):
+      outputs, state = lstm(tf.ones([3, 5]), state)
+    self.assertEqual([num_samples, 3, 4], outputs.get_shape().as_list())
+    self.assertEqual([num_samples, 3, 4], state.cell.get_shape().as_list())
+    with self.assertRaisesRegexp(ValueError, "does not support"):
+      lstm.unroll(tf.ones([2, 3, 5]), lstm.initial_state(3))
+
+    with self.test_session() as sess:
+      sess.run(tf.global_variables_initializer())
+      sess.run(outputs)
+
+  def testNumSamplesEmbed(self):
+    num_samples = 3
+    embed = snt.Embed(
+        vocab_size=6, embed_dim=2,
+        custom_getter=self._sampling_mode_getter(num_samples))
+    ids = tf.constant([[0, 5], [1, 1]])
+    outputs = embed(ids)
+    self.assertEqual([num_samples, 2, 2, 2], outputs.get_shape().as_list())
+    with self.test_session() as sess:
+      sess.run(tf.global_variables_initializer())
+      outputs, embeddings = sess.run([outputs, embed.embeddings])
+    self.assertAllClose(embeddings[:, [[0, 5], [1, 1]]], outputs)
+
+  def testNumSamplesKLCost(self):
+    kl_costs = []
+    for num_samples in (None, 5):
+      with tf.Graph().as_default() as graph:
+        bbb_getter = bbb.bayes_by_backprop_getter(
+            posterior_builder=test_diag_gaussian_builder_builder(0.5, 0.1),
+            kl_builder=bbb.analytic_kl_builder, num_samples=num_samples)
+        with tf.variable_scope("scope", custom_getter=bbb_getter):
+          tf.get_variable("v", shape=[3, 2], dtype=tf.float32)
+        with self.test_session(graph=graph) as sess:
+          sess.run(tf.global_variables_initializer())
+          kl_costs.append(sess.run(bbb.get_total_kl_cost()))
+    # The KL cost is averaged over the samples.
+    self.assertAllClose(kl_costs[0], kl_costs[1])
+
+    with self.assertRaisesRegexp(ValueError, "num_samples must be positive"):
+      bbb.bayes_by_backprop_getter(num_samples=0)
+
+  def testLocalReparameterization(self):
+    stddev = softplus(0.1)
+    linear = snt.Linear(
+        2, use_bias=False, custom_getter=self._sampling_mode_getter(
+            None, kl_builder=bbb.analytic_kl_builder,
+            local_reparameterization=True))
+    outputs = linear(tf.ones([10000, 3]))
+    self.assertEqual(1, len(bbb.get_variable_metadata()))
+
+    with self.test_session() as sess:
+      sess.run(tf.global_variables_initializer())
+      samples = sess.run(outputs)
+      means = sess.run(outputs, feed_dict={
+          self.sampling_mode: bbb.EstimatorModes.mean})
+      sess.run(bbb.get_total_kl_cost())
+    # Each example gets its own sample of the pre-activations.
+    self.assertGreater(np.abs(samples[0] - samples[1]).max(), 1e-3)
+    self.assertAllClose(np.full([2], 3 * 0.5), samples.mean(axis=0),
+                        atol=0.1)
+    self.assertAllClose(np.full([2], 3 * stddev ** 2), samples.var(axis=0),
+                        rtol=0.1)
+    self.assertAllClose(np.full([10000, 2], 3 * 0.5), means)
+
+  def testLocalReparameterizationBatchApply(self):
+    linear = snt.Linear(2, custom_getter=self._sampling_mode_getter(
+        None, local_reparameterization=True))
+    outputs = snt.BatchApply(linear)(tf.zeros([5, 6, 3]))
+    self.assertEqual([5, 6, 2], outputs.get_shape().as_list())
+
+    # The square root of the variance has finite gradients for zero inputs.
+    loss = tf.reduce_sum(outputs)
+    grads = tf.gradients(loss, tf.trainable_variables())
+    with self.test_session() as sess:
+      sess.run(tf.global_variables_initializer())
+      for grad in sess.run(grads):
+        self.assertTrue(np.all(np.isfinite(grad)))
+
 
 if __name__ == "__main__":
   tf.test.main()
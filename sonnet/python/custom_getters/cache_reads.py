@@ -0,0 +1,87 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Custom getter sharing a single read of each variable between connections."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Dependency imports
+from sonnet.python.modules import util
+import tensorflow as tf
+
+
+def cache_reads(custom_getter=None):
+  """Creates a custom getter which reads each variable once per session step.
+
+  Every connection of a module gets its variables again, so a module unrolled
+  statically over T timesteps, e.g. by `tf.contrib.rnn.static_rnn`, reads each
+  of its variables T times, and applies T times any transformation a custom
+  getter makes to them. The returned custom getter instead memoizes the value
+  returned for each variable, so that all the connections share it:
+
+  ```python
+  custom_getter = snt.custom_getters.cache_reads(
+      bbb.bayes_by_backprop_getter(fresh_noise_per_connection=True))
+  lstm = snt.LSTM(hidden_size, custom_getter=custom_getter)
+  outputs, _ = tf.contrib.rnn.static_rnn(lstm, inputs, dtype=tf.float32)
+  ```
+
+  Here the weights of the LSTM are sampled once per session step, rather than
+  once per timestep. A `tf.Variable` returned by the getter is memoized as a
+  single read of its value, a partitioned variable is memoized as is.
+
+  Non-trainable variables, such as moving averages, are not memoized. The
+  values are memoized per graph and per `tf.while_loop` context, as a
+  tensor created within a loop cannot be used outside of it. Outside of loops,
+  the values are created without the control dependencies of the connection
+  that first gets them, so that they can be used by all the connections.
+
+  Args:
+    custom_getter: Optional custom getter whose results are memoized. By
+      default, the reads of the variables are memoized.
+
+  Returns:
+    Custom getter.
+  """
+  # Key of this getter's cache in the registry of each graph. The caches are
+  # dicts from `(name, control flow context)` to value.
+  cache_key = object()
+
+  def _cache_reads(getter, name, *args, **kwargs):
+    """Gets a variable, or the value memoized for it."""
+    if kwargs.get("trainable") is False:
+      # E.g. moving averages, which are assigned to.
+      return getter(name, *args, **kwargs)
+    graph = tf.get_default_graph()
+    # pylint: disable=protected-access
+    control_flow_context = graph._get_control_flow_context()
+    graph_cache = util._get_graph_registry("cache_reads", graph).setdefault(
+        cache_key, {})
+    # pylint: enable=protected-access
+    key = (name, control_flow_context)
+    if key not in graph_cache:
+      control_deps = [] if control_flow_context else None
+      with tf.control_dependencies(control_deps):
+        if custom_getter is None:
+          value = getter(name, *args, **kwargs)
+        else:
+          value = custom_getter(getter, name, *args, **kwargs)
+        if isinstance(value, tf.Variable):
+          value = value.read_value()
+      graph_cache[key] = value
+    return graph_cache[key]
+
+  return _cache_reads
@@ -0,0 +1,137 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Tests for sonnet.python.custom_getters.cache_reads."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import gc
+import weakref
+
+# Dependency imports
+import sonnet as snt
+import sonnet.python.custom_getters.bayes_by_backprop as bbb
+import tensorflow as tf
+
+
+class CacheReadsTest(tf.test.TestCase):
+
+  def _counting_getter(self):
+    self.num_calls = 0
+
+    def custom_getter(getter, *args, **kwargs):
+      self.num_calls += 1
+      return tf.identity(getter(*args, **kwargs))
+
+    return custom_getter
+
+  def testStaticUnroll(self):
+    inputs = [tf.random_normal([2, 3], seed=i) for i in range(5)]
+    lstm = snt.LSTM(
+        4, custom_getter=snt.custom_getters.cache_reads(
+            self._counting_getter()))
+    outputs, _ = tf.contrib.rnn.static_rnn(lstm, inputs, dtype=tf.float32)
+    # The weights and biases of the gates are each got once.
+    self.assertEqual(2, self.num_calls)
+    self.assertEqual(2, len(lstm.get_variables()))
+
+    lstm_uncached = snt.LSTM(4, name="lstm_uncached")
+    outputs_uncached, _ = tf.contrib.rnn.static_rnn(
+        lstm_uncached, inputs, dtype=tf.float32)
+    copy_variables = [
+        uncached.assign(cached) for cached, uncached in
+        zip(lstm.get_variables(), lstm_uncached.get_variables())]
+    with self.test_session() as session:
+      session.run(tf.global_variables_initializer())
+      session.run(copy_variables)
+      outputs, outputs_uncached = session.run([outputs, outputs_uncached])
+    self.assertAllClose(outputs_uncached, outputs)
+
+  def testDoesNotKeepGraphAlive(self):
+    custom_getter = snt.custom_getters.cache_reads()
+    graph = tf.Graph()
+    with graph.as_default():
+      linear = snt.Linear(3, custom_getter=custom_getter)
+      linear(tf.zeros([2, 2]))
+      linear(tf.zeros([2, 2]))
+    graph_ref = weakref.ref(graph)
+    del graph, linear
+    gc.collect()
+    self.assertIsNone(graph_ref())
+
+  def testVariableRead(self):
+    with tf.variable_scope("", custom_getter=snt.custom_getters.cache_reads()):
+      w1 = tf.get_variable("w", [3])
+    with tf.variable_scope("", custom_getter=snt.custom_getters.cache_reads(),
+                           reuse=True):
+      w2 = tf.get_variable("w", [3])
+      w3 = tf.get_variable("w", [3])
+    self.assertIsInstance(w1, tf.Tensor)
+    self.assertIsNot(w1, w2)
+    self.assertIs(w2, w3)
+    self.assertEqual(1, len(tf.global_variables()))
+
+  def testNonTrainable(self):
+    custom_getter = snt.custom_getters.cache_reads()
+    with tf.variable_scope("", custom_getter=custom_getter):
+      v = tf.get_variable("v", [3], trainable=False)
+    self.assertIsInstance(v, tf.Variable)
+
+  def testWhileLoop(self):
+    linear = snt.Linear(3, custom_getter=snt.custom_getters.cache_reads())
+    inputs = tf.ones([2, 3])
+    outputs = linear(inputs)
+
+    def body(i, x):
+      return i + 1, linear(x)
+
+    _, loop_outputs = tf.while_loop(lambda i, _: i < 2, body, [0, inputs])
+    with self.test_session() as session:
+      session.run(tf.global_variables_initializer())
+      session.run([outputs, loop_outputs])
+
+  def testControlDependencies(self):
+    linear = snt.Linear(3, custom_getter=snt.custom_getters.cache_reads())
+    with tf.control_dependencies([tf.no_op()]):
+      linear(tf.ones([2, 3]))
+    w = linear.w
+    linear(tf.ones([2, 3]))
+    self.assertIs(w, linear.w)
+    # The memoized read does not depend on the first connection's dependency.
+    self.assertEqual([], w.op.control_inputs)
+
+  def testBayesByBackprop(self):
+    bbb_getter = bbb.bayes_by_backprop_getter(
+        posterior_builder=bbb.diagonal_gaussian_posterior_builder,
+        prior_builder=bbb.fixed_gaussian_prior_builder,
+        kl_builder=bbb.stochastic_kl_builder,
+        fresh_noise_per_connection=True)
+    linear = snt.Linear(
+        3, custom_getter=snt.custom_getters.cache_reads(bbb_getter))
+    inputs = tf.ones([2, 3])
+    outputs = [linear(inputs) for _ in range(3)]
+    self.assertEqual(2, len(bbb.get_variable_metadata()))
+
+    with self.test_session() as session:
+      session.run(tf.global_variables_initializer())
+      outputs = session.run(outputs)
+    # A single sample of the weights is drawn for all the connections.
+    self.assertAllEqual(outputs[0], outputs[1])
+    self.assertAllEqual(outputs[0], outputs[2])
+
+
+if __name__ == "__main__":
+  tf.test.main()
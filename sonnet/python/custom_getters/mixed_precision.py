@@ -0,0 +1,258 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Mixed precision custom getter, with float32 master weights.
+
+The `mixed_precision` custom getter stores the variables requested in a low
+precision compute dtype as float32 variables, and returns copies cast to the
+compute dtype. The modules then compute in the compute dtype, halving the
+memory bandwidth of their weights and activations, while the optimizer updates
+the float32 variables, so that small updates are not lost to rounding.
+
+Gradients in a low precision dtype may underflow, so the loss should be scaled
+up before differentiating it, and the gradients scaled back down before
+applying them. `DynamicLossScale` adapts the scale during training:
+
+```python
+mlp = snt.nets.MLP([1024, 1024, 10],
+                   custom_getter=snt.custom_getters.mixed_precision(tf.float16))
+logits = mlp(tf.cast(inputs, tf.float16))
+loss = tf.losses.sparse_softmax_cross_entropy(labels, tf.cast(logits,
+                                                              tf.float32))
+loss_scale = snt.custom_getters.DynamicLossScale()
+train_op = loss_scale.minimize(tf.train.AdamOptimizer(), loss)
+```
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import tensorflow as tf
+
+
+_COMPUTE_DTYPES = (tf.float16, tf.bfloat16)
+
+
+def mixed_precision(compute_dtype=tf.float16):
+  """Creates a custom getter storing low precision variables in float32.
+
+  Variables requested in `compute_dtype` are created in float32, and are
+  returned cast to `compute_dtype`. Variables requested in other dtypes, e.g.
+  the float32 moving averages of a batch norm whose inputs are float32, are
+  returned unchanged. The inputs of the modules should therefore be cast to
+  `compute_dtype`, so that the modules request their variables in it.
+
+  The getter only changes the dtype of the variables, so it can be nested with
+  other custom getters, or routed to some variables of a module with a dict
+  passed as the `custom_getter` constructor argument.
+
+  Args:
+    compute_dtype: The low precision dtype the modules compute in, either
+      `tf.float16` or `tf.bfloat16`.
+
+  Returns:
+    Custom getter.
+
+  Raises:
+    ValueError: If `compute_dtype` is not a supported dtype.
+  """
+  compute_dtype = tf.as_dtype(compute_dtype)
+  if compute_dtype not in _COMPUTE_DTYPES:
+    raise ValueError("compute_dtype must be one of {}, not {}.".format(
+        [dtype.name for dtype in _COMPUTE_DTYPES], compute_dtype.name))
+
+  def custom_getter(getter, *args, **kwargs):
+    """Gets a float32 variable, cast to the compute dtype if requested in it.
+
+    Args:
+      getter: Underlying variable getter to invoke.
+      *args: Arguments, compatible with those of tf.get_variable.
+      **kwargs: Keyword arguments, compatible with those of tf.get_variable.
+
+    Returns:
+      The result of invoking `getter(*args, **kwargs)`, with float32 as dtype
+      and cast to the compute dtype, if the dtype requested is the compute
+      dtype.
+    """
+    dtype = kwargs.get("dtype")
+    if dtype is None or tf.as_dtype(dtype) != compute_dtype:
+      return getter(*args, **kwargs)
+    kwargs["dtype"] = tf.float32
+    variable = getter(*args, **kwargs)
+    return tf.cast(variable, compute_dtype)
+
+  return custom_getter
+
+
+def _all_finite(grads_and_vars):
+  """Returns a boolean scalar, whether all the gradients are finite."""
+  finite = []
+  for grad, _ in grads_and_vars:
+    if grad is None:
+      continue
+    if isinstance(grad, tf.IndexedSlices):
+      grad = grad.values
+    finite.append(tf.reduce_all(tf.is_finite(grad)))
+  if not finite:
+    return tf.constant(True)
+  return tf.reduce_all(tf.stack(finite))
+
+
+class DynamicLossScale(object):
+  """Dynamic loss scaling, for training with low precision gradients.
+
+  The loss is multiplied by the loss scale before differentiating it, and the
+  gradients are divided by it before applying them. When the gradients are not
+  finite, the update is skipped and the loss scale is divided by `multiplier`;
+  after `increment_period` consecutive steps with finite gradients, the loss
+  scale is multiplied by `multiplier`. The loss scale thus stays close to the
+  largest one for which the gradients do not overflow.
+
+  The loss scale is held in a non-trainable global variable, so that it is
+  saved with the model.
+  """
+
+  def __init__(self, initial_scale=2 ** 15, increment_period=2000,
+               multiplier=2., name="dynamic_loss_scale"):
+    """Constructs a `DynamicLossScale`.
+
+    Args:
+      initial_scale: Initial loss scale.
+      increment_period: Number of consecutive steps with finite gradients
+        after which the loss scale is increased.
+      multiplier: Factor by which the loss scale is increased or decreased.
+      name: Name of the variable scope of the variables.
+
+    Raises:
+      ValueError: If `initial_scale` is smaller than 1, `increment_period` is
+        not positive, or `multiplier` is not greater than 1.
+    """
+    if initial_scale < 1:
+      raise ValueError("initial_scale must be at least 1, not {}.".format(
+          initial_scale))
+    if increment_period < 1:
+      raise ValueError("increment_period must be positive, not {}.".format(
+          increment_period))
+    if multiplier <= 1:
+      raise ValueError("multiplier must be greater than 1, not {}.".format(
+          multiplier))
+    self._increment_period = increment_period
+    self._multiplier = float(multiplier)
+    with tf.variable_scope(name):
+      self._scale = tf.get_variable(
+          "scale", shape=[], dtype=tf.float32,
+          initializer=tf.constant_initializer(initial_scale), trainable=False)
+      self._num_finite_steps = tf.get_variable(
+          "num_finite_steps", shape=[], dtype=tf.int64,
+          initializer=tf.zeros_initializer(), trainable=False)
+
+  @property
+  def scale(self):
+    """The float32 scalar variable holding the loss scale."""
+    return self._scale
+
+  def scale_loss(self, loss):
+    """Returns the loss multiplied by the loss scale."""
+    return loss * tf.cast(self._scale, loss.dtype)
+
+  def compute_gradients(self, optimizer, loss, var_list=None, **kwargs):
+    """Computes the unscaled gradients of the scaled loss.
+
+    Args:
+      optimizer: The `tf.train.Optimizer` computing the gradients.
+      loss: The unscaled loss.
+      var_list: Optional list of the variables to differentiate with respect
+        to, as for `tf.train.Optimizer.compute_gradients`.
+      **kwargs: Other keyword arguments of
+        `tf.train.Optimizer.compute_gradients`.
+
+    Returns:
+      A list of (gradient, variable) pairs, whose gradients are those of
+      `loss`, possibly not finite.
+    """
+    grads_and_vars = optimizer.compute_gradients(
+        self.scale_loss(loss), var_list=var_list, **kwargs)
+    unscaled = []
+    for grad, var in grads_and_vars:
+      if grad is not None:
+        inverse_scale = tf.cast(1. / self._scale, grad.dtype)
+        if isinstance(grad, tf.IndexedSlices):
+          grad = tf.IndexedSlices(grad.values * inverse_scale, grad.indices,
+                                  grad.dense_shape)
+        else:
+          grad *= inverse_scale
+      unscaled.append((grad, var))
+    return unscaled
+
+  def apply_gradients(self, optimizer, grads_and_vars, global_step=None,
+                      name=None):
+    """Applies the gradients if they are all finite, and updates the scale.
+
+    Args:
+      optimizer: The `tf.train.Optimizer` applying the gradients.
+      grads_and_vars: List of (gradient, variable) pairs, as returned by
+        `compute_gradients`.
+      global_step: Optional variable to increment when the gradients are
+        applied. It is not incremented when the update is skipped.
+      name: Optional name for the returned operation.
+
+    Returns:
+      An operation applying the gradients and updating the loss scale.
+    """
+    grads_and_vars = list(grads_and_vars)
+    all_finite = _all_finite(grads_and_vars)
+
+    def apply_fn():
+      return tf.group(optimizer.apply_gradients(grads_and_vars,
+                                                global_step=global_step))
+
+    apply_op = tf.cond(all_finite, apply_fn, tf.no_op)
+    with tf.control_dependencies([apply_op]):
+      num_finite_steps = tf.where(all_finite, self._num_finite_steps + 1,
+                                  tf.zeros_like(self._num_finite_steps))
+      increment = num_finite_steps >= self._increment_period
+      scale = tf.where(
+          all_finite,
+          tf.where(increment, self._scale * self._multiplier, self._scale),
+          tf.maximum(self._scale / self._multiplier, 1.))
+      num_finite_steps = tf.where(increment,
+                                  tf.zeros_like(num_finite_steps),
+                                  num_finite_steps)
+      return tf.group(
+          self._scale.assign(scale),
+          self._num_finite_steps.assign(num_finite_steps),
+          name=name or "dynamic_loss_scale_update")
+
+  def minimize(self, optimizer, loss, global_step=None, var_list=None,
+               name=None, **kwargs):
+    """Minimizes the loss with loss scaling.
+
+    Args:
+      optimizer: The `tf.train.Optimizer` to minimize the loss with.
+      loss: The unscaled loss.
+      global_step: Optional variable to increment when the gradients are
+        applied.
+      var_list: Optional list of the variables to update.
+      name: Optional name for the returned operation.
+      **kwargs: Other keyword arguments of
+        `tf.train.Optimizer.compute_gradients`.
+
+    Returns:
+      An operation applying the gradients and updating the loss scale.
+    """
+    grads_and_vars = self.compute_gradients(optimizer, loss, var_list=var_list,
+                                            **kwargs)
+    return self.apply_gradients(optimizer, grads_and_vars,
+                                global_step=global_step, name=name)
@@ -0,0 +1,147 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Tests for sonnet.python.custom_getters.mixed_precision."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Dependency imports
+from absl.testing import parameterized
+import numpy as np
+import sonnet as snt
+import tensorflow as tf
+
+_CONV_NET_2D_KWARGS = {
+    "output_channels": [16, 16],
+    "kernel_shapes": [3],
+    "strides": [2],
+    "paddings": [snt.VALID],
+}
+_MLP_KWARGS = {
+    "output_sizes": [16, 16],
+}
+
+
+class MixedPrecisionTest(parameterized.TestCase, tf.test.TestCase):
+
+  def testUsage(self):
+    mixed_precision = snt.custom_getters.mixed_precision(tf.float16)
+    with tf.variable_scope("", custom_getter=mixed_precision):
+      w = tf.get_variable("w", [10, 10], tf.float16)
+      v = tf.get_variable("v", [10], tf.float32)
+
+    self.assertEqual(tf.float16, w.dtype)
+    self.assertEqual(tf.float32, v.dtype)
+    self.assertEqual([tf.float32, tf.float32],
+                     [var.dtype.base_dtype for var in tf.global_variables()])
+    self.assertEqual(2, len(tf.trainable_variables()))
+
+  def testInvalidComputeDtype(self):
+    with self.assertRaisesRegexp(ValueError, "compute_dtype must be"):
+      snt.custom_getters.mixed_precision(tf.int32)
+
+  @parameterized.named_parameters(
+      ("ConvNet2D", snt.nets.ConvNet2D, _CONV_NET_2D_KWARGS, [2, 13, 13, 3]),
+      ("MLP", snt.nets.MLP, _MLP_KWARGS, [2, 16]),
+  )
+  def testWithinTolerance(self, module, kwargs, input_shape):
+    inputs = np.random.RandomState(0).uniform(
+        -1, 1, input_shape).astype(np.float32)
+    module_32 = module(name="float32", **kwargs)
+    module_16 = module(
+        name="float16",
+        custom_getter=snt.custom_getters.mixed_precision(tf.float16), **kwargs)
+    outputs_32 = module_32(tf.constant(inputs))
+    outputs_16 = module_16(tf.constant(inputs, dtype=tf.float16))
+
+    self.assertEqual(tf.float16, outputs_16.dtype)
+    self.assertEqual(
+        [tf.float32] * len(module_16.get_variables()),
+        [var.dtype.base_dtype for var in module_16.get_variables()])
+    copy_variables = [
+        var_16.assign(var_32) for var_32, var_16 in
+        zip(module_32.get_variables(), module_16.get_variables())]
+    with self.test_session() as session:
+      session.run(tf.global_variables_initializer())
+      session.run(copy_variables)
+      outputs_32, outputs_16 = session.run([outputs_32, outputs_16])
+    self.assertAllClose(outputs_32, outputs_16.astype(np.float32),
+                        rtol=1e-2, atol=1e-2)
+
+  def testGradients(self):
+    mlp = snt.nets.MLP(
+        [8, 1], custom_getter=snt.custom_getters.mixed_precision(tf.float16))
+    loss = tf.reduce_sum(tf.cast(mlp(tf.ones([4, 3], tf.float16)), tf.float32))
+    grads_and_vars = tf.train.GradientDescentOptimizer(0.1).compute_gradients(
+        loss)
+
+    # The gradients are those of the float32 variables.
+    self.assertEqual(4, len(grads_and_vars))
+    for grad, var in grads_and_vars:
+      self.assertEqual(tf.float32, var.dtype.base_dtype)
+      self.assertEqual(tf.float32, grad.dtype)
+
+
+class DynamicLossScaleTest(tf.test.TestCase):
+
+  def testMinimize(self):
+    x = tf.get_variable("x", initializer=tf.constant([1., 2.]))
+    is_finite = tf.placeholder(tf.bool, [])
+    loss = tf.reduce_sum(x) * tf.where(is_finite, 1., np.inf)
+    loss_scale = snt.custom_getters.DynamicLossScale(
+        initial_scale=16, increment_period=2, multiplier=2)
+    global_step = tf.train.get_or_create_global_step()
+    train_op = loss_scale.minimize(tf.train.GradientDescentOptimizer(1.),
+                                   loss, global_step=global_step)
+
+    with self.test_session() as session:
+      session.run(tf.global_variables_initializer())
+      session.run(train_op, feed_dict={is_finite: True})
+      # The gradients are unscaled.
+      self.assertAllClose([0., 1.], session.run(x))
+      self.assertEqual(16, session.run(loss_scale.scale))
+      session.run(train_op, feed_dict={is_finite: True})
+      self.assertEqual(32, session.run(loss_scale.scale))
+      self.assertEqual(2, session.run(global_step))
+
+      # The update is skipped and the scale decreased.
+      session.run(train_op, feed_dict={is_finite: False})
+      self.assertAllClose([-1., 0.], session.run(x))
+      self.assertEqual(16, session.run(loss_scale.scale))
+      self.assertEqual(2, session.run(global_step))
+
+  def testMinimumScale(self):
+    x = tf.get_variable("x", initializer=tf.constant(1.))
+    loss_scale = snt.custom_getters.DynamicLossScale(initial_scale=1)
+    train_op = loss_scale.minimize(tf.train.GradientDescentOptimizer(1.),
+                                   x * np.inf)
+    with self.test_session() as session:
+      session.run(tf.global_variables_initializer())
+      session.run(train_op)
+      self.assertEqual(1, session.run(loss_scale.scale))
+      self.assertEqual(1., session.run(x))
+
+  def testInvalidArguments(self):
+    with self.assertRaisesRegexp(ValueError, "initial_scale"):
+      snt.custom_getters.DynamicLossScale(initial_scale=0.5)
+    with self.assertRaisesRegexp(ValueError, "increment_period"):
+      snt.custom_getters.DynamicLossScale(increment_period=0)
+    with self.assertRaisesRegexp(ValueError, "multiplier"):
+      snt.custom_getters.DynamicLossScale(multiplier=1)
+
+
+if __name__ == "__main__":
+  tf.test.main()
@@ -27,6 +27,9 @@ def restore_initializer(filename, name_fn=None,
                         collection=tf.GraphKeys.GLOBAL_VARIABLES):
   """Custom getter to restore all variables with `snt.restore_initializer`.
 
+  Each restored variable gets its own RestoreV2 op; build the variables within
+  `snt.batch_restore_initializers` to restore them all with a single one.
+
   Args:
     filename: The filename of the checkpoint.
     name_fn: A function which can map the name of the variable requested. This
@@ -0,0 +1,150 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+
+"""Attribute-level lazy loading of the public API of packages.
+
+A package exposing names defined in many submodules usually imports all of
+them in its `__init__.py`, so importing the package costs as much as importing
+everything. Instead, the `__init__.py` can list where each name is defined:
+
+```python
+lazy_loader.install(__name__, [
+    ("sonnet.python.modules.basic", "Linear"),
+    ("sonnet.python.modules.conv", "Conv2D"),
+])
+```
+
+and each submodule is then only imported when one of its names is first
+accessed, e.g. `snt.Linear`.
+
+This module must not import TensorFlow.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import importlib
+import sys
+import types
+
+# Dependency imports
+import semantic_version
+
+
+def ensure_dependency_available_at_version(package_name, min_version):
+  """Throw helpful error if required dependencies not available."""
+
+  try:
+    pkg = importlib.import_module(package_name)
+  except ImportError:
+    pip_name = package_name.replace("_", "-")
+    raise SystemError(
+        "Sonnet requires %s (minimum version %s) to be installed. "
+        "If using pip, run `pip install %s` or "
+        "`pip install %s-gpu`" % (
+            package_name, min_version, pip_name, pip_name))
+
+  installed_version = semantic_version.Version(pkg.__version__)
+  version_spec = semantic_version.Spec(">=" + min_version)
+  if not version_spec.match(installed_version):
+    raise SystemError(
+        "%s version %s is installed, but Sonnet requires at least version %s." %
+        (package_name, pkg.__version__, min_version))
+
+
+def _import_attribute(module_name, attribute_name):
+  """Returns `from module_name import attribute_name`."""
+  module = importlib.import_module(module_name)
+  try:
+    return getattr(module, attribute_name)
+  except AttributeError:
+    # Submodules are only attributes of their package once imported.
+    return importlib.import_module(module_name + "." + attribute_name)
+
+
+class LazyModule(types.ModuleType):
+  """Module importing some of its attributes on first access."""
+
+  def __init__(self, module, attribute_sources):
+    """Constructs a LazyModule replacing `module`.
+
+    Args:
+      module: The module to replace. Its attributes are copied to this module.
+      attribute_sources: Dict from the name of each lazily loaded attribute
+        to the name of the module defining it.
+    """
+    super(LazyModule, self).__init__(module.__name__, module.__doc__)
+    self.__dict__.update(module.__dict__)
+    # The functions of the replaced module use its globals, which Python 2
+    # clears when the module is deleted.
+    self.__dict__["_lazy_loader_replaced_module"] = module
+    self.__dict__["_lazy_loader_attribute_sources"] = attribute_sources
+
+  def __getattr__(self, name):
+    # Only called for attributes which are not set yet.
+    try:
+      module_name = self._lazy_loader_attribute_sources[name]
+    except KeyError:
+      raise AttributeError("module {!r} has no attribute {!r}".format(
+          self.__name__, name))
+    if module_name == self.__name__:
+      # A submodule of this package: importing this package again would
+      # return this module, whose attribute is the one being loaded.
+      value = importlib.import_module(module_name + "." + name)
+    else:
+      value = _import_attribute(module_name, name)
+    setattr(self, name, value)
+    return value
+
+  def __setattr__(self, name, value):
+    # Importing a submodule sets it as an attribute of its package, which must
+    # not hide a lazily loaded attribute of the same name, e.g. the function
+    # `restore_initializer` of the module `custom_getters.restore_initializer`.
+    sources = self._lazy_loader_attribute_sources
+    if (name in sources and sources[name] != self.__name__ and
+        isinstance(value, types.ModuleType) and
+        value.__name__ == self.__name__ + "." + name):
+      return
+    super(LazyModule, self).__setattr__(name, value)
+
+  def __dir__(self):
+    return sorted(set(self.__dict__) | set(self._lazy_loader_attribute_sources))
+
+
+def install(module_name, attributes):
+  """Makes the given attributes of a module lazily loaded.
+
+  This replaces the module in `sys.modules` with a `LazyModule`, so it must be
+  called at the end of the module's own code, e.g. at the end of a package's
+  `__init__.py`. The `__all__` attribute of the module is set to its public
+  attributes, so `from module import *` imports the lazily loaded attributes
+  too.
+
+  Args:
+    module_name: The name of the module, i.e. `__name__` within the module.
+    attributes: Iterable of `(source_module_name, attribute_name)` pairs, such
+      that `from source_module_name import attribute_name` imports an
+      attribute of the module. A `source_module_name` equal to `module_name`
+      makes the attribute the submodule `module_name.attribute_name`.
+  """
+  module = sys.modules[module_name]
+  attribute_sources = dict(
+      (attribute_name, source_module_name)
+      for source_module_name, attribute_name in attributes)
+  lazy_module = LazyModule(module, attribute_sources)
+  lazy_module.__all__ = sorted(
+      name for name in dir(lazy_module) if not name.startswith("_"))
+  sys.modules[module_name] = lazy_module
@@ -0,0 +1,158 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+
+"""Tests for sonnet.python.lazy_loader."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import importlib
+import subprocess
+import sys
+import timeit
+import types
+
+# Dependency imports
+import sonnet as snt
+from sonnet.python import lazy_loader
+from sonnet.python.modules import basic
+from sonnet.python.modules.nets import mlp
+import tensorflow as tf
+
+
+_TEST_MODULE_NAME = "sonnet_lazy_loader_test_module"
+
+
+class LazyLoaderTest(tf.test.TestCase):
+
+  def setUp(self):
+    super(LazyLoaderTest, self).setUp()
+    module = types.ModuleType(_TEST_MODULE_NAME, "Test module.")
+    module.eager_attribute = 42
+    sys.modules[_TEST_MODULE_NAME] = module
+    lazy_loader.install(_TEST_MODULE_NAME, [
+        ("collections", "OrderedDict"),
+        ("sonnet_lazy_loader_test_missing_module", "missing"),
+    ])
+    self.lazy_module = sys.modules[_TEST_MODULE_NAME]
+
+  def tearDown(self):
+    del sys.modules[_TEST_MODULE_NAME]
+    super(LazyLoaderTest, self).tearDown()
+
+  def testAttributes(self):
+    self.assertIsInstance(self.lazy_module, lazy_loader.LazyModule)
+    self.assertEqual(_TEST_MODULE_NAME, self.lazy_module.__name__)
+    self.assertEqual("Test module.", self.lazy_module.__doc__)
+    self.assertEqual(42, self.lazy_module.eager_attribute)
+    self.assertNotIn("OrderedDict", vars(self.lazy_module))
+    self.assertIs(collections.OrderedDict, self.lazy_module.OrderedDict)
+    self.assertIn("OrderedDict", vars(self.lazy_module))
+
+  def testSourcesOnlyImportedOnAccess(self):
+    # Installing did not import the missing module.
+    with self.assertRaises(ImportError):
+      self.lazy_module.missing  # pylint: disable=pointless-statement
+
+  def testMissingAttribute(self):
+    with self.assertRaisesRegexp(AttributeError, "no attribute 'foo'"):
+      self.lazy_module.foo  # pylint: disable=pointless-statement
+
+  def testDirAndAll(self):
+    for names in (dir(self.lazy_module), self.lazy_module.__all__):
+      self.assertIn("OrderedDict", names)
+      self.assertIn("eager_attribute", names)
+    self.assertNotIn("__doc__", self.lazy_module.__all__)
+
+  def testSonnetPublicApi(self):
+    self.assertIs(basic.Linear, snt.Linear)
+    self.assertIs(mlp.MLP, snt.nets.MLP)
+    self.assertIn("Linear", dir(snt))
+    self.assertIn("MLP", snt.nets.__all__)
+    self.assertEqual("1.27", snt.__version__)
+
+  def testSubmoduleDoesNotHideAttribute(self):
+    restore_initializer = importlib.import_module(
+        "sonnet.python.custom_getters.restore_initializer")
+    # The package attribute is the function, not the module defining it.
+    self.assertIs(restore_initializer.restore_initializer,
+                  snt.custom_getters.restore_initializer)
+    self.assertIsInstance(snt.custom_getters.bayes_by_backprop,
+                          types.ModuleType)
+
+  def testSubmoduleOfLazyPackageInFreshInterpreter(self):
+    # The submodule must not have been imported already, so use a new process.
+    code = ("import types; import sonnet as snt; "
+            "assert isinstance(snt.custom_getters.bayes_by_backprop, "
+            "types.ModuleType)")
+    process = subprocess.Popen([sys.executable, "-c", code],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+    self.assertEqual(0, process.returncode, stderr.decode("utf-8"))
+
+
+class ImportTimeBenchmark(tf.test.Benchmark):
+  """Benchmarks importing Sonnet in a new Python process."""
+
+  def _run_python(self, code, *flags):
+    """Runs `code` in a new process, returns its wall time and stderr."""
+    start_time = timeit.default_timer()
+    process = subprocess.Popen(
+        [sys.executable] + list(flags) + ["-c", code],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+    wall_time = timeit.default_timer() - start_time
+    if process.returncode:
+      raise RuntimeError(stderr)
+    return wall_time, stderr.decode("utf-8")
+
+  def _import_times(self, code):
+    """Returns the cumulative `-X importtime` time of each top-level module."""
+    _, stderr = self._run_python(code, "-X", "importtime")
+    import_times = collections.defaultdict(float)
+    for line in stderr.splitlines():
+      if not line.startswith("import time:") or "|" not in line:
+        continue
+      _, cumulative, name = line[len("import time:"):].split("|")
+      if cumulative.strip().isdigit() and not name.startswith("  "):
+        import_times[name.strip()] += int(cumulative) / 1e6
+    return import_times
+
+  def _benchmark_import(self, name, code):
+    wall_time, _ = self._run_python(code)
+    extras = {}
+    if sys.version_info >= (3, 7):
+      import_times = self._import_times(code)
+      extras["sonnet_import_time"] = import_times["sonnet"]
+      extras["total_import_time"] = sum(import_times.values())
+    self.report_benchmark(iters=1, wall_time=wall_time, name=name,
+                          extras=extras)
+
+  def benchmarkImportSonnet(self):
+    self._benchmark_import("import_sonnet", "import sonnet")
+
+  def benchmarkImportSonnetAndLinear(self):
+    self._benchmark_import("import_sonnet_and_linear",
+                           "import sonnet; sonnet.Linear")
+
+  def benchmarkImportSonnetAndAllModules(self):
+    self._benchmark_import("import_sonnet_and_all_modules",
+                           "from sonnet import *")
+
+
+if __name__ == "__main__":
+  tf.test.main()
@@ -29,6 +29,7 @@ import collections
 import contextlib
 import inspect
 import types
+import weakref
 
 # Dependency imports
 import contextlib2
@@ -57,6 +58,16 @@ from tensorflow.python.framework import ops
 
 _MODULE_STACK = []
 _CONNECTION_OBSERVER_STACK = []
+_CALL_OBSERVER_STACK = []
+
+# Levels of detail with which connections of modules to the graph are tracked.
+CONNECTION_TRACKING_FULL = "full"
+CONNECTION_TRACKING_SUMMARY = "summary"
+CONNECTION_TRACKING_OFF = "off"
+_CONNECTION_TRACKING_LEVELS = (CONNECTION_TRACKING_FULL,
+                               CONNECTION_TRACKING_SUMMARY,
+                               CONNECTION_TRACKING_OFF)
+_CONNECTION_TRACKING = CONNECTION_TRACKING_FULL
 
 
 @contextlib.contextmanager
@@ -90,6 +101,143 @@ def observe_connections(observer):
     _CONNECTION_OBSERVER_STACK.pop()
 
 
+def _check_connection_tracking(level):
+  if level not in _CONNECTION_TRACKING_LEVELS:
+    raise ValueError("Connection tracking level must be one of {}, not "
+                     "{!r}.".format(_CONNECTION_TRACKING_LEVELS, level))
+
+
+def get_connection_tracking():
+  """Returns the process-wide connection tracking level, see below."""
+  return _CONNECTION_TRACKING
+
+
+def set_connection_tracking(level):
+  """Sets how much is recorded when any Sonnet module is connected to the graph.
+
+  In graph mode, each connection of a module is recorded as a
+  `ConnectedSubGraph`. When modules are connected many times, for example in
+  a statically unrolled RNN, these records take a lot of memory, and building
+  them takes a significant part of the graph construction time. The level can
+  be one of:
+
+    * `CONNECTION_TRACKING_FULL`: the name scope, inputs and outputs of each
+      connection are recorded. This is the default.
+    * `CONNECTION_TRACKING_SUMMARY`: only the name scope of each connection is
+      recorded, and the inputs and outputs of its `ConnectedSubGraph` are
+      `None`.
+    * `CONNECTION_TRACKING_OFF`: connections are only counted, see
+      `AbstractModule.num_connections`.
+
+  The level of individual modules can be overridden with their
+  `connection_tracking` property.
+
+  Args:
+    level: One of the connection tracking levels above.
+
+  Raises:
+    ValueError: If `level` is not a connection tracking level.
+  """
+  global _CONNECTION_TRACKING
+  _check_connection_tracking(level)
+  _CONNECTION_TRACKING = level
+
+
+@contextlib.contextmanager
+def connection_tracking(level):
+  """Sets the process-wide connection tracking level within a context.
+
+  For example, to avoid recording the inputs and outputs of every step of a
+  long static unroll:
+
+  ```python
+  with snt.connection_tracking(snt.CONNECTION_TRACKING_SUMMARY):
+    outputs, state = tf.nn.static_rnn(core, inputs, initial_state)
+  ```
+
+  Args:
+    level: A connection tracking level, see `set_connection_tracking`.
+
+  Yields:
+    None: just yields control to the inner context.
+
+  Raises:
+    ValueError: If `level` is not a connection tracking level.
+  """
+  previous_level = get_connection_tracking()
+  set_connection_tracking(level)
+  try:
+    yield
+  finally:
+    set_connection_tracking(previous_level)
+
+
+@contextlib.contextmanager
+def _observe_calls(observer):
+  """Wraps every connection of any Sonnet module in a context.
+
+  Unlike `observe_connections`, which is notified once a module has been
+  connected, this allows observing the whole connection, e.g. to time it.
+
+  Args:
+    observer: Callable accepting a module and returning a context manager,
+      which is entered before the module is connected to the graph and exited
+      afterwards, including when the connection raises an error. Observers
+      registered with `observe_connections` are notified within this context.
+
+  Yields:
+    None: just yields control to the inner context.
+  """
+  _CALL_OBSERVER_STACK.append(observer)
+  try:
+    yield
+  finally:
+    _CALL_OBSERVER_STACK.pop()
+
+
+# Default module names, cached per class.
+_DEFAULT_NAMES = weakref.WeakKeyDictionary()
+
+
+def _make_call_adapter(build_fn):
+  """Returns a `__call__` function with the signature and docs of `build_fn`."""
+  @wrapt.decorator(adapter=build_fn)
+  def copy_signature(method, unused_instance, args, kwargs):
+    return method(*args, **kwargs)
+  @copy_signature
+  def __call__(instance, *args, **kwargs):  # pylint: disable=invalid-name
+    return AbstractModule.__call__(instance, *args, **kwargs)
+  __call__.__doc__ = build_fn.__doc__
+  return __call__
+
+
+def _get_call_adapter(cls, build_fn):
+  """Returns a `_make_call_adapter(build_fn)`, cached on `cls` if possible.
+
+  Building the signature adapter is much more expensive than the rest of the
+  construction of a small module, and it only depends on the `_build` method,
+  which is usually shared by all the instances of a class. The adapter of the
+  `_build` method of a class is stored as an attribute of the class, so that
+  it is released along with the class.
+
+  Args:
+    cls: The class of a module.
+    build_fn: The `_build` function of the module.
+
+  Returns:
+    A `__call__` function to bind to the module.
+  """
+  cached_build_fn, call_adapter = getattr(cls, "_call_adapter_cache",
+                                          (None, None))
+  if cached_build_fn is build_fn:
+    return call_adapter
+  call_adapter = _make_call_adapter(build_fn)
+  class_build_fn = getattr(cls, "_build", None)
+  if getattr(class_build_fn, "__func__", class_build_fn) is build_fn:
+    cls._call_adapter_cache = (build_fn, call_adapter)
+  return call_adapter
+
+
 @six.add_metaclass(abc.ABCMeta)
 class AbstractModule(object):
   """Superclass for Sonnet Modules.
@@ -144,13 +292,19 @@ class AbstractModule(object):
                        "arguments is not supported.")
 
     if name is None:
-      name = util.to_snake_case(self.__class__.__name__)
+      cls = self.__class__
+      name = _DEFAULT_NAMES.get(cls)
+      if name is None:
+        name = _DEFAULT_NAMES[cls] = util.to_snake_case(cls.__name__)
     elif not isinstance(name, six.string_types):
       raise TypeError("Name must be a string, not {} of type {}.".format(
           name, type(name)))
 
     self._is_connected = False
     self._connected_subgraphs = []
+    self._num_connections = 0
+    self._last_connection_tracked = False
+    self._connection_tracking = None
 
     # If the given custom getter is a dictionary with a per-variable custom
     # getter, wrap it into a single custom getter.
@@ -171,20 +325,15 @@ class AbstractModule(object):
     self._original_name = name
     self._unique_name = self._template.variable_scope.name.split("/")[-1]
 
-    # Copy signature of _build to __call__.
+    # Copy signature of _build to __call__. The docstring of the adapter is the
+    # one of _build, to enable better introspection.
     adapter_fn = getattr(self._build, "__func__", self._build)
-    @wrapt.decorator(adapter=adapter_fn)
-    def copy_signature(method, unused_instance, args, kwargs):
-      return method(*args, **kwargs)
-    @copy_signature
-    def __call__(instance, *args, **kwargs):  # pylint: disable=invalid-name
-      return AbstractModule.__call__(instance, *args, **kwargs)
     # use __dict__ instead of setting directly to avoid a Callable pytype error
-    self.__dict__["__call__"] = types.MethodType(__call__, self)
+    self.__dict__["__call__"] = types.MethodType(
+        _get_call_adapter(type(self), adapter_fn), self)
 
-    # Update __call__ and the object docstrings to enable better introspection.
+    # Update the object docstring to enable better introspection.
     self.__doc__ = self._build.__doc__
-    self.__call__.__func__.__doc__ = self._build.__doc__
 
     # Keep track of which graph this module has been connected to. Sonnet
     # modules cannot be connected to multiple graphs, as transparent variable
@@ -193,6 +342,13 @@ class AbstractModule(object):
 
     # Container for all variables created in this module and its sub-modules.
     self._all_variables = set([])
+    # The same variables in the order they were added, so that only the ones
+    # added since the last connection within each parent module are passed on
+    # to it, see `_capture_variables`.
+    self._all_variables_list = []
+    # Created when first connected within a parent module.
+    self._num_variables_passed_to_parent = None
+    self._sorted_variables = ()
 
     # Calling `.defun()` causes the module's call method to become wrapped as
     # a graph function.
@@ -303,7 +459,10 @@ class AbstractModule(object):
 
     Before exiting the context the module removes itself from the top of the
     call stack, and adds all of the variables in `self._all_variables` to its
-    parent module (the new top) of the call stack.
+    parent module (the new top) of the call stack. Only the variables the
+    parent was not given when this module was last connected within it are
+    passed on, so repeated connections of deep module hierarchies do not pay
+    for all of their variables at every level.
 
     Yields:
       Nothing, the yield just transfers focus back to the inner context.
@@ -322,7 +481,7 @@ class AbstractModule(object):
           stack.enter_context(template_store.as_default())
 
         stack.enter_context(
-            util.notify_about_variables(self._all_variables.add))
+            util.notify_about_variables(self._add_variable))
 
         yield
     finally:
@@ -333,12 +492,27 @@ class AbstractModule(object):
     if _MODULE_STACK:
       # Peek into the stack to add created variables to the parent
       parent_module = _MODULE_STACK[-1]
-      parent_module._all_variables.update(self._all_variables)  # pylint: disable=protected-access
+      if self._num_variables_passed_to_parent is None:
+        self._num_variables_passed_to_parent = weakref.WeakKeyDictionary()
+      num_passed = self._num_variables_passed_to_parent.get(parent_module, 0)
+      for variable in self._all_variables_list[num_passed:]:
+        parent_module._add_variable(variable)  # pylint: disable=protected-access
+      self._num_variables_passed_to_parent[parent_module] = len(
+          self._all_variables_list)
+
+  def _add_variable(self, variable):
+    """Adds `variable` to the variables used by this module."""
+    if variable not in self._all_variables:
+      self._all_variables.add(variable)
+      self._all_variables_list.append(variable)
 
   def _add_connected_subgraph(self, call_method, outputs, subgraph_name_scope,
                               *inputs_args, **inputs_kwargs):
     """Adds a newly connected subgraph.
 
+    The details recorded depend on the connection tracking level of the
+    module, see `set_connection_tracking`.
+
     Args:
       call_method: the function used to connect this Sonnet module to the graph.
       outputs: `call_method` outputs.
@@ -346,21 +520,29 @@ class AbstractModule(object):
       *inputs_args: `self._build` inputs `*args`.
       **inputs_kwargs: `self._build` inputs `*kwargs`.
     """
-    build_inputs = inspect.getcallargs(call_method,
-                                       *inputs_args, **inputs_kwargs)
-
-    # "self" should normally be in `build_inputs` but some people are decorating
-    # their `_build` function with `memoize`, in which case the function
-    # signature doesn't contain `self` anymore.
-
-    if "self" in build_inputs:
-      del build_inputs["self"]
+    level = self.connection_tracking
+    self._last_connection_tracked = level != CONNECTION_TRACKING_OFF
+    if level == CONNECTION_TRACKING_FULL:
+      build_inputs = inspect.getcallargs(call_method,
+                                         *inputs_args, **inputs_kwargs)
+
+      # "self" should normally be in `build_inputs` but some people are
+      # decorating their `_build` function with `memoize`, in which case the
+      # function signature doesn't contain `self` anymore.
+
+      if "self" in build_inputs:
+        del build_inputs["self"]
+    elif level == CONNECTION_TRACKING_SUMMARY or _CONNECTION_OBSERVER_STACK:
+      build_inputs = outputs = None
+    else:
+      return
 
     connected_subgraph = base_info.ConnectedSubGraph(
         module=self, name_scope=subgraph_name_scope,
         inputs=build_inputs,
         outputs=outputs)
-    self._connected_subgraphs.append(connected_subgraph)
+    if self._last_connection_tracked:
+      self._connected_subgraphs.append(connected_subgraph)
 
     for observer in _CONNECTION_OBSERVER_STACK:
       observer(connected_subgraph)
@@ -398,9 +580,19 @@ class AbstractModule(object):
     """
     self._check_init_called()
     self._check_same_graph()
+    if _CALL_OBSERVER_STACK:
+      with contextlib2.ExitStack() as stack:
+        for observer in list(_CALL_OBSERVER_STACK):
+          stack.enter_context(observer(self))
+        return self._connect(*args, **kwargs)
+    return self._connect(*args, **kwargs)
+
+  def _connect(self, *args, **kwargs):
+    """Connects the module to the graph, see `_call`."""
     with self._capture_variables():
       outputs, subgraph_name_scope = self._template(*args, **kwargs)
     self._is_connected = True
+    self._num_connections += 1
     if not tf.executing_eagerly():
       # In eager mode the module is called a lot more frequently than in graph
       # mode (for each training step) and so we don't keep track of connected
@@ -409,9 +601,39 @@ class AbstractModule(object):
                                    *args, **kwargs)
     return outputs
 
+  @property
+  def connection_tracking(self):
+    """The connection tracking level of the module.
+
+    Unless set for this module, this is the process-wide level, see
+    `set_connection_tracking`. Setting it to `None` makes the module follow
+    the process-wide level again.
+
+    Raises:
+      ValueError: If set to something other than `None` or a connection
+        tracking level.
+    """
+    if self._connection_tracking is None:
+      return _CONNECTION_TRACKING
+    return self._connection_tracking
+
+  @connection_tracking.setter
+  def connection_tracking(self, level):
+    if level is not None:
+      _check_connection_tracking(level)
+    self._connection_tracking = level
+
+  @property
+  def num_connections(self):
+    """Returns the number of times the module was connected to the graph."""
+    return self._num_connections
+
   @property
   def name_scopes(self):
-    """Returns a tuple of all name_scopes generated by this module."""
+    """Returns a tuple of all name_scopes generated by this module.
+
+    Connections made while connection tracking was off are not included.
+    """
     if tf.executing_eagerly():
       raise NotSupportedError(
           "The name_scopes property is not supported in eager mode.")
@@ -460,7 +682,11 @@ class AbstractModule(object):
 
   @property
   def connected_subgraphs(self):
-    """Returns the subgraphs created by this module so far."""
+    """Returns the subgraphs created by this module so far.
+
+    Connections made while connection tracking was off are not included, and
+    the inputs and outputs of those made with summary tracking are `None`.
+    """
     if tf.executing_eagerly():
       raise NotSupportedError(
           "Connected sub-graphs are not tracked in eager mode.")
@@ -471,15 +697,22 @@ class AbstractModule(object):
     """Returns the last subgraph created by this module.
 
     Returns:
-      The last connected subgraph.
+      The last connected subgraph. Its inputs and outputs are `None` if it was
+      connected with summary connection tracking.
 
     Raises:
       NotConnectedError: If the module is not connected to the Graph.
+      NotSupportedError: If connection tracking was off during the last
+        connection.
     """
     if tf.executing_eagerly():
       raise NotSupportedError(
           "Connected sub-graphs are not tracked in eager mode.")
     self._ensure_is_connected()
+    if not self._last_connection_tracked:
+      raise NotSupportedError(
+          "The last connection of {} was made with connection tracking "
+          "off.".format(self.module_name))
     return self._connected_subgraphs[-1]
 
   @classmethod
@@ -581,7 +814,11 @@ class AbstractModule(object):
       NotConnectedError: If the module is not connected to the Graph.
     """
     self._ensure_is_connected()
-    return util.sort_by_name(self._all_variables)
+    # Variables are never removed, so the sorted tuple only needs to be updated
+    # when variables were added.
+    if len(self._sorted_variables) != len(self._all_variables_list):
+      self._sorted_variables = util.sort_by_name(self._all_variables_list)
+    return self._sorted_variables
 
   @property
   def trainable_variables(self):
@@ -667,9 +904,9 @@ class AbstractModule(object):
       NotConnectedError: If the module is not connected to the Graph.
     """
     self._ensure_is_connected()
-    collection_variables = set(tf.get_collection(collection))
     # Return variables in self._all_variables that are in `collection`
-    return util.sort_by_name(self._all_variables & collection_variables)
+    return util.sort_by_name(
+        util.filter_by_collection(self._all_variables, collection=collection))
 
   def __getstate__(self):
     raise NotSupportedError(
@@ -19,6 +19,7 @@ from __future__ import division
 from __future__ import print_function
 
 import collections
+import functools
 # Dependency imports
 import six
 from sonnet.protos import module_pb2
@@ -116,13 +117,13 @@ def _to_proto_sparse_tensor(sparse_tensor, nested_proto,
     nested_proto.named_tuple.map[str_key].value = process_leafs(tensor)
 
 
-def _from_proto_sparse_tensor(sparse_tensor_proto, process_leafs):
+def _from_proto_sparse_tensor(sparse_tensor_proto, nested_from_proto):
   """Deserializes a `tf.SparseTensor` from `sparse_tensor_proto`.
 
   Args:
     sparse_tensor_proto: A proto representing a `tf.SparseTensor`.
-    process_leafs: A function to be applied to the leaf valued of the nested
-      structure.
+    nested_from_proto: A function deserializing the `module_pb2.NestedData`
+      of each component of the `tf.SparseTensor`.
 
   Returns:
     An instance of `tf.SparseTensor`.
@@ -137,15 +138,16 @@ def _from_proto_sparse_tensor(sparse_tensor_proto, process_leafs):
             _SPARSE_TENSOR_NAME, sparse_tensor_proto.named_tuple.name))
   named_tuple_map = sparse_tensor_proto.named_tuple.map
   return tf.SparseTensor(
-      indices=process_leafs(named_tuple_map["indices"].value),
-      values=process_leafs(named_tuple_map["values"].value),
-      dense_shape=process_leafs(named_tuple_map["dense_shape"].value))
+      indices=nested_from_proto(named_tuple_map["indices"]),
+      values=nested_from_proto(named_tuple_map["values"]),
+      dense_shape=nested_from_proto(named_tuple_map["dense_shape"]))
 
 
 # This named tuple contains the necessary information to handle a Python
 # object which should be handled in a specific way. The "check" field should
 # contain a callable returning `True` if the Python object is indeed special
-# and the "to_proto" field should contain a custom serializer.
+# and the "to_proto" and "from_proto" fields should contain a custom serializer
+# and deserializer.
 _SpecialTypeInfo = collections.namedtuple("_SpecialTypeInfo",
                                           ("check", "to_proto", "from_proto"))
 
@@ -157,70 +159,196 @@ _TO_PROTO_SPECIAL_TYPES[_SPARSE_TENSOR_NAME] = _SpecialTypeInfo(
     from_proto=_from_proto_sparse_tensor)
 
 
-def _nested_to_proto(nested_value, nested_proto, process_leafs,
-                     already_processed):
-  """Serializes `nested_value` into `nested_proto`.
+# Kinds of the nodes of `_NestedDataEncoder`, named after the fields of
+# `module_pb2.NestedData`.
+_LEAF_KINDS = ("value", "path_index")
+_SEQUENCE_KINDS = ("list", "tuple")
+_MAPPING_KINDS = ("dict", "named_tuple")
 
-  Args:
-    nested_value: A nested Python value.
-    nested_proto: A `module_pb2.NestedData` instance to be filled from the value
-      in `nested_value`.
-    process_leafs: A function to be applied to the leaf values of the nested
-      structure.
-    already_processed: Set of already processed objects (used to avoid
-      infinite recursion).
-  Raises:
-    ModuleInfoError: If `nested_proto` is not an instance of
-      `module_pb2.NestedData`.
+
+class _NestedDataEncoder(object):
+  """Serializes the inputs and outputs of the connected subgraphs of a module.
+
+  Modules connected many times see the same tensors and structures over and
+  over, e.g. the outputs of a connection of an RNN core are the inputs of the
+  next one. Each nested value is therefore first interned as a node, a
+  hashable `(kind, name, keys, child_ids)` description of a leaf or of a
+  container of other nodes, so that equal structures share a node. When
+  written, each node used more than once is serialized once in
+  `SonnetModule.shared_nested_data` and each graph element path once in
+  `SonnetModule.graph_element_paths`, and both are referred to by index.
   """
-  if not isinstance(nested_proto, module_pb2.NestedData):
-    raise base_errors.ModuleInfoError("Expected module_pb2.NestedData.")
 
-  # If this object was already processed, mark as "unserializable"
-  # to avoid infinite recursion.
-  if id(nested_value) in already_processed:
-    nested_proto.value = ""
-    return
-
-  # Check special types.
-  for type_name, type_info in six.iteritems(_TO_PROTO_SPECIAL_TYPES):
-    if type_info.check(nested_value):
-      nested_proto.special_type.name = type_name
-      type_info.to_proto(
-          nested_value, nested_proto.special_type.object,
-          process_leafs, already_processed)
-      return
-
-  # Check standard types.
-  if _is_iterable(nested_value):
-    # Mark this container as "already processed" to avoid infinite recursion.
-    already_processed.add(id(nested_value))
-    if isinstance(nested_value, dict):
-      nested_proto.dict.SetInParent()
-      for key, child in six.iteritems(nested_value):
-        str_key = str(key)
-        child_proto = nested_proto.dict.map[str_key]
-        _nested_to_proto(child, child_proto, process_leafs, already_processed)
-    elif isinstance(nested_value, tuple):
-      # NamedTuple?
-      if _is_namedtuple(nested_value):
-        nested_proto.named_tuple.name = type(nested_value).__name__
-        for str_key in nested_value._fields:
-          child = getattr(nested_value, str_key)
-          child_proto = nested_proto.named_tuple.map[str_key]
-          _nested_to_proto(child, child_proto, process_leafs, already_processed)
+  def __init__(self, module_info_def, process_leafs):
+    """Constructs a `_NestedDataEncoder`.
+
+    Args:
+      module_info_def: The `module_pb2.SonnetModule` the nested values are
+        serialized for.
+      process_leafs: A function returning the path of a leaf value, or the
+        empty string if it cannot be serialized.
+    """
+    self._module_info_def = module_info_def
+    self._process_leafs = process_leafs
+    self._nodes = []
+    self._node_ids = {}
+    self._num_uses = []
+    self._path_indices = {}
+    self._shared_indices = {}
+
+  def add(self, nested_value):
+    """Interns `nested_value`, returning a node id to pass to `write`."""
+    node_id = self._intern(nested_value, set())
+    self._num_uses[node_id] += 1
+    return node_id
+
+  def write(self, node_id, nested_proto):
+    """Serializes a node into `nested_proto`, once all values were added."""
+    if (self._num_uses[node_id] > 1 and
+        self._nodes[node_id][0] not in _LEAF_KINDS):
+      nested_proto.shared_index = self._shared_index(node_id)
+    else:
+      self._write_node(node_id, nested_proto)
+
+  def _node(self, kind, name="", keys=(), child_ids=()):
+    """Returns the id of the node with the given description."""
+    node = (kind, name, keys, child_ids)
+    node_id = self._node_ids.get(node)
+    if node_id is None:
+      node_id = len(self._nodes)
+      self._nodes.append(node)
+      self._node_ids[node] = node_id
+      self._num_uses.append(0)
+      # The uses of a node within an existing node are already counted.
+      for child_id in child_ids:
+        self._num_uses[child_id] += 1
+    return node_id
+
+  def _leaf_node(self, path):
+    if path:
+      return self._node("path_index", path)
+    # Deserialized as an `_UnserializableObject`.
+    return self._node("value")
+
+  def _mapping_node(self, kind, name, items):
+    if not items:
+      return self._node(kind, name)
+    keys, child_ids = zip(*sorted(items))
+    return self._node(kind, name, keys, child_ids)
+
+  def _intern(self, nested_value, already_processed):
+    """Returns the node id of `nested_value`.
+
+    Args:
+      nested_value: A nested Python value.
+      already_processed: Set of already processed objects (used to avoid
+        infinite recursion).
+
+    Returns:
+      The id of the node describing `nested_value`.
+    """
+    # If this object was already processed, mark as "unserializable"
+    # to avoid infinite recursion.
+    if id(nested_value) in already_processed:
+      return self._leaf_node("")
+
+    # Check special types.
+    for type_name, type_info in six.iteritems(_TO_PROTO_SPECIAL_TYPES):
+      if type_info.check(nested_value):
+        object_proto = module_pb2.NestedData()
+        type_info.to_proto(nested_value, object_proto, self._process_leafs,
+                           already_processed)
+        return self._node("special_type", type_name,
+                          child_ids=(self._intern_proto(object_proto),))
+
+    # Check standard types.
+    if _is_iterable(nested_value):
+      # Mark this container as "already processed" to avoid infinite recursion.
+      already_processed.add(id(nested_value))
+      if isinstance(nested_value, dict):
+        items = {}
+        for key, child in six.iteritems(nested_value):
+          items[str(key)] = self._intern(child, already_processed)
+        return self._mapping_node("dict", "", items.items())
+      elif _is_namedtuple(nested_value):
+        items = [(str_key, self._intern(getattr(nested_value, str_key),
+                                        already_processed))
+                 for str_key in nested_value._fields]
+        return self._mapping_node(
+            "named_tuple", type(nested_value).__name__, items)
       else:
-        nested_proto.tuple.SetInParent()
-        for child in nested_value:
-          child_proto = nested_proto.tuple.list.add()
-          _nested_to_proto(child, child_proto, process_leafs, already_processed)
+        kind = "tuple" if isinstance(nested_value, tuple) else "list"
+        child_ids = tuple(self._intern(child, already_processed)
+                          for child in nested_value)
+        return self._node(kind, child_ids=child_ids)
     else:
-      nested_proto.list.SetInParent()
-      for child in nested_value:
-        child_proto = nested_proto.list.list.add()
-        _nested_to_proto(child, child_proto, process_leafs, already_processed)
-  else:
-    nested_proto.value = process_leafs(nested_value)
+      return self._leaf_node(self._process_leafs(nested_value))
+
+  def _intern_proto(self, nested_proto):
+    """Returns the node id of a `NestedData` written by a special type."""
+    kind = nested_proto.WhichOneof("one_of")
+    if kind == "value":
+      return self._leaf_node(nested_proto.value)
+    elif kind in _SEQUENCE_KINDS:
+      child_ids = tuple(self._intern_proto(child)
+                        for child in getattr(nested_proto, kind).list)
+      return self._node(kind, child_ids=child_ids)
+    elif kind in _MAPPING_KINDS:
+      container = getattr(nested_proto, kind)
+      items = [(key, self._intern_proto(child))
+               for key, child in six.iteritems(container.map)]
+      name = container.name if kind == "named_tuple" else ""
+      return self._mapping_node(kind, name, items)
+    elif kind == "special_type":
+      return self._node(
+          kind, nested_proto.special_type.name,
+          child_ids=(self._intern_proto(nested_proto.special_type.object),))
+    else:
+      raise base_errors.ModuleInfoError(
+          "Cannot serialize a `NestedData` protobuf with field {}.".format(
+              kind))
+
+  def _shared_index(self, node_id):
+    """Returns the index of the node in `shared_nested_data`."""
+    shared_index = self._shared_indices.get(node_id)
+    if shared_index is None:
+      shared_nested_data = self._module_info_def.shared_nested_data
+      shared_index = len(shared_nested_data)
+      self._shared_indices[node_id] = shared_index
+      self._write_node(node_id, shared_nested_data.add())
+    return shared_index
+
+  def _path_index(self, path):
+    """Returns the index of `path` in `graph_element_paths`."""
+    path_index = self._path_indices.get(path)
+    if path_index is None:
+      path_index = len(self._module_info_def.graph_element_paths)
+      self._path_indices[path] = path_index
+      self._module_info_def.graph_element_paths.append(path)
+    return path_index
+
+  def _write_node(self, node_id, nested_proto):
+    """Serializes the contents of a node into `nested_proto`."""
+    kind, name, keys, child_ids = self._nodes[node_id]
+    if kind == "value":
+      nested_proto.value = name
+    elif kind == "path_index":
+      nested_proto.path_index = self._path_index(name)
+    elif kind == "special_type":
+      nested_proto.special_type.name = name
+      # Special types are deserialized from their own contents.
+      self._write_node(child_ids[0], nested_proto.special_type.object)
+    else:
+      container = getattr(nested_proto, kind)
+      container.SetInParent()
+      if kind in _SEQUENCE_KINDS:
+        for child_id in child_ids:
+          self.write(child_id, container.list.add())
+      else:
+        if kind == "named_tuple":
+          container.name = name
+        for key, child_id in zip(keys, child_ids):
+          self.write(child_id, container.map[key])
 
 
 def _module_info_to_proto(module_info, export_scope=None):
@@ -241,28 +369,44 @@ def _module_info_to_proto(module_info, export_scope=None):
       module_name=module_info.module_name,
       scope_name=strip_name_scope(module_info.scope_name),
       class_name=module_info.class_name)
-  for connected_subgraph in module_info.connected_subgraphs:
+  encoder = _NestedDataEncoder(module_info_def, process_leafs)
+  # Subgraphs connected with summary connection tracking have no inputs and
+  # outputs, which are then left unset.
+  def add_or_none(nested_value):
+    return None if nested_value is None else encoder.add(nested_value)
+  node_ids = [(add_or_none(connected_subgraph.inputs),
+               add_or_none(connected_subgraph.outputs))
+              for connected_subgraph in module_info.connected_subgraphs]
+  for connected_subgraph, (inputs_id, outputs_id) in zip(
+      module_info.connected_subgraphs, node_ids):
     connected_subgraph_info_def = module_info_def.connected_subgraphs.add()
     connected_subgraph_info_def.name_scope = strip_name_scope(
         connected_subgraph.name_scope)
-    _nested_to_proto(
-        connected_subgraph.inputs,
-        connected_subgraph_info_def.inputs,
-        process_leafs, set())
-    _nested_to_proto(
-        connected_subgraph.outputs,
-        connected_subgraph_info_def.outputs,
-        process_leafs, set())
+    if inputs_id is not None:
+      encoder.write(inputs_id, connected_subgraph_info_def.inputs)
+    if outputs_id is not None:
+      encoder.write(outputs_id, connected_subgraph_info_def.outputs)
   return module_info_def
 
 
-def _nested_from_proto(nested_proto, process_leafs):
+def _get_indexed(repeated_field, index, field_name):
+  """Returns `repeated_field[index]`, checking the index is in range."""
+  if not 0 <= index < len(repeated_field):
+    raise base_errors.ModuleInfoError(
+        "Invalid index {} of {} with {} elements.".format(
+            index, field_name, len(repeated_field)))
+  return repeated_field[index]
+
+
+def _nested_from_proto(nested_proto, process_leafs, module_info_def=None):
   """Deserializes `nested_proto`.
 
   Args:
     nested_proto: An instance of `module_pb2.NestedData`.
     process_leafs: A function to be applied to the leaf values of the nested
       structure.
+    module_info_def: The `module_pb2.SonnetModule` containing `nested_proto`,
+      holding the graph element paths and shared structures it refers to.
 
   Returns:
     An instance of `string`, `tuple`, `dict` or `namedtuple`.
@@ -274,6 +418,9 @@ def _nested_from_proto(nested_proto, process_leafs):
   if not isinstance(nested_proto, module_pb2.NestedData):
     raise base_errors.ModuleInfoError("Expected module_pb2.NestedData.")
 
+  def nested_from_proto(child):
+    return _nested_from_proto(child, process_leafs, module_info_def)
+
   if nested_proto.HasField("value"):
     value = nested_proto.value
     if not value:
@@ -281,17 +428,29 @@ def _nested_from_proto(nested_proto, process_leafs):
     else:
       value = process_leafs(value)
     return value
+  elif nested_proto.HasField("path_index"):
+    if module_info_def is None:
+      raise base_errors.ModuleInfoError(
+          "Cannot deserialize a path index without its `SonnetModule`.")
+    return process_leafs(_get_indexed(module_info_def.graph_element_paths,
+                                      nested_proto.path_index,
+                                      "graph_element_paths"))
+  elif nested_proto.HasField("shared_index"):
+    if module_info_def is None:
+      raise base_errors.ModuleInfoError(
+          "Cannot deserialize a shared index without its `SonnetModule`.")
+    return nested_from_proto(_get_indexed(module_info_def.shared_nested_data,
+                                          nested_proto.shared_index,
+                                          "shared_nested_data"))
   elif nested_proto.HasField("list"):
-    return [_nested_from_proto(child, process_leafs)
-            for child in nested_proto.list.list]
+    return [nested_from_proto(child) for child in nested_proto.list.list]
   elif nested_proto.HasField("tuple"):
-    return tuple(_nested_from_proto(child, process_leafs)
-                 for child in nested_proto.tuple.list)
+    return tuple(nested_from_proto(child) for child in nested_proto.tuple.list)
   elif nested_proto.HasField("dict"):
-    return {name: _nested_from_proto(child, process_leafs)
+    return {name: nested_from_proto(child)
             for name, child in six.iteritems(nested_proto.dict.map)}
   elif nested_proto.HasField("named_tuple"):
-    tmp_dict = {name: _nested_from_proto(child, process_leafs)
+    tmp_dict = {name: nested_from_proto(child)
                 for name, child in six.iteritems(nested_proto.named_tuple.map)}
     # Note that this needs to be a named tuple to work with existing usage.
     NamedTuple = collections.namedtuple(  # pylint: disable=invalid-name
@@ -301,15 +460,91 @@ def _nested_from_proto(nested_proto, process_leafs):
     if nested_proto.special_type.name not in _TO_PROTO_SPECIAL_TYPES:
       return _UnserializableObject()
     type_info = _TO_PROTO_SPECIAL_TYPES[nested_proto.special_type.name]
-    return type_info.from_proto(nested_proto.special_type.object, process_leafs)
+    return type_info.from_proto(nested_proto.special_type.object,
+                                nested_from_proto)
   else:
     raise base_errors.ModuleInfoError(
         "Cannot deserialize a `ModuleInfo` protobuf with no fields.")
 
 
+class _LazyConnectedSubGraph(ConnectedSubGraph):
+  """`ConnectedSubGraph` deserializing its inputs and outputs on first access.
+
+  Importing a MetaGraph deserializes every `ModuleInfo` in its collections,
+  while the inputs and outputs of their connected subgraphs are rarely looked
+  at. The underlying tuple holds `None` for them, so every way of reading the
+  fields goes through the `inputs` and `outputs` properties. Errors in the
+  serialized inputs or outputs are raised when they are first accessed.
+  """
+
+  def __new__(cls, module, name_scope, inputs_fn, outputs_fn):
+    self = super(_LazyConnectedSubGraph, cls).__new__(
+        cls, module, name_scope, None, None)
+    self._fns = {"inputs": inputs_fn, "outputs": outputs_fn}
+    self._values = {}
+    return self
+
+  def _get_field(self, field):
+    if field not in self._values:
+      self._values[field] = self._fns[field]()
+    return self._values[field]
+
+  @property
+  def module(self):
+    return tuple.__getitem__(self, 0)
+
+  @property
+  def name_scope(self):
+    return tuple.__getitem__(self, 1)
+
+  @property
+  def inputs(self):
+    return self._get_field("inputs")
+
+  @property
+  def outputs(self):
+    return self._get_field("outputs")
+
+  def __iter__(self):
+    yield tuple.__getitem__(self, 0)
+    yield tuple.__getitem__(self, 1)
+    yield self.inputs
+    yield self.outputs
+
+  def __getitem__(self, index):
+    return tuple(self)[index]
+
+  def __getslice__(self, start, stop):
+    # Only used by Python 2.
+    return tuple(self)[start:stop]
+
+  def __eq__(self, other):
+    return tuple(self) == other
+
+  def __ne__(self, other):
+    return not self == other
+
+  def __hash__(self):
+    return hash(tuple(self))
+
+  def __repr__(self):
+    return repr(ConnectedSubGraph(*self))
+
+  def __reduce__(self):
+    return ConnectedSubGraph, tuple(self)
+
+  @classmethod
+  def _make(cls, iterable):
+    # Used by `_replace`, e.g. to replace the inputs.
+    return ConnectedSubGraph._make(iterable)
+
+
 def _module_info_from_proto(module_info_def, import_scope=None):
   """Deserializes `module_info_def` proto.
 
+  The inputs and outputs of the connected subgraphs are only deserialized
+  when first accessed.
+
   Args:
     module_info_def: An instance of `module_pb2.SonnetModule`.
     import_scope: Optional `string`. Name scope to use.
@@ -332,14 +567,19 @@ def _module_info_from_proto(module_info_def, import_scope=None):
       scope_name=prepend_name_scope(module_info_def.scope_name),
       class_name=module_info_def.class_name,
       connected_subgraphs=connected_subgraphs)
+  def nested_from_proto_or_none(connected_subgraph_def, field):
+    if not connected_subgraph_def.HasField(field):
+      return None
+    return _nested_from_proto(getattr(connected_subgraph_def, field),
+                              process_leafs, module_info_def)
   for connected_subgraph_def in module_info_def.connected_subgraphs:
-    connected_subgraph = ConnectedSubGraph(
+    connected_subgraph = _LazyConnectedSubGraph(
         module=module_info,
         name_scope=prepend_name_scope(connected_subgraph_def.name_scope),
-        inputs=_nested_from_proto(
-            connected_subgraph_def.inputs, process_leafs),
-        outputs=_nested_from_proto(
-            connected_subgraph_def.outputs, process_leafs))
+        inputs_fn=functools.partial(
+            nested_from_proto_or_none, connected_subgraph_def, "inputs"),
+        outputs_fn=functools.partial(
+            nested_from_proto_or_none, connected_subgraph_def, "outputs"))
     connected_subgraphs.append(connected_subgraph)
   return module_info
 
@@ -20,11 +20,15 @@ from __future__ import division
 from __future__ import print_function
 
 import collections
+import timeit
 
 # Dependency imports
+from sonnet.protos import module_pb2
 from sonnet.python.modules import base
+from sonnet.python.modules import base_errors
 from sonnet.python.modules import base_info
 from sonnet.python.modules import basic
+from sonnet.python.modules import gated_rnn
 import tensorflow as tf
 from tensorflow.python.util import nest
 
@@ -180,6 +184,31 @@ class ModuleInfoTest(tf.test.TestCase):
     _copy_default_graph()
     check()
 
+  def testModuleInfo_connection_tracking(self):
+    # pylint: disable=not-callable
+    tf.reset_default_graph()
+    dumb = DumbModule(name="dumb_a")
+    ph_0 = tf.placeholder(dtype=tf.float32, shape=(1, 10,))
+    dumb(ph_0)
+    with base.connection_tracking(base.CONNECTION_TRACKING_SUMMARY):
+      with tf.name_scope("foo"):
+        dumb(ph_0)
+    with base.connection_tracking(base.CONNECTION_TRACKING_OFF):
+      dumb(ph_0)
+    def check():
+      sonnet_collection = tf.get_default_graph().get_collection(
+          base_info.SONNET_COLLECTION_NAME)
+      connected_subgraphs = sonnet_collection[0].connected_subgraphs
+      self.assertEqual(len(connected_subgraphs), 2)
+      self.assertIsInstance(connected_subgraphs[0].inputs["inputs"], tf.Tensor)
+      self.assertIsInstance(connected_subgraphs[0].outputs, tf.Tensor)
+      self.assertEqual(connected_subgraphs[1].name_scope, "foo/dumb_a")
+      self.assertIsNone(connected_subgraphs[1].inputs)
+      self.assertIsNone(connected_subgraphs[1].outputs)
+    check()
+    _copy_default_graph()
+    check()
+
   def testModuleInfo_sparsetensor(self):
     # pylint: disable=not-callable
     tf.reset_default_graph()
@@ -289,6 +318,129 @@ class ModuleInfoTest(tf.test.TestCase):
     _copy_default_graph()
     check(base_info._UnserializableObject)
 
+  def testModuleInfo_deduplication(self):
+    # pylint: disable=not-callable
+    tf.reset_default_graph()
+    dumb = DumbModule(name="dumb_a", no_nest=True)
+    ph_0 = tf.placeholder(dtype=tf.float32, shape=(1, 10,))
+    ph_1 = tf.placeholder(dtype=tf.float32, shape=(1, 10,))
+    dumb((ph_0, ph_1))
+    with tf.name_scope("foo"):
+      dumb((ph_0, ph_1))
+    names = (ph_0.name, ph_1.name)
+    sonnet_collection = tf.get_default_graph().get_collection(
+        base_info.SONNET_COLLECTION_NAME)
+    module_info_def = base_info._module_info_to_proto(sonnet_collection[0])
+    self.assertEqual(list(names), list(module_info_def.graph_element_paths))
+    # The `{"inputs": (ph_0, ph_1)}` inputs and the `(ph_0, ph_1)` outputs,
+    # which are also nested in the inputs.
+    self.assertEqual(2, len(module_info_def.shared_nested_data))
+    for connected_subgraph_def in module_info_def.connected_subgraphs:
+      self.assertEqual(0, connected_subgraph_def.inputs.shared_index)
+      self.assertEqual(1, connected_subgraph_def.outputs.shared_index)
+    def check():
+      sonnet_collection = tf.get_default_graph().get_collection(
+          base_info.SONNET_COLLECTION_NAME)
+      connected_subgraphs = sonnet_collection[0].connected_subgraphs
+      self.assertEqual(2, len(connected_subgraphs))
+      for connected_subgraph in connected_subgraphs:
+        self.assertEqual(
+            names, tuple(t.name for t in connected_subgraph.inputs["inputs"]))
+        self.assertEqual(
+            names, tuple(t.name for t in connected_subgraph.outputs))
+    check()
+    _copy_default_graph()
+    check()
+
+  def testModuleInfo_lazy_deserialization(self):
+    # pylint: disable=not-callable
+    tf.reset_default_graph()
+    dumb = DumbModule(name="dumb_a")
+    ph_0 = tf.placeholder(dtype=tf.float32, shape=(1, 10,))
+    dumb(ph_0)
+    _copy_default_graph()
+    sonnet_collection = tf.get_default_graph().get_collection(
+        base_info.SONNET_COLLECTION_NAME)
+    connected_subgraph = sonnet_collection[0].connected_subgraphs[0]
+    module, name_scope, inputs, outputs = connected_subgraph
+    self.assertIs(sonnet_collection[0], module)
+    self.assertEqual("dumb_a", name_scope)
+    self.assertIs(inputs, connected_subgraph.inputs)
+    self.assertIs(outputs, connected_subgraph[3])
+    self.assertIsInstance(outputs, tf.Tensor)
+    self.assertEqual(
+        base_info.ConnectedSubGraph(module, name_scope, inputs, outputs),
+        connected_subgraph)
+    self.assertIsNone(connected_subgraph._replace(inputs=None).inputs)
+    self.assertIs(outputs, connected_subgraph._asdict()["outputs"])
+
+  def testModuleInfo_invalid_index(self):
+    tf.reset_default_graph()
+    module_info_def = module_pb2.SonnetModule(
+        module_name="dumb_a", scope_name="dumb_a",
+        class_name="{}.DumbModule".format(THIS_MODULE))
+    connected_subgraph_def = module_info_def.connected_subgraphs.add()
+    connected_subgraph_def.name_scope = "dumb_a"
+    connected_subgraph_def.inputs.path_index = 0
+    connected_subgraph_def.outputs.shared_index = 0
+    # The inputs and outputs are only deserialized when accessed.
+    module_info = base_info._module_info_from_proto(module_info_def)
+    connected_subgraph = module_info.connected_subgraphs[0]
+    self.assertEqual("dumb_a", connected_subgraph.name_scope)
+    with self.assertRaisesRegexp(base_errors.ModuleInfoError,
+                                 "index 0 of graph_element_paths"):
+      connected_subgraph.inputs  # pylint: disable=pointless-statement
+    with self.assertRaisesRegexp(base_errors.ModuleInfoError,
+                                 "index 0 of shared_nested_data"):
+      connected_subgraph.outputs  # pylint: disable=pointless-statement
+
+  def testModuleInfo_paths_without_index(self):
+    # Protos serialized before graph element paths were interned.
+    tf.reset_default_graph()
+    ph_0 = tf.placeholder(dtype=tf.float32, shape=(1, 10,))
+    module_info_def = module_pb2.SonnetModule(
+        module_name="dumb_a", scope_name="dumb_a",
+        class_name="{}.DumbModule".format(THIS_MODULE))
+    connected_subgraph_def = module_info_def.connected_subgraphs.add()
+    connected_subgraph_def.name_scope = "dumb_a"
+    connected_subgraph_def.inputs.dict.map["inputs"].value = ph_0.name
+    connected_subgraph_def.outputs.value = ph_0.name
+    module_info = base_info._module_info_from_proto(module_info_def)
+    connected_subgraph = module_info.connected_subgraphs[0]
+    self.assertIs(ph_0, connected_subgraph.inputs["inputs"])
+    self.assertIs(ph_0, connected_subgraph.outputs)
+
+
+class ModuleInfoSerializationBenchmark(tf.test.Benchmark):
+  """Benchmarks exporting and importing an LSTM unrolled over 1000 steps."""
+
+  def _benchmark_export_import(self, num_steps=1000, batch_size=16,
+                               hidden_size=32):
+    graph = tf.Graph()
+    with graph.as_default():
+      core = gated_rnn.LSTM(hidden_size)
+      inputs = tf.zeros([batch_size, hidden_size])
+      state = core.initial_state(batch_size)
+      for _ in range(num_steps):
+        _, state = core(inputs, state)
+      start_time = timeit.default_timer()
+      meta_graph_def = tf.train.export_meta_graph()
+      export_time = timeit.default_timer() - start_time
+    with tf.Graph().as_default():
+      start_time = timeit.default_timer()
+      tf.train.import_meta_graph(meta_graph_def)
+      import_time = timeit.default_timer() - start_time
+    collection_def = meta_graph_def.collection_def[
+        base_info.SONNET_COLLECTION_NAME]
+    self.report_benchmark(
+        iters=1, wall_time=export_time + import_time,
+        name="module_info_export_import_{}_steps".format(num_steps),
+        extras={"export_time": export_time,
+                "import_time": import_time,
+                "sonnet_collection_bytes": collection_def.ByteSize()})
+
+  def benchmarkExportImport(self):
+    self._benchmark_export_import()
 
 if __name__ == "__main__":
   tf.test.main()
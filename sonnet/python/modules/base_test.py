@@ -20,16 +20,29 @@ from __future__ import division
 from __future__ import print_function
 
 import functools
+import gc
 import inspect
 import pickle
+import timeit
+import weakref
 
 # Dependency imports
 from absl.testing import parameterized
 import numpy as np
 import six
 from sonnet.python.modules import base
+from sonnet.python.modules import basic
+from sonnet.python.modules import basic_rnn
+from sonnet.python.modules import gated_rnn
+from sonnet.python.modules import sequential
 import tensorflow as tf
 
+try:
+  import tracemalloc  # pylint: disable=g-import-not-at-top
+except ImportError:
+  # Only available in Python 3.
+  tracemalloc = None
+
 tfe = tf.contrib.eager
 logging = tf.logging
 
@@ -511,6 +524,31 @@ class AbstractModuleTest(parameterized.TestCase, tf.test.TestCase):
     all_variable_names = sorted([str(v.name) for v in all_variables])
     self.assertEqual(["module_b/b:0", "module_b/w:0"], all_variable_names)
 
+  def testVariablesPassedToEveryParent(self):
+    inputs = tf.ones(dtype=tf.float32, shape=[10, 10])
+    submodule = SimpleModule(name="simple_submodule")
+    submodule(inputs)  # pylint: disable=not-callable
+    parent_a = base.Module(submodule, name="parent_a")
+    parent_b = base.Module(
+        lambda x: SimpleModule(name="simple_build")(submodule(x)),  # pylint: disable=not-callable
+        name="parent_b")
+
+    parent_a(inputs)  # pylint: disable=not-callable
+    self.assertEqual(submodule.variables, parent_a.variables)
+    for _ in range(2):
+      parent_b(inputs)  # pylint: disable=not-callable
+    self.assertLen(parent_b.variables, 6)
+    self.assertTrue(set(submodule.variables).issubset(parent_b.variables))
+
+    # Variables added to a submodule after it was connected within a parent
+    # are passed on to the parent when the submodule is connected again.
+    with submodule._enter_variable_scope():  # pylint: disable=protected-access
+      late_variable = tf.get_variable("late", shape=[1])
+    self.assertNotIn(late_variable, parent_a.variables)
+    parent_a(inputs)  # pylint: disable=not-callable
+    self.assertIn(late_variable, parent_a.variables)
+    self.assertEqual(submodule.variables, parent_a.variables)
+
   def testCallSignatureAndDocstring(self):
     my_module = SimpleModule()
     self.assertEqual(
@@ -518,6 +556,29 @@ class AbstractModuleTest(parameterized.TestCase, tf.test.TestCase):
         inspect.getargspec(my_module._build))
     self.assertEqual(my_module.__call__.__doc__, my_module._build.__doc__)
 
+  def testCallAdapterSharedByInstances(self):
+    module_a = SimpleModule(name="module_a")
+    module_b = SimpleModule(name="module_b")
+    self.assertIs(module_a.__call__.__func__, module_b.__call__.__func__)
+    self.assertIs(module_a, module_a.__call__.__self__)
+    self.assertIs(module_b, module_b.__call__.__self__)
+    self.assertIsNot(module_a.__call__.__func__,
+                     ComplexModule().__call__.__func__)
+
+  def testCallAdapterDoesNotKeepClassAlive(self):
+    class RuntimeModule(SimpleModule):
+
+      def _build(self, inputs):
+        return inputs
+
+    module = RuntimeModule()
+    self.assertIs(module.__call__.__func__,
+                  RuntimeModule().__call__.__func__)
+    class_ref = weakref.ref(RuntimeModule)
+    del RuntimeModule, module
+    gc.collect()
+    self.assertIsNone(class_ref())
+
 
 def _make_model_with_params(inputs, output_size):
   weight_shape = [inputs.get_shape().as_list()[-1], output_size]
@@ -675,6 +736,222 @@ class ConnectionObserverTest(tf.test.TestCase):
     self.assertIs(self._connected_subgraphs[2].outputs, outputs)
 
 
+class ConnectionTrackingTest(tf.test.TestCase):
+
+  def setUp(self):
+    super(ConnectionTrackingTest, self).setUp()
+    self._inputs = tf.zeros(shape=(10, 10), dtype=tf.float32)
+
+  def testDefaultLevel(self):
+    self.assertEqual(base.CONNECTION_TRACKING_FULL,
+                     base.get_connection_tracking())
+    self.assertEqual(base.CONNECTION_TRACKING_FULL,
+                     SimpleModule().connection_tracking)
+
+  def testSummary(self):
+    module = SimpleModule(name="simple")
+    with base.connection_tracking(base.CONNECTION_TRACKING_SUMMARY):
+      module(self._inputs)
+      with tf.name_scope("foo"):
+        module(self._inputs)
+    self.assertEqual(base.CONNECTION_TRACKING_FULL,
+                     base.get_connection_tracking())
+
+    self.assertEqual(2, module.num_connections)
+    self.assertEqual(("simple", "foo/simple"), module.name_scopes)
+    for subgraph in module.connected_subgraphs:
+      self.assertIs(module, subgraph.module)
+      self.assertIsNone(subgraph.inputs)
+      self.assertIsNone(subgraph.outputs)
+    self.assertEqual("foo/simple", module.last_connected_subgraph.name_scope)
+
+  def testOff(self):
+    module = SimpleModule(name="simple")
+    outputs = module(self._inputs)
+    with base.connection_tracking(base.CONNECTION_TRACKING_OFF):
+      module(self._inputs)
+
+    self.assertEqual(2, module.num_connections)
+    self.assertEqual(("simple",), module.name_scopes)
+    self.assertEqual(1, len(module.connected_subgraphs))
+    self.assertIs(outputs, module.connected_subgraphs[0].outputs)
+    with self.assertRaisesRegexp(base.NotSupportedError, "tracking off"):
+      module.last_connected_subgraph  # pylint: disable=pointless-statement
+
+    module(self._inputs)
+    self.assertEqual(2, len(module.connected_subgraphs))
+    self.assertIs(module.connected_subgraphs[1],
+                  module.last_connected_subgraph)
+
+  def testPerModuleLevel(self):
+    module = SimpleModule(name="simple")
+    module.connection_tracking = base.CONNECTION_TRACKING_OFF
+    other_module = SimpleModule(name="other")
+    module(self._inputs)
+    other_module(self._inputs)
+    self.assertEqual((), module.name_scopes)
+    self.assertEqual(("other",), other_module.name_scopes)
+
+    # The per-module level takes precedence over the process-wide level.
+    module.connection_tracking = base.CONNECTION_TRACKING_SUMMARY
+    with base.connection_tracking(base.CONNECTION_TRACKING_OFF):
+      module(self._inputs)
+    self.assertIsNone(module.last_connected_subgraph.inputs)
+
+    module.connection_tracking = None
+    self.assertEqual(base.CONNECTION_TRACKING_FULL, module.connection_tracking)
+
+  def testObserversNotifiedWhenOff(self):
+    connected_subgraphs = []
+    module = SimpleModule(name="simple")
+    with base.connection_tracking(base.CONNECTION_TRACKING_OFF):
+      with base.observe_connections(connected_subgraphs.append):
+        module(self._inputs)
+
+    self.assertEqual(1, len(connected_subgraphs))
+    self.assertIs(module, connected_subgraphs[0].module)
+    self.assertEqual("simple", connected_subgraphs[0].name_scope)
+    self.assertEqual((), module.connected_subgraphs)
+
+  def testBadLevel(self):
+    with self.assertRaisesRegexp(ValueError, "tracking level"):
+      base.set_connection_tracking("some")
+    with self.assertRaisesRegexp(ValueError, "tracking level"):
+      SimpleModule().connection_tracking = "some"
+    self.assertEqual(base.CONNECTION_TRACKING_FULL,
+                     base.get_connection_tracking())
+
+
+def _traced_python_memory(fn):
+  """Returns the Python memory in use once `fn()` returns, or None.
+
+  The result of `fn` is kept alive until the memory is measured. Tracing slows
+  the code down, so benchmarks time a separate, untraced call.
+
+  Args:
+    fn: Function to call.
+
+  Returns:
+    The number of bytes, or None if `tracemalloc` is not available.
+  """
+  if tracemalloc is None:
+    return None
+  tracemalloc.start()
+  try:
+    result = fn()  # pylint: disable=unused-variable
+    memory, _ = tracemalloc.get_traced_memory()
+  finally:
+    tracemalloc.stop()
+  return memory
+
+
+class ConnectionTrackingBenchmark(tf.test.Benchmark):
+  """Benchmarks connecting an LSTM statically unrolled over 1000 steps."""
+
+  def _unroll(self, level, num_steps=1000, batch_size=16, hidden_size=32):
+    """Returns the construction time and the graph of a static unroll."""
+    graph = tf.Graph()
+    with graph.as_default():
+      core = gated_rnn.LSTM(hidden_size)
+      inputs = tf.zeros([batch_size, hidden_size])
+      state = core.initial_state(batch_size)
+      start_time = timeit.default_timer()
+      with base.connection_tracking(level):
+        for _ in range(num_steps):
+          _, state = core(inputs, state)
+      return timeit.default_timer() - start_time, graph
+
+  def _benchmark_static_unroll(self, level):
+    wall_time, _ = self._unroll(level)
+    extras = {}
+    memory = _traced_python_memory(lambda: self._unroll(level))
+    if memory is not None:
+      extras["python_memory_bytes"] = memory
+    self.report_benchmark(iters=1, wall_time=wall_time,
+                          name="static_unroll_tracking_{}".format(level),
+                          extras=extras)
+
+  def benchmarkStaticUnrollTrackingFull(self):
+    self._benchmark_static_unroll(base.CONNECTION_TRACKING_FULL)
+
+  def benchmarkStaticUnrollTrackingSummary(self):
+    self._benchmark_static_unroll(base.CONNECTION_TRACKING_SUMMARY)
+
+  def benchmarkStaticUnrollTrackingOff(self):
+    self._benchmark_static_unroll(base.CONNECTION_TRACKING_OFF)
+
+
+class VariablePropagationBenchmark(tf.test.Benchmark):
+  """Benchmarks connecting deep module hierarchies many times."""
+
+  def _benchmark_connections(self, name, make_model, connect,
+                             num_connections=1000):
+    with tf.Graph().as_default():
+      model = make_model()
+      connect(model)
+      start_time = timeit.default_timer()
+      with base.connection_tracking(base.CONNECTION_TRACKING_OFF):
+        for _ in range(num_connections):
+          connect(model)
+      wall_time = timeit.default_timer() - start_time
+    self.report_benchmark(iters=num_connections,
+                          wall_time=wall_time / num_connections, name=name,
+                          extras={"num_variables": len(model.variables)})
+
+  def benchmarkDeepSequential(self, depth=16, hidden_size=8):
+    """Sequential modules nested `depth` deep, each with a Linear."""
+    def make_model():
+      model = basic.Linear(hidden_size)
+      for i in range(depth):
+        model = sequential.Sequential(
+            [model, basic.Linear(hidden_size, name="linear_{}".format(i))])
+      return model
+    inputs = tf.zeros([1, hidden_size])
+    self._benchmark_connections("deep_sequential", make_model,
+                                lambda model: model(inputs))
+
+  def benchmarkDeepRNN(self, depth=4, cores_per_level=4, hidden_size=8):
+    """DeepRNNs nested `depth` deep, each with several LSTMs."""
+    def make_model():
+      model = gated_rnn.LSTM(hidden_size)
+      for _ in range(depth):
+        cores = [gated_rnn.LSTM(hidden_size) for _ in range(cores_per_level)]
+        model = basic_rnn.DeepRNN([model] + cores, skip_connections=False)
+      return model
+    inputs = tf.zeros([1, hidden_size])
+    def connect(model):
+      return model(inputs, model.initial_state(1))
+    self._benchmark_connections("deep_rnn", make_model, connect)
+
+
+class ModuleConstructionBenchmark(tf.test.Benchmark):
+  """Benchmarks constructing many small modules."""
+
+  def _construct(self, module_fn, num_modules):
+    """Returns the construction time, and the modules to keep them alive."""
+    with tf.Graph().as_default():
+      start_time = timeit.default_timer()
+      modules = [module_fn() for _ in range(num_modules)]
+      return timeit.default_timer() - start_time, modules
+
+  def _benchmark_construction(self, name, module_fn, num_modules=100000):
+    wall_time, _ = self._construct(module_fn, num_modules)
+    extras = {}
+    memory = _traced_python_memory(
+        lambda: self._construct(module_fn, num_modules))
+    if memory is not None:
+      extras["python_memory_bytes_per_module"] = memory / num_modules
+    self.report_benchmark(iters=num_modules, wall_time=wall_time / num_modules,
+                          name=name, extras=extras)
+
+  def benchmarkConstructIdentityModules(self):
+    self._benchmark_construction("construct_identity_modules", IdentityModule)
+
+  def benchmarkConstructLinearModules(self):
+    self._benchmark_construction("construct_linear_modules",
+                                 lambda: basic.Linear(8))
+
+
 class MatMulModule(base.AbstractModule):
 
   call_count = 0
@@ -120,6 +120,117 @@ def split_leading_dim(tensor, inputs, n_dims=2):
   return result
 
 
+def has_weight_samples(weights, rank):
+  """Returns whether `weights` holds several samples of a weight.
+
+  Custom getters such as `bayes_by_backprop_getter(num_samples=...)` return
+  several samples of each weight, stacked along a new leading axis.
+
+  Args:
+    weights: Tensor returned for a weight.
+    rank: Rank of the weight, without a samples axis.
+
+  Returns:
+    Whether `weights` has a leading samples axis.
+
+  Raises:
+    ValueError: If the rank of `weights` is neither `rank` nor `rank + 1`.
+  """
+  weights_rank = weights.get_shape().ndims
+  if weights_rank not in (rank, rank + 1):
+    raise ValueError(
+        "Rank of weights must be {} or {} with samples, not: {}".format(
+            rank, rank + 1, weights_rank))
+  return weights_rank == rank + 1
+
+
+def expand_weight_samples(weights, rank):
+  """Inserts a batch axis after the samples axis of sampled weights.
+
+  Args:
+    weights: Tensor returned for a weight, with or without a samples axis.
+    rank: Rank of the weight, without a samples axis.
+
+  Returns:
+    `weights`, with a batch axis of size 1 after its samples axis if it has
+    one, so that it broadcasts against `[num_samples, batch_size, ...]`
+    tensors. Unsampled weights are returned unchanged.
+  """
+  if has_weight_samples(weights, rank):
+    return tf.expand_dims(weights, 1)
+  return weights
+
+
+def weight_samples_matmul(inputs, weights):
+  """Multiplies `inputs` by `weights`, either of which may have samples.
+
+  Args:
+    inputs: Tensor of size `[batch_size, input_size]`, or of size
+      `[num_samples, batch_size, input_size]` for the outputs of a module whose
+      weights have samples.
+    weights: Tensor of size `[input_size, output_size]`, or of size
+      `[num_samples, input_size, output_size]` for several samples of the
+      weights.
+
+  Returns:
+    A Tensor of size `[batch_size, output_size]` if neither `inputs` nor
+    `weights` has samples, else of size
+    `[num_samples, batch_size, output_size]`.
+  """
+  inputs_samples = inputs.get_shape().ndims == 3
+  if not has_weight_samples(weights, 2):
+    if not inputs_samples:
+      return tf.matmul(inputs, weights)
+    outputs = tf.matmul(merge_leading_dims(inputs, 2), weights)
+    return split_leading_dim(outputs, inputs, 2)
+  if inputs_samples:
+    return tf.matmul(inputs, weights)
+
+  # The same inputs are multiplied by all the samples of the weights with a
+  # single [batch_size, input_size] x [input_size, num_samples * output_size]
+  # product, rather than copying the inputs for each sample.
+  weights_shape = tf.shape(weights)
+  stacked_weights = tf.reshape(tf.transpose(weights, [1, 0, 2]),
+                               [weights_shape[1], -1])
+  outputs = tf.matmul(inputs, stacked_weights)
+  outputs = tf.reshape(
+      outputs, [tf.shape(inputs)[0], weights_shape[0], weights_shape[2]])
+  outputs = tf.transpose(outputs, [1, 0, 2])
+  num_samples, _, output_size = weights.get_shape().as_list()
+  outputs.set_shape([num_samples, inputs.get_shape()[0].value, output_size])
+  return outputs
+
+
+def _sample_preactivations(inputs, weights, gaussian_weights):
+  """Samples `inputs` times Gaussian weights, without sampling the weights.
+
+  With independent Gaussian weights, each pre-activation is Gaussian, with as
+  mean `inputs` times the mean of the weights and as variance the squared
+  `inputs` times the variance of the weights, so it is sampled directly.
+
+  Args:
+    inputs: Tensor of size `[batch_size, input_size]`, or of size
+      `[num_samples, batch_size, input_size]`.
+    weights: The weights returned by the custom getter, possibly with a
+      samples axis.
+    gaussian_weights: The `util.GaussianWeights` registered for `weights`.
+
+  Returns:
+    A Tensor of the size `weight_samples_matmul(inputs, weights)` would have.
+  """
+  mean, stddev, sample = gaussian_weights
+  outputs_mean = weight_samples_matmul(inputs, mean)
+  outputs_variance = weight_samples_matmul(tf.square(inputs),
+                                           tf.square(stddev))
+  noise_shape = tf.shape(outputs_mean)
+  if inputs.get_shape().ndims == 2 and has_weight_samples(weights, 2):
+    noise_shape = tf.concat([[weights.get_shape()[0].value], noise_shape], 0)
+  noise = tf.random_normal(noise_shape, dtype=outputs_mean.dtype)
+  # The epsilon keeps the gradient of the square root finite for zero inputs.
+  outputs_stddev = tf.sqrt(outputs_variance + 1e-12)
+  return outputs_mean + tf.cast(sample, noise.dtype) * outputs_stddev * noise
+
+
 def create_linear_initializer(input_size, dtype=tf.float32):
   """Returns a default initializer for weights of a linear module."""
   stddev = 1 / math.sqrt(input_size)
@@ -202,25 +313,42 @@ class Linear(base.AbstractModule, base.Transposable):
     the existing variables to be the correct size for the multiplication. The
     batch size may differ for each connection.
 
+    If the custom getter returns several samples of the weights, stacked along
+    a new leading axis, e.g. `bayes_by_backprop_getter(num_samples=...)`, the
+    inputs are multiplied by all the samples, and may themselves have a
+    leading samples axis, e.g. when output by another such module.
+
+    If the custom getter registers the Gaussian distribution of the weights
+    with `snt.register_gaussian_weights`, e.g.
+    `bayes_by_backprop_getter(local_reparameterization=True)`, the product of
+    the inputs and weights is sampled directly from its distribution, rather
+    than computed from a sample of the weights.
+
     Args:
-      inputs: A 2D Tensor of size [batch_size, input_size].
+      inputs: A 2D Tensor of size [batch_size, input_size], or a 3D Tensor of
+          size [num_samples, batch_size, input_size] if the weights have
+          samples.
 
     Returns:
-      A 2D Tensor of size [batch_size, output_size].
+      A 2D Tensor of size [batch_size, output_size], or a 3D Tensor of size
+      [num_samples, batch_size, output_size] if the weights have samples.
 
     Raises:
-      base.IncompatibleShapeError: If the input is not a 2-D `Tensor` with
-          the size of the second dimension specified.
+      base.IncompatibleShapeError: If the input is not a 2-D `Tensor`, or 3-D
+          `Tensor` for weights with samples, with the size of the last
+          dimension specified.
       base.IncompatibleShapeError: If reconnecting an already connected module
           into the graph, and the shape of the input is not compatible with
           previous inputs.
     """
     input_shape = tuple(inputs.get_shape().as_list())
 
-    if len(input_shape) != 2:
+    if len(input_shape) not in (2, 3):
       raise base.IncompatibleShapeError(
           "{}: rank of shape must be 2 not: {}".format(
               self.scope_name, len(input_shape)))
+    # The leading samples axis, if any, is checked against the weights below.
+    input_shape = input_shape[-2:]
 
     if input_shape[1] is None:
       raise base.IncompatibleShapeError(
@@ -250,7 +378,15 @@ class Linear(base.AbstractModule, base.Transposable):
                               initializer=self._initializers["w"],
                               partitioner=self._partitioners.get("w", None),
                               regularizer=self._regularizers.get("w", None))
-    outputs = tf.matmul(inputs, self._w)
+    if inputs.get_shape().ndims == 3 and not has_weight_samples(self._w, 2):
+      raise base.IncompatibleShapeError(
+          "{}: rank of shape must be 2 not: 3, as the weights have no "
+          "samples".format(self.scope_name))
+    gaussian_weights = util.get_gaussian_weights(self._w)
+    if gaussian_weights is None:
+      outputs = weight_samples_matmul(inputs, self._w)
+    else:
+      outputs = _sample_preactivations(inputs, self._w, gaussian_weights)
 
     if self._use_bias:
       bias_shape = (self.output_size,)
@@ -260,7 +396,7 @@ class Linear(base.AbstractModule, base.Transposable):
                                 initializer=self._initializers["b"],
                                 partitioner=self._partitioners.get("b", None),
                                 regularizer=self._regularizers.get("b", None))
-      outputs += self._b
+      outputs += expand_weight_samples(self._b, 1)
 
     return outputs
 
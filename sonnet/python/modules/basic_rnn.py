@@ -25,8 +25,6 @@ from __future__ import print_function
 import collections
 
 # Dependency imports
-import six
-
 from sonnet.python.modules import base
 from sonnet.python.modules import basic
 from sonnet.python.modules import rnn_core
@@ -367,6 +365,90 @@ class DeepRNN(rnn_core.RNNCore):
     self._last_output_size = _get_shape_without_batch_dimension(output)
     return output, tuple(next_states)
 
+  @util.reuse_variables
+  def unroll(self, input_sequence, initial_state, sequence_length=None):
+    """Unrolls the DeepRNN over a whole time-major sequence, layer by layer.
+
+    This computes the same outputs and final state as
+    `tf.nn.dynamic_rnn(deep_rnn, ..., time_major=True)`, using the same
+    variables. Rather than stepping every layer at every timestep, each layer is
+    run over the whole sequence before the next one starts, so each layer can
+    batch its own work over time:
+
+      * recurrent cores that provide an `unroll` method with the same signature
+        (e.g. `snt.LSTM`, or a nested `snt.DeepRNN`) are unrolled with it,
+      * other recurrent cores are unrolled with `tf.nn.dynamic_rnn`,
+      * non-recurrent modules or ops are applied to all timesteps at once
+        with `snt.BatchApply`.
+
+    Args:
+      input_sequence: a nested tuple of Tensors of size
+        `[time, batch_size, ...]`.
+      initial_state: a tuple of initial states that corresponds to the state of
+        each one of the recurrent cores of the `DeepRNN`.
+      sequence_length: Optional int32 Tensor of size `[batch_size]`. As in
+        `tf.nn.dynamic_rnn`, once a sequence has ended its outputs are zero and
+        its state is copied through unchanged.
+
+    Returns:
+      output_sequence: a nested tuple of Tensors of size
+        `[time, batch_size, ...]`.
+      final_state: a tuple of final states that corresponds to the state of
+        each one of the recurrent cores of the `DeepRNN`.
+    """
+    current_input = input_sequence
+    final_states = []
+    outputs = []
+    recurrent_idx = 0
+    concatenate = lambda *args: tf.concat(args, axis=-1)
+    for i, core in enumerate(self._cores):
+      if self._skip_connections and i > 0:
+        current_input = nest.map_structure(
+            concatenate, input_sequence, current_input)
+
+      if self._is_recurrent_list[i]:
+        core_initial_state = initial_state[recurrent_idx]
+        if hasattr(core, "unroll"):
+          current_input, final_state = core.unroll(
+              current_input, core_initial_state,
+              sequence_length=sequence_length)
+        else:
+          current_input, final_state = tf.nn.dynamic_rnn(
+              core, current_input, initial_state=core_initial_state,
+              sequence_length=sequence_length, time_major=True,
+              scope="layer_{}".format(i))
+        final_states.append(final_state)
+        recurrent_idx += 1
+      else:
+        current_input = basic.BatchApply(core, name="layer_{}".format(i))(
+            current_input)
+
+      if self._skip_connections:
+        outputs.append(current_input)
+
+    if self._skip_connections and self._concat_final_output_if_skip:
+      output = nest.map_structure(concatenate, *outputs)
+    else:
+      output = current_input
+
+    if sequence_length is not None:
+      # Non-recurrent final layers produce non-zero outputs for padding (e.g.
+      # the bias of a `snt.Linear`), which `tf.nn.dynamic_rnn` zeroes.
+      mask = tf.sequence_mask(
+          sequence_length, maxlen=tf.shape(nest.flatten(output)[0])[0])
+      mask = tf.transpose(mask)
+      def zero_padding(tensor):
+        tensor_mask = tf.reshape(
+            mask, tf.concat([tf.shape(mask),
+                             tf.ones([tensor.get_shape().ndims - 2],
+                                     dtype=tf.int32)], 0))
+        return tensor * tf.cast(tensor_mask, tensor.dtype)
+      output = nest.map_structure(zero_padding, output)
+
+    self._last_output_size = nest.map_structure(
+        lambda tensor: tensor.get_shape()[2:], output)
+    return output, tuple(final_states)
+
   def initial_state(self, batch_size, dtype=tf.float32, trainable=False,
                     trainable_initializers=None, trainable_regularizers=None,
                     name=None):
@@ -578,13 +660,25 @@ class BidirectionalRNN(base.AbstractModule):
       raise ValueError("Forward and backward cores must both be instances of"
                        "RNNCore.")
 
-  def _build(self, input_sequence, state):
+  def _build(self, input_sequence, state, sequence_length=None):
     """Connects the BidirectionalRNN module into the graph.
 
+    Both cores are connected inside a single `tf.while_loop`, so neither the
+    time dimension of the input nor the size of the graph depend on the length
+    of the sequence. At iteration `t` the forward core consumes
+    `input_sequence[t]` and the backward core consumes the `t`-th element of
+    each example counting back from its own end, as given by
+    `sequence_length`. The backward outputs and states are then reversed
+    back, so that both directions are aligned with the input sequence.
+
     Args:
       input_sequence: tensor (time, batch, [feature_1, ..]). It must be
           time_major.
       state: tuple of states for the forward and backward cores.
+      sequence_length: Optional int32 Tensor of size `[batch_size]`. As in
+        `tf.nn.dynamic_rnn`, both cores produce zero outputs and copy their
+        state through past the end of each sequence. If not provided, every
+        sequence is assumed to span the whole time dimension.
 
     Returns:
       A dict with forward/backard states and output sequences:
@@ -596,47 +690,119 @@ class BidirectionalRNN(base.AbstractModule):
             "forward": ...,
             "backward": ...}
 
-    Raises:
-      ValueError: in case time dimension is not statically known.
+      The states are sequences holding the state of each core after it has
+      consumed the input at each time index, so the final forward state of each
+      example is at index `sequence_length - 1` (and at the last index when
+      `sequence_length` is provided) and the final backward state is at index
+      `0`.
     """
     input_shape = input_sequence.get_shape()
-    if input_shape[0] is None:
-      raise ValueError("Time dimension of input (dim 0) must be statically"
-                       "known.")
-    seq_length = int(input_shape[0])
     forward_state, backward_state = state
+    num_steps = tf.shape(input_sequence)[0]
 
-    # Lists for the forward backward output and state.
-    output_sequence_f = []
-    output_sequence_b = []
+    if sequence_length is None:
+      reverse = lambda tensor: tf.reverse(tensor, axis=[0])
+    else:
+      sequence_length = tf.to_int32(sequence_length)
+      reverse = lambda tensor: tf.reverse_sequence(  # pylint: disable=g-long-lambda
+          tensor, sequence_length, seq_axis=0, batch_axis=1)
+
+    with tf.name_scope("forward_rnn"):
+      forward_input_ta = tf.TensorArray(
+          dtype=input_sequence.dtype, size=num_steps).unstack(input_sequence)
+    with tf.name_scope("backward_rnn"):
+      backward_input_ta = tf.TensorArray(
+          dtype=input_sequence.dtype,
+          size=num_steps).unstack(reverse(input_sequence))
+
+    def tensor_arrays(core, initial_state):
+      """Returns flat lists of TensorArrays for a core's outputs and states."""
+      output_tas = [
+          tf.TensorArray(dtype=input_sequence.dtype, size=num_steps)
+          for _ in nest.flatten(core.output_size)]
+      state_tas = [tf.TensorArray(dtype=s.dtype, size=num_steps)
+                   for s in nest.flatten(initial_state)]
+      return output_tas, state_tas
+
+    def step(core, time, inputs, prev_state, output_tas, state_tas):
+      """Connects `core` for one timestep and records its output and state."""
+      output, next_state = core(inputs, prev_state)
+      flat_output = nest.flatten(output)
+      flat_next_state = nest.flatten(next_state)
+      if sequence_length is not None:
+        is_running = tf.less(time, sequence_length)
+        flat_output = [tf.where(is_running, o, tf.zeros_like(o))
+                       for o in flat_output]
+        flat_next_state = [tf.where(is_running, next_s, prev_s)
+                           for next_s, prev_s in zip(flat_next_state,
+                                                     nest.flatten(prev_state))]
+      output_tas = [ta.write(time, o) for ta, o in zip(output_tas, flat_output)]
+      state_tas = [ta.write(time, s)
+                   for ta, s in zip(state_tas, flat_next_state)]
+      next_state = nest.pack_sequence_as(prev_state, flat_next_state)
+      return next_state, output_tas, state_tas
+
+    def loop_body(time, forward_state, backward_state, forward_tas,
+                  backward_tas):
+      """Steps both cores; they are independent so may run concurrently."""
+      with tf.name_scope("forward_rnn"):
+        forward_state, forward_output_tas, forward_state_tas = step(
+            self._forward_core, time, forward_input_ta.read(time),
+            forward_state, *forward_tas)
+      with tf.name_scope("backward_rnn"):
+        backward_state, backward_output_tas, backward_state_tas = step(
+            self._backward_core, time, backward_input_ta.read(time),
+            backward_state, *backward_tas)
+      return (time + 1, forward_state, backward_state,
+              (forward_output_tas, forward_state_tas),
+              (backward_output_tas, backward_state_tas))
+
+    _, _, _, forward_tas, backward_tas = tf.while_loop(
+        cond=lambda time, *unused_args: time < num_steps,
+        body=loop_body,
+        loop_vars=(tf.constant(0), forward_state, backward_state,
+                   tensor_arrays(self._forward_core, forward_state),
+                   tensor_arrays(self._backward_core, backward_state)))
+
+    def stack(tas, structure, element_shapes, postprocess=None):
+      """Stacks TensorArrays into sequences packed like `structure`."""
+      flat_sequences = []
+      for ta, element_shape in zip(tas, element_shapes):
+        sequence = ta.stack()
+        if postprocess is not None:
+          sequence = postprocess(sequence)
+        sequence.set_shape(input_shape[:1].concatenate(element_shape))
+        flat_sequences.append(sequence)
+      return nest.pack_sequence_as(structure, flat_sequences)
+
+    def output_shapes(core):
+      return [input_shape[1:2].concatenate(tensor_shape.as_shape(size))
+              for size in nest.flatten(core.output_size)]
+
+    def state_shapes(initial_state):
+      return [s.get_shape() for s in nest.flatten(initial_state)]
 
-    # Forward pass over the sequence.
     with tf.name_scope("forward_rnn"):
-      state = forward_state
-      output_sequence_f = [
-          self._forward_core(input_sequence[i, :,], state)
-          for i in six.moves.range(seq_length)]
-      output_sequence_f = nest.map_structure(
-          lambda *vals: tf.stack(vals), *output_sequence_f)
-
-    # Backward pass over the sequence.
+      output_sequence_f = stack(forward_tas[0], self._forward_core.output_size,
+                                output_shapes(self._forward_core))
+      state_sequence_f = stack(forward_tas[1], forward_state,
+                               state_shapes(forward_state))
     with tf.name_scope("backward_rnn"):
-      state = backward_state
-      output_sequence_b = [
-          self._backward_core(input_sequence[i, :,], state)
-          for i in six.moves.range(seq_length)]
-      output_sequence_b = nest.map_structure(
-          lambda *vals: tf.stack(vals), *output_sequence_b)
+      output_sequence_b = stack(backward_tas[0],
+                                self._backward_core.output_size,
+                                output_shapes(self._backward_core), reverse)
+      state_sequence_b = stack(backward_tas[1], backward_state,
+                               state_shapes(backward_state), reverse)
 
     # Compose the full output and state sequeneces.
     return {
         "outputs": {
-            "forward": output_sequence_f[0],
-            "backward": output_sequence_b[0]
+            "forward": output_sequence_f,
+            "backward": output_sequence_b
         },
         "state": {
-            "forward": output_sequence_f[1],
-            "backward": output_sequence_b[1]
+            "forward": state_sequence_f,
+            "backward": state_sequence_b
         }
     }
 
@@ -30,6 +30,7 @@ import sonnet as snt
 import tensorflow as tf
 
 from tensorflow.python.ops import variables
+from tensorflow.python.util import nest
 
 
 # @tf.contrib.eager.run_all_tests_in_graph_and_eager_modes
@@ -676,6 +677,44 @@ class DeepRNNTest(tf.test.TestCase, parameterized.TestCase):
       self.assertIn("DeepRNN has been connected into the graph, "
                     "so inferred output size", first_call_args[0])
 
+  @parameterized.named_parameters(
+      ("NoSkip", False, False),
+      ("NoSkipSequenceLength", False, True),
+      ("Skip", True, False),
+      ("SkipSequenceLength", True, True))
+  def testUnrollSameAsDynamic(self, skip_connections, use_sequence_length):
+    batch_size = 3
+    seq_len = 6
+    input_size = 4
+    if skip_connections:
+      cores = [snt.LSTM(5), snt.VanillaRNN(5), snt.LSTM(5)]
+    else:
+      cores = [snt.LSTM(5), snt.Linear(7), tf.tanh, snt.VanillaRNN(6),
+               snt.DeepRNN([snt.LSTM(3)], skip_connections=False),
+               snt.Linear(2)]
+    deep_rnn = snt.DeepRNN(cores, skip_connections=skip_connections)
+
+    input_sequence = tf.constant(
+        np.random.randn(seq_len, batch_size, input_size), dtype=tf.float32)
+    sequence_length = None
+    if use_sequence_length:
+      sequence_length = tf.constant([6, 2, 4])
+    initial_state = deep_rnn.initial_state(batch_size=batch_size)
+
+    dynamic_output, dynamic_state = tf.nn.dynamic_rnn(
+        deep_rnn, input_sequence, initial_state=initial_state,
+        sequence_length=sequence_length, time_major=True)
+    num_variables = len(deep_rnn.get_all_variables())
+    unrolled_output, unrolled_state = deep_rnn.unroll(
+        input_sequence, initial_state, sequence_length=sequence_length)
+    self.assertEqual(len(deep_rnn.get_all_variables()), num_variables)
+    self.assertEqual(unrolled_output.get_shape(), dynamic_output.get_shape())
+
+    self.evaluate(tf.global_variables_initializer())
+    dynamic_out, unrolled_out = self.evaluate(
+        [(dynamic_output, dynamic_state), (unrolled_output, unrolled_state)])
+    self.assertAllClose(dynamic_out, unrolled_out, rtol=1e-5, atol=1e-5)
+
 
 # @tf.contrib.eager.run_all_tests_in_graph_and_eager_modes
 class ModelRNNTest(tf.test.TestCase):
@@ -724,7 +763,7 @@ class ModelRNNTest(tf.test.TestCase):
 
 
 # @tf.contrib.eager.run_all_tests_in_graph_and_eager_modes
-class BidirectionalRNNTest(tf.test.TestCase):
+class BidirectionalRNNTest(tf.test.TestCase, parameterized.TestCase):
 
   toy_out = collections.namedtuple("toy_out", ("out_one", "out_two"))
 
@@ -791,6 +830,58 @@ class BidirectionalRNNTest(tf.test.TestCase):
     self.assertAllEqual(output["state"]["backward"].hidden.get_shape(),
                         shape_backward)
 
+  def testUnknownTimeDimension(self):
+    bidir_rnn = snt.BidirectionalRNN(self.forward_core, self.backward_core)
+    seq = tf.placeholder(tf.float32,
+                         [None, self.batch_size, self.feature_size])
+    output = bidir_rnn(seq, bidir_rnn.initial_state(self.batch_size))
+    self.assertEqual(output["outputs"]["backward"].get_shape().as_list(),
+                     [None, self.batch_size, self.hidden_size_backward])
+
+    self.evaluate(tf.global_variables_initializer())
+    backward_output = self.evaluate(
+        output["outputs"]["backward"],
+        feed_dict={seq: np.zeros([3, self.batch_size, self.feature_size])})
+    self.assertEqual(backward_output.shape,
+                     (3, self.batch_size, self.hidden_size_backward))
+
+  @parameterized.parameters(False, True)
+  def testSameAsDynamicRNN(self, use_sequence_length):
+    forward_core = snt.LSTM(self.hidden_size_forward, name="forward")
+    backward_core = snt.LSTM(self.hidden_size_backward, name="backward")
+    bidir_rnn = snt.BidirectionalRNN(forward_core, backward_core)
+    seq = tf.constant(
+        np.random.randn(self.seq_len, self.batch_size, self.feature_size),
+        dtype=tf.float32)
+    if use_sequence_length:
+      sequence_length = tf.constant([8, 1, 5, 3, 7])
+    else:
+      sequence_length = tf.fill([self.batch_size], self.seq_len)
+    forward_state, backward_state = bidir_rnn.initial_state(self.batch_size)
+
+    output = bidir_rnn(seq, (forward_state, backward_state),
+                       sequence_length=sequence_length if use_sequence_length
+                       else None)
+
+    expected_forward, expected_forward_state = tf.nn.dynamic_rnn(
+        forward_core, seq, initial_state=forward_state,
+        sequence_length=sequence_length, time_major=True, scope="forward")
+    reverse = lambda tensor: tf.reverse_sequence(  # pylint: disable=g-long-lambda
+        tensor, sequence_length, seq_axis=0, batch_axis=1)
+    expected_backward, expected_backward_state = tf.nn.dynamic_rnn(
+        backward_core, reverse(seq), initial_state=backward_state,
+        sequence_length=sequence_length, time_major=True, scope="backward")
+    expected_backward = reverse(expected_backward)
+
+    self.evaluate(tf.global_variables_initializer())
+    expected, actual = self.evaluate([
+        (expected_forward, expected_backward,
+         expected_forward_state, expected_backward_state),
+        (output["outputs"]["forward"], output["outputs"]["backward"],
+         nest.map_structure(lambda s: s[-1], output["state"]["forward"]),
+         nest.map_structure(lambda s: s[0], output["state"]["backward"]))])
+    self.assertAllClose(expected, actual, rtol=1e-5, atol=1e-5)
+
 
 if __name__ == "__main__":
   tf.test.main()
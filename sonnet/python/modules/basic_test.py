@@ -1158,6 +1158,34 @@ class MergeLeadingDimsTest(tf.test.TestCase, parameterized.TestCase):
     self.assertEqual(output.shape.as_list(), expected_output_shape)
 
 
+class WeightSamplesMatmulTest(tf.test.TestCase, parameterized.TestCase):
+  """Tests the weight_samples_matmul function."""
+
+  @parameterized.named_parameters(
+      ("NoSamples", False, False),
+      ("InputSamples", True, False),
+      ("WeightSamples", False, True),
+      ("InputAndWeightSamples", True, True))
+  def testMatchesMatmulPerSample(self, input_samples, weight_samples):
+    num_samples, batch_size, input_size, output_size = 3, 2, 4, 5
+    rng = np.random.RandomState(0)
+    inputs = rng.randn(num_samples, batch_size, input_size)
+    weights = rng.randn(num_samples, input_size, output_size)
+    expected = np.matmul(inputs if input_samples else inputs[0],
+                         weights if weight_samples else weights[0])
+
+    outputs = basic.weight_samples_matmul(
+        tf.constant(inputs if input_samples else inputs[0]),
+        tf.constant(weights if weight_samples else weights[0]))
+
+    self.assertEqual(list(expected.shape), outputs.get_shape().as_list())
+    self.assertAllClose(expected, self.evaluate(outputs))
+
+  def testInvalidWeightsRank(self):
+    with self.assertRaisesRegexp(ValueError, "Rank of weights"):
+      basic.weight_samples_matmul(tf.ones([2, 3]), tf.ones([1, 1, 3, 4]))
+
+
 # @tf.contrib.eager.run_all_tests_in_graph_and_eager_modes
 class BatchFlattenTest(tf.test.TestCase, parameterized.TestCase):
 
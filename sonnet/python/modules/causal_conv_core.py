@@ -0,0 +1,179 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+
+"""Recurrent core for incremental inference with causal convolutions.
+
+This file contains implementations for:
+  * CausalConv1DCore
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Dependency imports
+from sonnet.python.modules import base
+from sonnet.python.modules import conv
+from sonnet.python.modules import rnn_core
+import tensorflow as tf
+
+
+_CONV_TYPES = (conv.Conv1D, conv.CausalConv1D)
+
+
+class CausalConv1DCore(rnn_core.RNNCore):
+  """Runs a stack of causal 1D convolutions one timestep at a time.
+
+  A stack of causal convolutions, for example a WaveNet-style stack of dilated
+  `Conv1D(padding=CAUSAL)` modules, is usually applied to whole sequences.
+  When generating autoregressively, applying it to the sequence generated so
+  far recomputes the whole receptive field for every new timestep. This core
+  instead keeps, for each convolution, a buffer of its last
+  `(kernel_size - 1) * rate` inputs as state, so each new timestep costs a
+  single kernel-width dot product per layer:
+
+  ```python
+  layers = [snt.Conv1D(32, 2, rate=r, padding=snt.CAUSAL) for r in (1, 2, 4)]
+  layers = [layers[0], tf.nn.relu, layers[1], tf.nn.relu, layers[2]]
+  outputs = snt.Sequential(layers)(sequence)  # [batch_size, time, 32]
+
+  core = snt.CausalConv1DCore(layers, input_channels=sequence_channels)
+  output, state = core(inputs, core.initial_state(batch_size))
+  ```
+
+  The convolution modules are shared with the core, and the output of the core
+  at step `t` matches the output of the convolution stack at position `t`
+  when the stack is applied to the whole sequence.
+  """
+
+  def __init__(self, layers, input_channels=None,
+               name="causal_conv_1d_core"):
+    """Constructs a CausalConv1DCore.
+
+    Args:
+      layers: Iterable of layers, applied in order. Each layer is either a
+          `Conv1D` module with `CAUSAL` padding, a `CausalConv1D` module, or
+          a callable applied element-wise, such as an activation function.
+      input_channels: Number of channels of the inputs to the first
+          convolution. Can be omitted if the first convolution has already
+          been connected to the graph.
+      name: Name of the module.
+
+    Raises:
+      ValueError: If `layers` does not contain any convolution.
+      ValueError: If `input_channels` is not given and the first convolution
+          is not connected.
+      base.NotSupportedError: If a convolution does not use `CAUSAL` padding,
+          or has a stride greater than 1.
+    """
+    super(CausalConv1DCore, self).__init__(name=name)
+    self._layers = tuple(layers)
+    self._convs = tuple(layer for layer in self._layers
+                        if isinstance(layer, _CONV_TYPES))
+    if not self._convs:
+      raise ValueError("layers must contain at least one convolution.")
+
+    for layer in self._convs:
+      if layer.paddings != (conv.CAUSAL,):
+        raise base.NotSupportedError(
+            "Only convolutions with CAUSAL padding can be run incrementally, "
+            "but {} has padding {}.".format(layer.module_name,
+                                            layer.paddings))
+      if any(stride > 1 for stride in layer.stride):
+        raise base.NotSupportedError(
+            "Only convolutions with a stride of 1 can be run incrementally, "
+            "but {} has stride {}.".format(layer.module_name, layer.stride))
+
+    if input_channels is None:
+      if not self._convs[0].is_connected:
+        raise ValueError("input_channels must be given if the first "
+                         "convolution is not connected to the graph.")
+      input_channels = self._convs[0].input_channels
+    self._input_channels = input_channels
+
+  @property
+  def layers(self):
+    return self._layers
+
+  @property
+  def state_size(self):
+    """Sizes of the buffers of past inputs of each convolution."""
+    sizes = []
+    channels = self._input_channels
+    for layer in self._convs:
+      sizes.append(tf.TensorShape([self._buffer_length(layer), channels]))
+      channels = layer.output_channels
+    return tuple(sizes)
+
+  @property
+  def output_size(self):
+    return tf.TensorShape([self._convs[-1].output_channels])
+
+  def _buffer_length(self, layer):
+    """Number of past inputs needed to compute the output of `layer`."""
+    return (layer.kernel_shape[0] - 1) * layer.rate[0]
+
+  def _build(self, inputs, prev_state):
+    """Computes the output of the convolution stack for one timestep.
+
+    Args:
+      inputs: Tensor of shape `[batch_size, input_channels]`, the inputs at
+          the current timestep.
+      prev_state: Tuple with a Tensor of shape
+          `[batch_size, buffer_length, channels]` for each convolution,
+          holding its inputs at the previous `buffer_length` timesteps.
+
+    Returns:
+      A tuple `(output, next_state)`, where `output` is a Tensor of shape
+      `[batch_size, output_channels]`.
+    """
+    net = inputs
+    next_state = []
+    buffers = iter(prev_state)
+    for layer in self._layers:
+      if not isinstance(layer, _CONV_TYPES):
+        net = layer(net)
+        continue
+
+      # The window covers the receptive field of the current timestep.
+      window = tf.concat([next(buffers), tf.expand_dims(net, 1)], axis=1)
+      next_state.append(window[:, 1:])
+      net = self._apply_conv_step(layer, window)
+
+    return net, tuple(next_state)
+
+  def _apply_conv_step(self, layer, window):
+    """Computes the output of `layer` for the last position of `window`."""
+    if not layer.is_connected:
+      # Creates the variables of the convolution. The outputs of this
+      # connection are not used, so this does not add any computation.
+      if layer.data_format == conv.DATA_FORMAT_NCW:
+        layer(tf.transpose(window, [0, 2, 1]))
+      else:
+        layer(window)
+
+    kernel_size = layer.kernel_shape[0]
+    taps = window[:, ::layer.rate[0]]  # [batch_size, kernel_size, channels]
+    taps = tf.reshape(taps, [-1, kernel_size * layer.input_channels])
+
+    w = layer.w
+    if layer.mask is not None:
+      w = w * layer.mask  # pylint: disable=g-no-augmented-assignment
+    w = tf.reshape(w, [kernel_size * layer.input_channels,
+                       layer.output_channels])
+    outputs = tf.matmul(taps, w)
+    if layer.has_bias:
+      outputs += layer.b
+    return outputs
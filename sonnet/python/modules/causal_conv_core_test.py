@@ -0,0 +1,101 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+
+"""Tests for sonnet.python.modules.causal_conv_core."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Dependency imports
+from absl.testing import parameterized
+import numpy as np
+import sonnet as snt
+import tensorflow as tf
+
+
+BATCH_SIZE = 3
+NUM_STEPS = 11
+INPUT_CHANNELS = 4
+
+
+def _make_layers():
+  mask = np.array([1., 0., 1.], dtype=np.float32)
+  return [
+      snt.Conv1D(5, 2, padding=snt.CAUSAL, name="conv_1"),
+      tf.nn.relu,
+      snt.Conv1D(6, 3, rate=2, padding=snt.CAUSAL, mask=mask, name="conv_2"),
+      tf.tanh,
+      snt.Conv1D(3, 2, rate=4, padding=snt.CAUSAL, use_bias=False,
+                 name="conv_3"),
+      snt.Conv1D(2, 1, padding=snt.CAUSAL, name="conv_4"),
+  ]
+
+
+class CausalConv1DCoreTest(tf.test.TestCase, parameterized.TestCase):
+
+  # Channels first layers are tested in conv_gpu_test.py, as TensorFlow only
+  # supports NCW convolutions on GPU.
+  @parameterized.named_parameters(
+      ("ConnectConvFirst", True),
+      ("ConnectCoreFirst", False))
+  def testSameAsConvolution(self, connect_conv_first):
+    """Checks stepping the core matches convolving the whole sequence."""
+    layers = _make_layers()
+    sequence = tf.random_normal([BATCH_SIZE, NUM_STEPS, INPUT_CHANNELS])
+    conv_stack = snt.Sequential(layers)
+
+    if connect_conv_first:
+      expected_output = conv_stack(sequence)
+    core = snt.CausalConv1DCore(layers, input_channels=INPUT_CHANNELS)
+    output, _ = tf.nn.dynamic_rnn(
+        core, sequence, initial_state=core.initial_state(BATCH_SIZE))
+    if not connect_conv_first:
+      expected_output = conv_stack(sequence)
+
+    self.assertEqual(tf.TensorShape([2]), core.output_size)
+    self.assertEqual((tf.TensorShape([1, INPUT_CHANNELS]),
+                      tf.TensorShape([4, 5]),
+                      tf.TensorShape([4, 6]),
+                      tf.TensorShape([0, 3])), core.state_size)
+    self.evaluate(tf.global_variables_initializer())
+    output, expected_output = self.evaluate((output, expected_output))
+    self.assertAllClose(expected_output, output, atol=1e-6)
+
+  def testInputChannelsFromConnectedConv(self):
+    layers = _make_layers()
+    snt.Sequential(layers)(
+        tf.zeros([BATCH_SIZE, NUM_STEPS, INPUT_CHANNELS]))
+    core = snt.CausalConv1DCore(layers)
+    self.assertEqual(tf.TensorShape([1, INPUT_CHANNELS]), core.state_size[0])
+
+  def testBadLayers(self):
+    with self.assertRaisesRegexp(ValueError, "at least one convolution"):
+      snt.CausalConv1DCore([tf.nn.relu], input_channels=INPUT_CHANNELS)
+
+    with self.assertRaisesRegexp(ValueError, "input_channels must be given"):
+      snt.CausalConv1DCore(_make_layers())
+
+    with self.assertRaisesRegexp(snt.NotSupportedError, "CAUSAL padding"):
+      snt.CausalConv1DCore([snt.Conv1D(2, 3, padding=snt.SAME)],
+                           input_channels=INPUT_CHANNELS)
+
+    with self.assertRaisesRegexp(snt.NotSupportedError, "stride"):
+      snt.CausalConv1DCore([snt.Conv1D(2, 3, stride=2, padding=snt.CAUSAL)],
+                           input_channels=INPUT_CHANNELS)
+
+
+if __name__ == "__main__":
+  tf.test.main()
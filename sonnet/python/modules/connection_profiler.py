@@ -0,0 +1,265 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+
+"""Profiling of the construction of graphs made of Sonnet modules.
+
+For example, to find which modules take longest to connect to the graph:
+
+```python
+with snt.profile_connections() as profile:
+  outputs = model(inputs)
+
+print(profile.report())
+with open("profile.json", "w") as f:
+  f.write(profile.to_json())
+```
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import contextlib
+import json
+import timeit
+
+# Dependency imports
+from sonnet.python.modules import base
+from sonnet.python.modules import util
+import tensorflow as tf
+
+
+_STAT_FIELDS = ("connections", "time", "self_time", "ops", "self_ops",
+                "variables", "self_variables", "variable_bytes",
+                "self_variable_bytes")
+
+_REPORT_COLUMNS = (
+    ("connections", "Calls", "{:d}"),
+    ("time", "Time (s)", "{:.4f}"),
+    ("self_time", "Self (s)", "{:.4f}"),
+    ("ops", "Ops", "{:d}"),
+    ("self_ops", "Self ops", "{:d}"),
+    ("variables", "Vars", "{:d}"),
+    ("variable_bytes", "Var bytes", "{:d}"),
+)
+
+
+class ConnectionStats(object):
+  """Accumulated statistics of the connections of a module or class.
+
+  Attributes:
+    connections: Number of times the modules were connected to the graph.
+    time: Wall time in seconds spent connecting the modules, including the
+      time spent connecting the modules nested in them.
+    self_time: As `time`, excluding the time spent in nested modules.
+    ops: Number of ops added to the graph by the connections.
+    self_ops: As `ops`, excluding the ops added by nested modules.
+    variables: Number of variables created by the connections.
+    self_variables: As `variables`, excluding those created by nested modules.
+    variable_bytes: Size in bytes of the variables created by the connections,
+      for those whose shape is fully defined.
+    self_variable_bytes: As `variable_bytes`, excluding nested modules.
+  """
+
+  __slots__ = _STAT_FIELDS
+
+  def __init__(self):
+    for field in _STAT_FIELDS:
+      setattr(self, field, 0)
+
+  def add(self, other):
+    for field in _STAT_FIELDS:
+      setattr(self, field, getattr(self, field) + getattr(other, field))
+
+  def to_dict(self):
+    return collections.OrderedDict(
+        (field, getattr(self, field)) for field in _STAT_FIELDS)
+
+
+class _Frame(object):
+  """Statistics of a connection in progress."""
+
+  __slots__ = ("module", "start_time", "start_ops", "name_scope", "children",
+               "variables", "variable_bytes")
+
+  def __init__(self, module, start_time, start_ops):
+    self.module = module
+    self.start_time = start_time
+    self.start_ops = start_ops
+    self.name_scope = None
+    self.children = ConnectionStats()
+    self.variables = 0
+    self.variable_bytes = 0
+
+  def add_variable(self, variable):
+    self.variables += 1
+    shape = variable.get_shape()
+    if shape.is_fully_defined():
+      self.variable_bytes += (shape.num_elements() *
+                              variable.dtype.base_dtype.size)
+
+
+def _num_ops():
+  """Returns the number of ops created in the default graph so far."""
+  if tf.executing_eagerly():
+    return 0
+  return tf.get_default_graph().version
+
+
+def _class_name(module):
+  return "{}.{}".format(type(module).__module__, type(module).__name__)
+
+
+class ConnectionProfile(object):
+  """Statistics of the modules connected within `profile_connections`."""
+
+  def __init__(self):
+    self._module_stats = collections.OrderedDict()
+    self._module_classes = {}
+    self._module_name_scopes = collections.defaultdict(list)
+    self._class_stats = collections.OrderedDict()
+    self._frames = []
+
+  @property
+  def module_stats(self):
+    """Dict from module scope name to `ConnectionStats`."""
+    return self._module_stats
+
+  @property
+  def class_stats(self):
+    """Dict from fully qualified class name to `ConnectionStats`."""
+    return self._class_stats
+
+  @contextlib.contextmanager
+  def _profile_call(self, module):
+    """Measures one connection of `module`, see `base._observe_calls`."""
+    frame = _Frame(module, timeit.default_timer(), _num_ops())
+    self._frames.append(frame)
+    try:
+      with util.notify_about_variables(frame.add_variable):
+        yield
+    finally:
+      self._frames.pop()
+      self._record(frame, timeit.default_timer(), _num_ops())
+
+  def _observe_connection(self, connected_subgraph):
+    """Records the name scope of the connection being profiled."""
+    if self._frames and self._frames[-1].module is connected_subgraph.module:
+      self._frames[-1].name_scope = connected_subgraph.name_scope
+
+  def _record(self, frame, end_time, end_ops):
+    """Adds the statistics of a finished connection."""
+    stats = ConnectionStats()
+    stats.connections = 1
+    stats.time = end_time - frame.start_time
+    stats.self_time = stats.time - frame.children.time
+    stats.ops = end_ops - frame.start_ops
+    stats.self_ops = stats.ops - frame.children.ops
+    # Variables created by a nested module are also seen by the enclosing
+    # modules' variable creators.
+    stats.variables = frame.variables
+    stats.self_variables = frame.variables - frame.children.variables
+    stats.variable_bytes = frame.variable_bytes
+    stats.self_variable_bytes = (frame.variable_bytes -
+                                 frame.children.variable_bytes)
+
+    if self._frames:
+      self._frames[-1].children.add(stats)
+
+    module = frame.module
+    module_key = module.scope_name
+    class_name = _class_name(module)
+    self._module_stats.setdefault(module_key, ConnectionStats()).add(stats)
+    self._module_classes[module_key] = class_name
+    if frame.name_scope is not None:
+      self._module_name_scopes[module_key].append(frame.name_scope)
+    self._class_stats.setdefault(class_name, ConnectionStats()).add(stats)
+
+  def report(self, by="module", sort_by="self_time", max_rows=None):
+    """Returns a table of the statistics as a string.
+
+    Args:
+      by: Either "module", for one row per module, or "class", for one row per
+        module class.
+      sort_by: Name of the `ConnectionStats` attribute by which to sort the rows
+        in decreasing order.
+      max_rows: Optional maximum number of rows to include.
+
+    Returns:
+      The report, as a string.
+
+    Raises:
+      ValueError: If `by` or `sort_by` is invalid.
+    """
+    if by == "module":
+      stats = self._module_stats
+    elif by == "class":
+      stats = self._class_stats
+    else:
+      raise ValueError("by must be 'module' or 'class', not {!r}.".format(by))
+    if sort_by not in _STAT_FIELDS:
+      raise ValueError("sort_by must be one of {}, not {!r}.".format(
+          _STAT_FIELDS, sort_by))
+    return util.format_stats_table(
+        "Module" if by == "module" else "Class", stats, _REPORT_COLUMNS,
+        sort_by, max_rows=max_rows)
+
+  def to_json(self, **kwargs):
+    """Returns the statistics of modules and classes serialized as JSON.
+
+    Args:
+      **kwargs: Extra keyword arguments passed to `json.dumps`.
+
+    Returns:
+      A JSON string holding an object with a "modules" entry, mapping each
+      module's scope name to its statistics, class and connection name scopes,
+      and a "classes" entry, mapping each class name to its statistics.
+    """
+    modules = collections.OrderedDict()
+    for module_key, stats in self._module_stats.items():
+      module_dict = stats.to_dict()
+      module_dict["class_name"] = self._module_classes[module_key]
+      module_dict["name_scopes"] = self._module_name_scopes[module_key]
+      modules[module_key] = module_dict
+    classes = collections.OrderedDict(
+        (class_name, stats.to_dict())
+        for class_name, stats in self._class_stats.items())
+    return json.dumps({"modules": modules, "classes": classes}, **kwargs)
+
+
+@contextlib.contextmanager
+def profile_connections():
+  """Profiles the connection of Sonnet modules to the graph.
+
+  Within this context, every connection of a Sonnet module is timed, and the
+  number of ops it adds to the default graph and of variables it creates are
+  counted. The statistics are accumulated per module and per module class, in
+  the yielded `ConnectionProfile`.
+
+  Connections of modules nested in other modules are included in the
+  statistics of the enclosing modules; the `self_*` statistics exclude them.
+  Profiles may be nested.
+
+  Yields:
+    A `ConnectionProfile` holding the statistics, which is complete once the
+    context exits.
+  """
+  profile = ConnectionProfile()
+  # pylint: disable=protected-access
+  with base._observe_calls(profile._profile_call):
+    with base.observe_connections(profile._observe_connection):
+      yield profile
+  # pylint: enable=protected-access
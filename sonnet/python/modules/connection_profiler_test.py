@@ -0,0 +1,178 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+
+"""Tests for sonnet.python.modules.connection_profiler."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+
+# Dependency imports
+import sonnet as snt
+import tensorflow as tf
+
+
+_LINEAR_CLASS = "sonnet.python.modules.basic.Linear"
+
+
+class Model(snt.AbstractModule):
+  """Two Linear modules built within the model's variable scope."""
+
+  def __init__(self, name="model"):
+    super(Model, self).__init__(name=name)
+    with self._enter_variable_scope():
+      self.linear_1 = snt.Linear(3, name="linear_1")
+      self.linear_2 = snt.Linear(2, name="linear_2")
+
+  def _build(self, inputs):
+    return self.linear_2(tf.nn.relu(self.linear_1(inputs)))
+
+
+_MODEL_CLASS = "{}.{}".format(Model.__module__, Model.__name__)
+
+
+class FailingModule(snt.AbstractModule):
+
+  def __init__(self, name="failing_module"):
+    super(FailingModule, self).__init__(name=name)
+
+  def _build(self, inputs):
+    raise ValueError("Connection failed.")
+
+
+class ConnectionProfilerTest(tf.test.TestCase):
+
+  def _connect_model(self):
+    self.model = Model()
+    inputs = tf.zeros([5, 4])
+    return self.model(inputs), self.model(inputs)
+
+  def testModuleStats(self):
+    with snt.profile_connections() as profile:
+      self._connect_model()
+
+    stats = profile.module_stats
+    # Modules are recorded once their connection finishes.
+    self.assertEqual(["model/linear_1", "model/linear_2", "model"],
+                     list(stats))
+
+    linear_1 = stats["model/linear_1"]
+    linear_2 = stats["model/linear_2"]
+    model = stats["model"]
+    for module_stats in (linear_1, linear_2, model):
+      self.assertEqual(2, module_stats.connections)
+      self.assertGreater(module_stats.ops, 0)
+
+    # Variables are only created by the first connection.
+    self.assertEqual(2, linear_1.variables)
+    self.assertEqual(2, linear_1.self_variables)
+    self.assertEqual(4 * (4 * 3 + 3), linear_1.variable_bytes)
+    self.assertEqual(4 * (3 * 2 + 2), linear_2.variable_bytes)
+    self.assertEqual(4, model.variables)
+    self.assertEqual(0, model.self_variables)
+    self.assertEqual(linear_1.variable_bytes + linear_2.variable_bytes,
+                     model.variable_bytes)
+    self.assertEqual(0, model.self_variable_bytes)
+
+    # The model's own ops are the ReLUs, the rest belongs to the linears.
+    self.assertEqual(linear_1.ops + linear_2.ops + model.self_ops, model.ops)
+    self.assertGreater(model.self_ops, 0)
+    self.assertLessEqual(linear_1.time + linear_2.time, model.time)
+    self.assertAllClose(model.time - linear_1.time - linear_2.time,
+                        model.self_time)
+
+  def testClassStats(self):
+    with snt.profile_connections() as profile:
+      self._connect_model()
+
+    self.assertEqual({_LINEAR_CLASS, _MODEL_CLASS},
+                     set(profile.class_stats))
+    linear = profile.class_stats[_LINEAR_CLASS]
+    self.assertEqual(4, linear.connections)
+    self.assertEqual(4, linear.variables)
+    self.assertEqual(
+        profile.module_stats["model/linear_1"].ops +
+        profile.module_stats["model/linear_2"].ops, linear.ops)
+
+  def testOnlyProfilesWithinContext(self):
+    linear = snt.Linear(3)
+    linear(tf.zeros([2, 2]))
+    with snt.profile_connections() as profile:
+      linear(tf.zeros([2, 2]))
+    linear(tf.zeros([2, 2]))
+
+    stats = profile.module_stats[linear.scope_name]
+    self.assertEqual(1, stats.connections)
+    self.assertEqual(0, stats.variables)
+
+  def testNestedProfiles(self):
+    with snt.profile_connections() as outer_profile:
+      self._connect_model()
+      with snt.profile_connections() as inner_profile:
+        self.model(tf.zeros([5, 4]))
+
+    self.assertEqual(3, outer_profile.module_stats["model"].connections)
+    self.assertEqual(1, inner_profile.module_stats["model"].connections)
+
+  def testFailedConnection(self):
+    module = FailingModule()
+    linear = snt.Linear(3)
+    with snt.profile_connections() as profile:
+      with self.assertRaisesRegexp(ValueError, "Connection failed"):
+        module(tf.zeros([2, 2]))
+      linear(tf.zeros([2, 2]))
+
+    self.assertEqual(1, profile.module_stats[module.scope_name].connections)
+    # The failed connection does not enclose the ones that follow it.
+    self.assertEqual(0, profile.module_stats[module.scope_name].variables)
+    self.assertEqual(2, profile.module_stats[linear.scope_name].variables)
+
+  def testReport(self):
+    with snt.profile_connections() as profile:
+      self._connect_model()
+
+    lines = profile.report(sort_by="variable_bytes").splitlines()
+    self.assertTrue(lines[0].startswith("Module"))
+    self.assertEqual(["model", "model/linear_1", "model/linear_2"],
+                     [line.split()[0] for line in lines[2:]])
+
+    lines = profile.report(by="class", max_rows=1).splitlines()
+    self.assertTrue(lines[0].startswith("Class"))
+    self.assertEqual(3, len(lines))
+
+    with self.assertRaisesRegexp(ValueError, "by must be"):
+      profile.report(by="op")
+    with self.assertRaisesRegexp(ValueError, "sort_by must be"):
+      profile.report(sort_by="flops")
+
+  def testToJson(self):
+    with snt.profile_connections() as profile:
+      self._connect_model()
+
+    serialized = json.loads(profile.to_json(indent=2))
+    model = serialized["modules"]["model"]
+    self.assertEqual(_MODEL_CLASS, model["class_name"])
+    self.assertEqual(["model/", "model_1/"], model["name_scopes"])
+    self.assertEqual(profile.module_stats["model"].to_dict(),
+                     {key: value for key, value in model.items()
+                      if key not in ("class_name", "name_scopes")})
+    self.assertEqual(profile.class_stats[_LINEAR_CLASS].to_dict(),
+                     serialized["classes"][_LINEAR_CLASS])
+
+
+if __name__ == "__main__":
+  tf.test.main()
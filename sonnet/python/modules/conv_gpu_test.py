@@ -637,5 +637,51 @@ class Conv3DTransposeTestDataFormats(parameterized.TestCase, tf.test.TestCase):
 
     self.checkEquality(result_ndhwc, result_ncdhw)
 
+
+class CausalConv1DCoreTestDataFormats(parameterized.TestCase,
+                                      tf.test.TestCase):
+  BATCH_SIZE = 3
+  NUM_STEPS = 11
+  INPUT_CHANNELS = 4
+
+  def setUp(self):
+    super(CausalConv1DCoreTestDataFormats, self).setUp()
+    name = "{}.{}".format(type(self).__name__, self._testMethodName)
+    if not test.is_gpu_available():
+      self.skipTest("No GPU was detected, so {} will be skipped.".format(name))
+
+  @parameterized.named_parameters(
+      ("ConnectConvFirst", True), ("ConnectCoreFirst", False))
+  def testCausalConv1DCoreChannelsFirst(self, connect_conv_first):
+    """Checks stepping NCW layers matches convolving the whole sequence."""
+    layers = [
+        snt.Conv1D(5, 2, padding=snt.CAUSAL, data_format="NCW"),
+        tf.nn.relu,
+        snt.Conv1D(6, 3, rate=2, padding=snt.CAUSAL, data_format="NCW",
+                   mask=np.array([1., 0., 1.], dtype=np.float32)),
+        snt.Conv1D(2, 2, rate=4, padding=snt.CAUSAL, use_bias=False,
+                   data_format="NCW"),
+    ]
+    sequence = tf.random_normal(
+        [self.BATCH_SIZE, self.NUM_STEPS, self.INPUT_CHANNELS])
+    conv_stack = snt.Sequential(layers)
+
+    def apply_conv_stack():
+      return tf.transpose(
+          conv_stack(tf.transpose(sequence, [0, 2, 1])), [0, 2, 1])
+
+    if connect_conv_first:
+      expected_output = apply_conv_stack()
+    core = snt.CausalConv1DCore(layers, input_channels=self.INPUT_CHANNELS)
+    output, _ = tf.nn.dynamic_rnn(
+        core, sequence, initial_state=core.initial_state(self.BATCH_SIZE))
+    if not connect_conv_first:
+      expected_output = apply_conv_stack()
+
+    with self.test_session(use_gpu=True, force_gpu=True) as session:
+      tf.global_variables_initializer().run()
+      output, expected_output = session.run((output, expected_output))
+    self.assertAllClose(expected_output, output, atol=1e-5)
+
 if __name__ == "__main__":
   tf.test.main()
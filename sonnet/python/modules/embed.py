@@ -23,6 +23,7 @@ import math
 
 # Dependency imports
 from sonnet.python.modules import base
+from sonnet.python.modules import basic
 from sonnet.python.modules import util
 import tensorflow as tf
 
@@ -142,11 +143,17 @@ class Embed(base.AbstractModule):
     Looks up an embedding vector for each value in `ids`. All ids must be within
     [0, vocab_size), else an `InvalidArgumentError` is raised at runtime.
 
+    If the custom getter returns several samples of the embeddings, stacked
+    along a new leading axis, e.g. `bayes_by_backprop_getter(num_samples=...)`,
+    the ids are looked up in each sample.
+
     Args:
       ids: Tensor of dtype int64.
 
     Returns:
-      Tensor of tf.shape(ids) + [embedding_dim] and dtype float32.
+      Tensor of tf.shape(ids) + [embedding_dim] and dtype float32, or
+      [num_samples] + tf.shape(ids) + [embedding_dim] if the embeddings have
+      samples.
     """
     # Construct embeddings.
     if self._existing_vocab is None:
@@ -179,6 +186,8 @@ class Embed(base.AbstractModule):
       embeddings = self._embeddings
 
     # Lookup embeddings
+    if basic.has_weight_samples(embeddings, 2):
+      return tf.gather(embeddings, ids, axis=1, name="embedding_lookup")
     return tf.nn.embedding_lookup(embeddings, ids, name="embedding_lookup")
 
   @property
@@ -51,11 +51,106 @@ from sonnet.python.modules import rnn_core
 from sonnet.python.modules import util
 import tensorflow as tf
 
+from tensorflow.contrib.rnn.python.ops import gru_ops
+from tensorflow.contrib.rnn.python.ops import lstm_ops
 from tensorflow.python.ops import array_ops
+from tensorflow.python.util import nest
 
 
 LSTMState = collections.namedtuple("LSTMState", ("hidden", "cell"))
 
+# Dtypes for which the fused `LSTMBlockCell` and `GRUBlockCell` kernels are
+# registered on every device.
+_FUSED_KERNEL_DTYPES = (tf.float32,)
+
+
+def _reuse_existing_variables():
+  """Re-enters the current variable scope, reusing variables that exist.
+
+  Cores which can be connected through more than one method (e.g. `_build` and
+  `unroll`) create their variables under this scope, so that whichever method
+  is connected first creates them and the others share them.
+
+  Returns:
+    A context manager re-entering the current variable scope with
+    `reuse=tf.AUTO_REUSE`, without opening a new name scope.
+  """
+  return tf.variable_scope(tf.get_variable_scope(), reuse=tf.AUTO_REUSE,
+                           auxiliary_name_scope=False)
+
+
+def _concat_samples(tensors):
+  """Concatenates tensors of which some may have a leading samples axis.
+
+  Args:
+    tensors: List of Tensors of size `[batch_size, size]` or
+      `[num_samples, batch_size, size]`.
+
+  Returns:
+    The Tensors concatenated along their last axis, after copying those of
+    size `[batch_size, size]` for each sample if any has samples.
+  """
+  num_samples = None
+  for tensor in tensors:
+    if tensor.get_shape().ndims == 3:
+      num_samples = tf.shape(tensor)[0]
+  if num_samples is not None:
+    tensors = [
+        tf.tile(tf.expand_dims(tensor, 0), [num_samples, 1, 1])
+        if tensor.get_shape().ndims == 2 else tensor
+        for tensor in tensors]
+  return tf.concat(tensors, -1)
+
+
+def _unroll_time_major(step_fn, input_sequence, initial_state, output_size,
+                       sequence_length=None):
+  """Unrolls `step_fn` over a time-major sequence in a `tf.while_loop`.
+
+  Args:
+    step_fn: Callable taking `(time, inputs, prev_state)` and returning
+      `(output, next_state)`.
+    input_sequence: Tensor of size `[time, batch_size, ...]`.
+    initial_state: Initial state, with arbitrary nesting.
+    output_size: Nested structure of output sizes, as in `RNNCore.output_size`.
+    sequence_length: Optional int32 Tensor of size `[batch_size]`. As in
+      `tf.nn.dynamic_rnn`, once a sequence has ended its outputs are zero and
+      its state is copied through unchanged.
+
+  Returns:
+    A tuple (output_sequence, final_state).
+  """
+  num_steps = tf.shape(input_sequence)[0]
+  input_ta = tf.TensorArray(
+      dtype=input_sequence.dtype, size=num_steps).unstack(input_sequence)
+  output_tas = [tf.TensorArray(dtype=input_sequence.dtype, size=num_steps)
+                for _ in nest.flatten(output_size)]
+  if sequence_length is not None:
+    sequence_length = tf.to_int32(sequence_length)
+
+  def loop_body(time, prev_state, output_tas):
+    output, next_state = step_fn(time, input_ta.read(time), prev_state)
+    flat_output = nest.flatten(output)
+
+    if sequence_length is not None:
+      is_running = tf.less(time, sequence_length)
+      flat_output = [tf.where(is_running, o, tf.zeros_like(o))
+                     for o in flat_output]
+      next_state = nest.map_structure(
+          lambda next_s, prev_s: tf.where(is_running, next_s, prev_s),
+          next_state, prev_state)
+
+    output_tas = [ta.write(time, o) for ta, o in zip(output_tas, flat_output)]
+    return time + 1, next_state, output_tas
+
+  _, final_state, output_tas = tf.while_loop(
+      cond=lambda time, *unused_args: time < num_steps,
+      body=loop_body,
+      loop_vars=(tf.constant(0), initial_state, output_tas))
+
+  output_sequence = nest.pack_sequence_as(
+      output_size, [ta.stack() for ta in output_tas])
+  return output_sequence, final_state
+
 
 class LSTM(rnn_core.RNNCore):
   """LSTM recurrent network cell with optional peepholes & layer normalization.
@@ -83,6 +178,15 @@ class LSTM(rnn_core.RNNCore):
 
     https://arxiv.org/abs/1402.1128
 
+  #### Fused kernel
+
+  With `use_fused_kernel=True`, and when neither peepholes, layer
+  normalization nor a recurrent projection are used, each timestep is computed
+  with the fused `LSTMBlockCell` kernel. The kernel consumes `w_gates` and
+  `b_gates` in their existing layout and gate order, so the variables and
+  checkpoints are the same whichever path is used, but the outputs may differ
+  from those of the unfused ops within floating point tolerance.
+
   Attributes:
     state_size: Tuple of `tf.TensorShape`s indicating the size of state tensors.
     output_size: `tf.TensorShape` indicating the size of the core output.
@@ -109,6 +213,7 @@ class LSTM(rnn_core.RNNCore):
                hidden_clip_value=None,
                projection_size=None,
                cell_clip_value=None,
+               use_fused_kernel=False,
                custom_getter=None,
                name="lstm"):
     """Construct LSTM.
@@ -137,6 +242,9 @@ class LSTM(rnn_core.RNNCore):
         projected to this size via a learnable projection matrix.
       cell_clip_value: Optional number; if set, then the LSTM cell vector is
         clipped by this value.
+      use_fused_kernel: Boolean that indicates whether to use the fused
+        `LSTMBlockCell` kernel when the configuration and dtype allow it. The
+        variables are the same either way. Defaults to `False`.
       custom_getter: Callable that takes as a first argument the true getter,
         and allows overwriting the internal get_variable method. See the
         `tf.get_variable` documentation for more details.
@@ -162,6 +270,7 @@ class LSTM(rnn_core.RNNCore):
     self._cell_clip_value = cell_clip_value
     self._use_projection = projection_size is not None
     self._hidden_state_size = projection_size or hidden_size
+    self._use_fused_kernel = use_fused_kernel
 
     self.possible_keys = self.get_possible_initializer_keys(
         use_peepholes=use_peepholes, use_projection=self._use_projection)
@@ -217,8 +326,16 @@ class LSTM(rnn_core.RNNCore):
     their corresponding multiplications. The batch size may differ for each
     connection.
 
+    If the custom getter returns several samples of the weights, stacked along
+    a new leading axis, e.g. `bayes_by_backprop_getter(num_samples=...)`, the
+    outputs and next state have a leading axis of size `num_samples`, and so
+    may the inputs and previous state. As the state then changes shape after
+    the first step, the initial state must already have the samples axis when
+    the core is connected with `tf.nn.dynamic_rnn`.
+
     Args:
-      inputs: Tensor of size `[batch_size, input_size]`.
+      inputs: Tensor of size `[batch_size, input_size]`, or
+        `[num_samples, batch_size, input_size]`.
       prev_state: Tuple (prev_hidden, prev_cell).
 
     Returns:
@@ -226,12 +343,172 @@ class LSTM(rnn_core.RNNCore):
       `[batch_size, hidden_size]` and 'next_state' is a `LSTMState` namedtuple
       (next_hidden, next_cell) where `next_hidden` and `next_cell` have size
       `[batch_size, hidden_size]`. If `projection_size` is specified, then
-      `next_hidden` will have size `[batch_size, projection_size]`.
+      `next_hidden` will have size `[batch_size, projection_size]`. They have
+      a leading axis of size `num_samples` if the weights, inputs or state
+      have samples.
     Raises:
       ValueError: If connecting the module into the graph any time after the
         first time, and the inferred size of the inputs does not match previous
         invocations.
     """
+    prev_hidden, prev_cell = self._clip_state(prev_state)
+    input_shape = inputs.get_shape()
+    if input_shape.ndims == 3:
+      input_shape = input_shape[1:]
+
+    with _reuse_existing_variables():
+      self._create_gate_variables(input_shape, inputs.dtype)
+      if self._use_peepholes:  # diagonal connections
+        self._create_peephole_variables(inputs.dtype)
+      if self._use_layer_norm:
+        layer_norm_module = layer_norm.LayerNorm()
+
+    has_samples = any(
+        tensor.get_shape().ndims == 3
+        for tensor in (inputs, prev_hidden, prev_cell, self._w_xh))
+    if not has_samples and self._fused_kernel_supported(inputs.dtype):
+      # The kernel multiplies `[inputs, prev_hidden]` by `w_gates` and splits
+      # the gates in the same (i, j, f, o) order as below, adding
+      # `forget_bias` to the forget gate. A negative `cell_clip` disables its
+      # own clipping, which is applied to the next rather than previous cell.
+      _, next_cell, _, _, _, _, next_hidden = lstm_ops._lstm_block_cell(  # pylint: disable=protected-access
+          inputs, prev_cell, prev_hidden, self._w_xh, self._b,
+          forget_bias=self._forget_bias, cell_clip=-1., use_peephole=False)
+      return next_hidden, LSTMState(hidden=next_hidden, cell=next_cell)
+
+    # pylint false positive: calling module of same file;
+    # pylint: disable=not-callable
+
+    # Parameters of gates are concatenated into one multiply for efficiency.
+    inputs_and_hidden = _concat_samples([inputs, prev_hidden])
+    gates = basic.weight_samples_matmul(inputs_and_hidden, self._w_xh)
+
+    if self._use_layer_norm:
+      if gates.get_shape().ndims == 3:
+        gates = basic.split_leading_dim(
+            layer_norm_module(basic.merge_leading_dims(gates, 2)), gates, 2)
+      else:
+        gates = layer_norm_module(gates)
+
+    gates += basic.expand_weight_samples(self._b, 1)
+
+    return self._apply_gates(gates, prev_cell)
+
+  @util.reuse_variables
+  def unroll(self, input_sequence, initial_state, sequence_length=None):
+    """Unrolls the LSTM over a whole time-major input sequence.
+
+    This computes the same function as connecting the core with
+    `tf.nn.dynamic_rnn(..., time_major=True)` and reads and writes the same
+    variables as `_build`, so the two may be mixed freely (e.g. `unroll` for
+    training and `__call__` for sampling) and existing checkpoints still load.
+
+    The difference is in how the gate pre-activations are computed. Rather
+    than multiplying `[inputs, prev_hidden]` by `w_gates` at every timestep,
+    the input rows of `w_gates` are applied to all `time * batch_size` inputs
+    in one large matrix multiplication before the loop, and only the
+    recurrent half of the product is computed inside the `tf.while_loop`.
+
+    Args:
+      input_sequence: Tensor of size `[time, batch_size, input_size]`.
+      initial_state: Tuple (initial_hidden, initial_cell).
+      sequence_length: Optional int32 Tensor of size `[batch_size]`. As in
+        `tf.nn.dynamic_rnn`, once a sequence has ended its outputs are zero and
+        its state is copied through unchanged.
+
+    Returns:
+      A tuple (output_sequence, final_state) where `output_sequence` is a
+      Tensor of size `[time, batch_size, hidden_size]` and `final_state` is a
+      `LSTMState` namedtuple (final_hidden, final_cell). If `projection_size`
+      is specified, then the outputs and `final_hidden` have size
+      `projection_size` instead of `hidden_size`.
+
+    Raises:
+      ValueError: If `input_sequence` is not of rank 3, or its final dimension
+        is not statically known.
+      ValueError: If the custom getter returns several samples of the weights.
+    """
+    input_shape = input_sequence.get_shape()
+    if input_shape.ndims != 3:
+      raise ValueError(
+          "Rank of input_sequence must be 3 not: {}".format(input_shape.ndims))
+    input_size = input_shape[2].value
+    if input_size is None:
+      raise ValueError("Final dimension of input_sequence must be statically "
+                       "known.")
+    dtype = input_sequence.dtype
+
+    with _reuse_existing_variables():
+      self._create_gate_variables(input_shape[1:], dtype)
+      if self._use_peepholes:
+        self._create_peephole_variables(dtype)
+      if self._use_layer_norm:
+        layer_norm_module = layer_norm.LayerNorm()
+    if basic.has_weight_samples(self._w_xh, 2):
+      raise ValueError("unroll does not support weights with samples, connect "
+                       "the core at each timestep instead.")
+
+    # pylint: disable=not-callable
+
+    # Rows of `w_gates` are ordered as the `[inputs, prev_hidden]` concat used
+    # by `_build`.
+    w_input, w_hidden = tf.split(
+        self._w_xh, [input_size, self._hidden_state_size], axis=0)
+
+    with tf.name_scope("input_projection"):
+      input_gates = tf.matmul(
+          basic.merge_leading_dims(input_sequence, 2), w_input)
+      if not self._use_layer_norm:
+        # Layer normalization is applied before the bias, so the bias can only
+        # be folded into the hoisted projection when it is disabled.
+        input_gates += self._b
+      input_gates = basic.split_leading_dim(input_gates, input_sequence, 2)
+
+    num_steps = tf.shape(input_sequence)[0]
+    input_gates_ta = tf.TensorArray(
+        dtype=dtype, size=num_steps).unstack(input_gates)
+    initial_state = LSTMState(*initial_state)
+    output_ta = tf.TensorArray(
+        dtype=dtype, size=num_steps,
+        element_shape=initial_state.hidden.get_shape())
+    if sequence_length is not None:
+      sequence_length = tf.to_int32(sequence_length)
+
+    def loop_body(time, prev_state, output_ta):
+      """Computes the recurrent half of the gates for one timestep."""
+      prev_hidden, prev_cell = self._clip_state(prev_state)
+      gates = input_gates_ta.read(time) + tf.matmul(prev_hidden, w_hidden)
+      if self._use_layer_norm:
+        gates = layer_norm_module(gates) + self._b
+      output, next_state = self._apply_gates(gates, prev_cell)
+
+      if sequence_length is not None:
+        is_running = tf.less(time, sequence_length)
+        output = tf.where(is_running, output, tf.zeros_like(output))
+        next_state = LSTMState(*[
+            tf.where(is_running, next_s, prev_s)
+            for next_s, prev_s in zip(next_state, prev_state)])
+
+      return time + 1, next_state, output_ta.write(time, output)
+
+    _, final_state, output_ta = tf.while_loop(
+        cond=lambda time, *unused_args: time < num_steps,
+        body=loop_body,
+        loop_vars=(tf.constant(0), initial_state, output_ta))
+
+    return output_ta.stack(), final_state
+
+  def _fused_kernel_supported(self, dtype):
+    """Returns whether a step can be computed with the fused kernel."""
+    # Peepholes are excluded because `_apply_gates` applies the output gate
+    # peephole to the gate activation input rather than to the gate.
+    return (self._use_fused_kernel and
+            not (self._use_peepholes or self._use_layer_norm or
+                 self._use_projection) and
+            dtype.base_dtype in _FUSED_KERNEL_DTYPES)
+
+  def _clip_state(self, prev_state):
+    """Applies `hidden_clip_value` and `cell_clip_value` to the state."""
     prev_hidden, prev_cell = prev_state
 
     # pylint: disable=invalid-unary-operand-type
@@ -243,37 +520,28 @@ class LSTM(rnn_core.RNNCore):
           prev_cell, -self._cell_clip_value, self._cell_clip_value)
     # pylint: enable=invalid-unary-operand-type
 
-    self._create_gate_variables(inputs.get_shape(), inputs.dtype)
-
-    # pylint false positive: calling module of same file;
-    # pylint: disable=not-callable
-
-    # Parameters of gates are concatenated into one multiply for efficiency.
-    inputs_and_hidden = tf.concat([inputs, prev_hidden], 1)
-    gates = tf.matmul(inputs_and_hidden, self._w_xh)
-
-    if self._use_layer_norm:
-      gates = layer_norm.LayerNorm()(gates)
-
-    gates += self._b
+    return prev_hidden, prev_cell
 
+  def _apply_gates(self, gates, prev_cell):
+    """Computes the output and next state from the gate pre-activations."""
     # i = input_gate, j = next_input, f = forget_gate, o = output_gate
-    i, j, f, o = array_ops.split(value=gates, num_or_size_splits=4, axis=1)
+    i, j, f, o = array_ops.split(value=gates, num_or_size_splits=4, axis=-1)
 
     if self._use_peepholes:  # diagonal connections
-      self._create_peephole_variables(inputs.dtype)
-      f += self._w_f_diag * prev_cell
-      i += self._w_i_diag * prev_cell
+      f += basic.expand_weight_samples(self._w_f_diag, 1) * prev_cell
+      i += basic.expand_weight_samples(self._w_i_diag, 1) * prev_cell
 
     forget_mask = tf.sigmoid(f + self._forget_bias)
     next_cell = forget_mask * prev_cell + tf.sigmoid(i) * tf.tanh(j)
     cell_output = next_cell
     if self._use_peepholes:
-      cell_output += self._w_o_diag * cell_output
+      w_o_diag = basic.expand_weight_samples(self._w_o_diag, 1)
+      cell_output += w_o_diag * cell_output
     next_hidden = tf.tanh(cell_output) * tf.sigmoid(o)
 
     if self._use_projection:
-      next_hidden = tf.matmul(next_hidden, self._w_h_projection)
+      next_hidden = basic.weight_samples_matmul(next_hidden,
+                                                self._w_h_projection)
 
     return next_hidden, LSTMState(hidden=next_hidden, cell=next_cell)
 
@@ -356,6 +624,11 @@ class LSTM(rnn_core.RNNCore):
     """Boolean indicating whether layer norm is enabled."""
     return self._use_layer_norm
 
+  @property
+  def use_fused_kernel(self):
+    """Boolean indicating whether the fused kernel is used when supported."""
+    return self._use_fused_kernel
+
 
 class RecurrentDropoutWrapper(rnn_core.RNNCore):
   """Wraps an RNNCore so that recurrent dropout can be applied."""
@@ -397,12 +670,49 @@ class RecurrentDropoutWrapper(rnn_core.RNNCore):
 
     # Dropout masks are generated via tf.nn.dropout so they actually include
     # rescaling: the mask value is 1/keep_prob if no dropout is applied.
-    next_core_state = tf.contrib.framework.nest.map_structure(
-        lambda i, state: state if i is None else state * dropout_masks[i],
-        self._dropout_indexes, next_core_state)
+    next_core_state = self._apply_dropout(next_core_state, dropout_masks)
 
     return output, (next_core_state, dropout_masks)
 
+  @util.reuse_variables
+  def unroll(self, input_sequence, initial_state, sequence_length=None):
+    """Unrolls the wrapped core with recurrent dropout over a sequence.
+
+    This computes the same function as connecting the wrapper with
+    `tf.nn.dynamic_rnn(..., time_major=True)`. The dropout masks are drawn
+    once per sequence by `initial_state`, so rather than threading them
+    through the loop as part of the state, they are read directly by the
+    `tf.while_loop` body and only the state of the wrapped core is carried
+    from one step to the next.
+
+    Args:
+      input_sequence: Tensor of size `[time, batch_size, ...]`.
+      initial_state: Tuple (core_initial_state, dropout_masks), as returned by
+        `initial_state`.
+      sequence_length: Optional int32 Tensor of size `[batch_size]`. As in
+        `tf.nn.dynamic_rnn`, once a sequence has ended its outputs are zero and
+        its state is copied through unchanged.
+
+    Returns:
+      A tuple (output_sequence, final_state), where `final_state` has the same
+      structure as `initial_state`.
+    """
+    core_state, dropout_masks = initial_state
+
+    def step(unused_time, inputs, prev_core_state):
+      output, next_core_state = self._core(inputs, prev_core_state)
+      return output, self._apply_dropout(next_core_state, dropout_masks)
+
+    output_sequence, final_core_state = _unroll_time_major(
+        step, input_sequence, core_state, self._core.output_size,
+        sequence_length=sequence_length)
+    return output_sequence, (final_core_state, dropout_masks)
+
+  def _apply_dropout(self, core_state, dropout_masks):
+    return tf.contrib.framework.nest.map_structure(
+        lambda i, state: state if i is None else state * dropout_masks[i],
+        self._dropout_indexes, core_state)
+
   def initial_state(self, batch_size, dtype=tf.float32, trainable=False,
                     trainable_initializers=None, trainable_regularizers=None,
                     name=None):
@@ -500,6 +810,64 @@ class ZoneoutWrapper(rnn_core.RNNCore):
 
     return output, next_state
 
+  @util.reuse_variables
+  def unroll(self, input_sequence, initial_state, sequence_length=None,
+             seed=None):
+    """Unrolls the wrapped core with zoneout over a sequence.
+
+    This computes the same function as connecting the wrapper with
+    `tf.nn.dynamic_rnn(..., time_major=True)`. In training mode, rather than
+    running a random op for every state at every step, the zoneout masks of
+    all the timesteps are drawn with one random op per state before the
+    `tf.while_loop`, and each step reads its slice of them.
+
+    Args:
+      input_sequence: Tensor of size `[time, batch_size, ...]`.
+      initial_state: Initial state of the wrapped core.
+      sequence_length: Optional int32 Tensor of size `[batch_size]`. As in
+        `tf.nn.dynamic_rnn`, once a sequence has ended its outputs are zero and
+        its state is copied through unchanged.
+      seed: Optional random seed for the zoneout masks.
+
+    Returns:
+      A tuple (output_sequence, final_state).
+    """
+    flat_keep_probs = nest.flatten(self._keep_probs)
+    flat_initial_state = nest.flatten(initial_state)
+    num_steps = tf.shape(input_sequence)[0]
+
+    mask_tas = []
+    for keep_prob, state in zip(flat_keep_probs, flat_initial_state):
+      if keep_prob is None or not self._is_training:
+        mask_tas.append(None)
+        continue
+      # As in `tf.nn.dropout`, each mask is 1 with probability `keep_prob`.
+      mask_shape = tf.concat([[num_steps], tf.shape(state)], 0)
+      masks = tf.floor(keep_prob + tf.random_uniform(
+          mask_shape, seed=seed, dtype=state.dtype))
+      mask_tas.append(tf.TensorArray(
+          dtype=state.dtype, size=num_steps).unstack(masks))
+
+    def step(time, inputs, prev_state):
+      """Steps the core and applies zoneout with precomputed masks."""
+      output, next_state = self._core(inputs, prev_state)
+      flat_next_state = []
+      for keep_prob, mask_ta, next_s, prev_s in zip(
+          flat_keep_probs, mask_tas, nest.flatten(next_state),
+          nest.flatten(prev_state)):
+        if keep_prob is None:
+          flat_next_state.append(next_s)
+        elif mask_ta is not None:
+          mask = mask_ta.read(time)
+          flat_next_state.append(prev_s + (next_s - prev_s) * mask)
+        else:
+          flat_next_state.append(prev_s * (1 - keep_prob) + next_s * keep_prob)
+      return output, nest.pack_sequence_as(next_state, flat_next_state)
+
+    return _unroll_time_major(
+        step, input_sequence, initial_state, self._core.output_size,
+        sequence_length=sequence_length)
+
   def initial_state(self, batch_size, dtype=tf.float32, trainable=False,
                     trainable_initializers=None, trainable_regularizers=None,
                     name=None):
@@ -1429,6 +1797,12 @@ class GRU(rnn_core.RNNCore):
 
   The implementation is based on: https://arxiv.org/pdf/1412.3555v1.pdf.
 
+  With `use_fused_kernel=True` and float32 inputs, each timestep is computed
+  with the fused `GRUBlockCell` kernel. Its weights are assembled from the
+  variables below on each connection, so the variables and checkpoints are the
+  same whichever path is used, but the outputs may differ from those of the
+  unfused ops within floating point tolerance.
+
   Attributes:
     state_size: Integer indicating the size of state tensor.
     output_size: Integer indicating the size of the core output.
@@ -1450,7 +1824,8 @@ class GRU(rnn_core.RNNCore):
   POSSIBLE_KEYS = POSSIBLE_INITIALIZER_KEYS
 
   def __init__(self, hidden_size, initializers=None, partitioners=None,
-               regularizers=None, custom_getter=None, name="gru"):
+               regularizers=None, use_fused_kernel=False, custom_getter=None,
+               name="gru"):
     """Construct GRU.
 
     Args:
@@ -1466,6 +1841,9 @@ class GRU(rnn_core.RNNCore):
         biases. As a default, no regularizers are used. This
         dict may contain any of the keys returned by
         `GRU.get_possible_initializer_keys`
+      use_fused_kernel: Boolean that indicates whether to use the fused
+        `GRUBlockCell` kernel when the input dtype allows it. The variables are
+        the same either way. Defaults to `False`.
       custom_getter: Callable that takes as a first argument the true getter,
         and allows overwriting the internal get_variable method. See the
         `tf.get_variable` documentation for more details.
@@ -1481,6 +1859,7 @@ class GRU(rnn_core.RNNCore):
     """
     super(GRU, self).__init__(custom_getter=custom_getter, name=name)
     self._hidden_size = hidden_size
+    self._use_fused_kernel = use_fused_kernel
     self._initializers = util.check_initializers(
         initializers, self.POSSIBLE_INITIALIZER_KEYS)
     self._partitioners = util.check_partitioners(
@@ -1549,8 +1928,6 @@ class GRU(rnn_core.RNNCore):
                                initializer=self._initializers.get(GRU.BZ),
                                partitioner=self._partitioners.get(GRU.BZ),
                                regularizer=self._regularizers.get(GRU.BZ))
-    z = tf.sigmoid(tf.matmul(inputs, self._wz) +
-                   tf.matmul(prev_state, self._uz) + self._bz)
 
     self._wr = tf.get_variable(GRU.WR, weight_shape, dtype=inputs.dtype,
                                initializer=self._initializers.get(GRU.WR),
@@ -1564,8 +1941,6 @@ class GRU(rnn_core.RNNCore):
                                initializer=self._initializers.get(GRU.BR),
                                partitioner=self._partitioners.get(GRU.BR),
                                regularizer=self._regularizers.get(GRU.BR))
-    r = tf.sigmoid(tf.matmul(inputs, self._wr) +
-                   tf.matmul(prev_state, self._ur) + self._br)
 
     self._wh = tf.get_variable(GRU.WH, weight_shape, dtype=inputs.dtype,
                                initializer=self._initializers.get(GRU.WH),
@@ -1579,12 +1954,47 @@ class GRU(rnn_core.RNNCore):
                                initializer=self._initializers.get(GRU.BH),
                                partitioner=self._partitioners.get(GRU.BH),
                                regularizer=self._regularizers.get(GRU.BH))
+
+    if self._use_fused_kernel and (
+        inputs.dtype.base_dtype in _FUSED_KERNEL_DTYPES):
+      return self._build_fused(inputs, prev_state)
+
+    z = tf.sigmoid(tf.matmul(inputs, self._wz) +
+                   tf.matmul(prev_state, self._uz) + self._bz)
+    r = tf.sigmoid(tf.matmul(inputs, self._wr) +
+                   tf.matmul(prev_state, self._ur) + self._br)
     h_twiddle = tf.tanh(tf.matmul(inputs, self._wh) +
                         tf.matmul(r * prev_state, self._uh) + self._bh)
 
     state = (1 - z) * prev_state + z * h_twiddle
     return state, state
 
+  def _build_fused(self, inputs, prev_state):
+    """Computes a step with the fused `GRUBlockCell` kernel.
+
+    The kernel computes `next_state = u * prev_state + (1 - u) * c`, with the
+    reset and update gates `r, u` read from a single `[inputs, prev_state]`
+    product. Since `1 - sigmoid(x) = sigmoid(-x)`, its update gate is that of
+    `_build` with negated weights, so the kernel weights are assembled from the
+    existing variables and gradients flow back to them unchanged.
+
+    Args:
+      inputs: Tensor of size `[batch_size, input_size]`.
+      prev_state: Tensor of size `[batch_size, hidden_size]`.
+
+    Returns:
+      A tuple (output, next_state), as returned by `_build`.
+    """
+    with tf.name_scope("fused_weights"):
+      w_ru = tf.concat([tf.concat([self._wr, self._ur], 0),
+                        -tf.concat([self._wz, self._uz], 0)], 1)
+      b_ru = tf.concat([self._br, -self._bz], 0)
+      w_c = tf.concat([self._wh, self._uh], 0)
+    _, _, _, state = gru_ops.gen_gru_ops.gru_block_cell(
+        x=inputs, h_prev=prev_state, w_ru=w_ru, w_c=w_c, b_ru=b_ru,
+        b_c=tf.convert_to_tensor(self._bh))
+    return state, state
+
   @property
   def state_size(self):
     return tf.TensorShape([self._hidden_size])
@@ -1593,6 +2003,11 @@ class GRU(rnn_core.RNNCore):
   def output_size(self):
     return tf.TensorShape([self._hidden_size])
 
+  @property
+  def use_fused_kernel(self):
+    """Boolean indicating whether the fused kernel is used when supported."""
+    return self._use_fused_kernel
+
 
 class HighwayCore(rnn_core.RNNCore):
   """Recurrent Highway Network cell.
@@ -29,6 +29,7 @@ import sonnet as snt
 import tensorflow as tf
 
 from tensorflow.python.ops import variables
+from tensorflow.python.util import nest
 
 
 # Some helpers used for generic tests which cover both LSTM and BatchNormLSTM:
@@ -409,6 +410,93 @@ class LSTMTest(tf.test.TestCase, parameterized.TestCase):
           np.max(np.abs(outputs["train_out"][0] - outputs["train_out"][1])),
           0.04)
 
+  @parameterized.parameters((False,), (True,))
+  def testRecurrentDropoutUnroll(self, use_sequence_length):
+    """Checks `unroll` matches `dynamic_rnn` for the same dropout masks."""
+    batch_size = 3
+    input_size = 4
+    hidden_size = 5
+    seq_len = 6
+
+    train_cell, _ = snt.lstm_with_recurrent_dropout(hidden_size, keep_prob=0.5)
+    inputs = tf.random_uniform([seq_len, batch_size, input_size])
+    sequence_length = (tf.constant([6, 2, 0]) if use_sequence_length
+                       else None)
+    # The masks are drawn by `initial_state`, so both unrolls share them.
+    initial_state = train_cell.initial_state(batch_size)
+    output, final_state = train_cell.unroll(
+        inputs, initial_state, sequence_length=sequence_length)
+    expected_output, expected_final_state = tf.nn.dynamic_rnn(
+        train_cell, inputs, initial_state=initial_state,
+        sequence_length=sequence_length, time_major=True)
+
+    self.evaluate(tf.global_variables_initializer())
+    values, expected_values = self.evaluate(
+        ((output, final_state), (expected_output, expected_final_state)))
+    for value, expected_value in zip(nest.flatten(values),
+                                     nest.flatten(expected_values)):
+      self.assertAllClose(expected_value, value)
+
+  @parameterized.parameters(
+      (1 - 1e-8, True, False),
+      (1e-8, True, True),
+      (0.5, False, False),
+      (0.5, False, True),
+  )
+  def testZoneoutUnroll(self, keep_prob, is_training, use_sequence_length):
+    """Checks `unroll` matches `dynamic_rnn` when zoneout is deterministic."""
+    batch_size = 3
+    input_size = 4
+    hidden_size = 5
+    seq_len = 6
+
+    lstm = snt.LSTM(hidden_size)
+    cell = snt.ZoneoutWrapper(lstm, snt.LSTMState(keep_prob, keep_prob),
+                              is_training=is_training)
+    inputs = tf.random_uniform([seq_len, batch_size, input_size])
+    sequence_length = (tf.constant([6, 2, 0]) if use_sequence_length
+                       else None)
+    initial_state = nest.map_structure(lambda s: s + 0.5,
+                                       cell.initial_state(batch_size))
+    output, final_state = cell.unroll(
+        inputs, initial_state, sequence_length=sequence_length, seed=7)
+    expected_output, expected_final_state = tf.nn.dynamic_rnn(
+        cell, inputs, initial_state=initial_state,
+        sequence_length=sequence_length, time_major=True)
+
+    self.evaluate(tf.global_variables_initializer())
+    values, expected_values = self.evaluate(
+        ((output, final_state), (expected_output, expected_final_state)))
+    for value, expected_value in zip(nest.flatten(values),
+                                     nest.flatten(expected_values)):
+      self.assertAllClose(expected_value, value)
+
+  def testZoneoutUnrollMasks(self):
+    """Checks each state value is either updated or frozen by `unroll`."""
+    batch_size = 50
+    hidden_size = 20
+    keep_prob = 0.7
+
+    lstm = snt.LSTM(hidden_size)
+    cell = snt.ZoneoutWrapper(lstm, snt.LSTMState(keep_prob, None),
+                              is_training=True)
+    inputs = tf.random_uniform([1, batch_size, 3])
+    initial_state = nest.map_structure(lambda s: s + 0.5,
+                                       lstm.initial_state(batch_size))
+    _, (hidden, cell_state) = cell.unroll(inputs, initial_state)
+    _, (expected_hidden, expected_cell_state) = lstm(inputs[0], initial_state)
+
+    self.evaluate(tf.global_variables_initializer())
+    (hidden, cell_state, expected_hidden, expected_cell_state,
+     initial_hidden) = self.evaluate(
+         (hidden, cell_state, expected_hidden, expected_cell_state,
+          initial_state.hidden))
+    self.assertAllClose(expected_cell_state, cell_state)
+    updated = np.isclose(hidden, expected_hidden)
+    frozen = np.isclose(hidden, initial_hidden)
+    self.assertTrue(np.all(updated | frozen))
+    self.assertNear(keep_prob, np.mean(updated & ~frozen), 0.05)
+
   @parameterized.parameters(
       (True, False, False),
       (False, True, False),
@@ -626,6 +714,122 @@ class LSTMTest(tf.test.TestCase, parameterized.TestCase):
     static_out, dynamic_out = self.evaluate([static_output, dynamic_output])
     self.assertAllClose(static_out, dynamic_out)
 
+  @parameterized.named_parameters(
+      ("Plain", {}, False),
+      ("Peepholes", {"use_peepholes": True}, False),
+      ("LayerNorm", {"use_layer_norm": True}, False),
+      ("Projection", {"projection_size": 2}, False),
+      ("Clipping", {"hidden_clip_value": 0.1, "cell_clip_value": 0.1}, False),
+      ("SequenceLength", {}, True),
+      ("LayerNormSequenceLength", {"use_layer_norm": True}, True))
+  def testUnrollSameAsDynamic(self, lstm_kwargs, use_sequence_length):
+    batch_size = 3
+    seq_len = 5
+    hidden_size = 4
+    input_size = 3
+
+    inputs = tf.constant(
+        np.random.randn(seq_len, batch_size, input_size).astype(np.float32))
+    sequence_length = None
+    if use_sequence_length:
+      sequence_length = tf.constant([5, 1, 3])
+
+    cell = snt.LSTM(hidden_size=hidden_size, **lstm_kwargs)
+    initial_state = cell.initial_state(batch_size, tf.float32)
+
+    dynamic_output, dynamic_state = tf.nn.dynamic_rnn(
+        cell, inputs, initial_state=initial_state,
+        sequence_length=sequence_length, time_major=True)
+    num_variables = len(cell.get_variables())
+    unrolled_output, unrolled_state = cell.unroll(
+        inputs, initial_state, sequence_length=sequence_length)
+
+    # The unrolled core reads the same variables rather than creating new ones.
+    self.assertEqual(len(cell.get_variables()), num_variables)
+    self.assertEqual(unrolled_output.get_shape().as_list(),
+                     dynamic_output.get_shape().as_list())
+
+    self.evaluate(tf.global_variables_initializer())
+    dynamic_out, unrolled_out = self.evaluate(
+        [(dynamic_output, dynamic_state), (unrolled_output, unrolled_state)])
+    self.assertAllClose(dynamic_out, unrolled_out, rtol=1e-5, atol=1e-5)
+
+  def testUnrollBeforeBuild(self):
+    batch_size = 2
+    hidden_size = 4
+    inputs = tf.ones(dtype=tf.float32, shape=[6, batch_size, 3])
+
+    cell = snt.LSTM(hidden_size=hidden_size, use_layer_norm=True)
+    initial_state = cell.initial_state(batch_size, tf.float32)
+    unrolled_output, _ = cell.unroll(inputs, initial_state)
+    self.assertTrue(cell.is_connected)
+    num_variables = len(cell.get_variables())
+
+    step_output, _ = cell(inputs[0], initial_state)
+    self.assertEqual(len(cell.get_variables()), num_variables)
+
+    self.evaluate(tf.global_variables_initializer())
+    unrolled_out, step_out = self.evaluate([unrolled_output, step_output])
+    self.assertAllClose(unrolled_out[0], step_out, rtol=1e-5, atol=1e-5)
+
+  @parameterized.named_parameters(
+      ("Plain", {}, True),
+      ("Clipping", {"hidden_clip_value": 0.5, "cell_clip_value": 0.5}, True),
+      ("Peepholes", {"use_peepholes": True}, False),
+      ("LayerNorm", {"use_layer_norm": True}, False),
+      ("Projection", {"projection_size": 2}, False))
+  def testFusedKernel(self, lstm_kwargs, expect_fused):
+    batch_size = 3
+    input_size = 2
+    hidden_size = 4
+
+    inputs = tf.constant(
+        np.random.randn(batch_size, input_size).astype(np.float32))
+    prev_state = snt.LSTMState(
+        hidden=tf.constant(np.random.randn(
+            batch_size, lstm_kwargs.get("projection_size", hidden_size)).astype(
+                np.float32)),
+        cell=tf.constant(
+            np.random.randn(batch_size, hidden_size).astype(np.float32)))
+
+    # Both cores share their variables through the custom getter, as they
+    # would when restoring one from a checkpoint written by the other.
+    unfused_lstm = snt.LSTM(hidden_size, name="unfused", **lstm_kwargs)
+    self.assertFalse(unfused_lstm.use_fused_kernel)
+    unfused_output, unfused_state = unfused_lstm(inputs, prev_state)
+    unfused_variables = {v.op.name.split("/", 1)[1]: v
+                         for v in unfused_lstm.get_all_variables()}
+
+    def share_variables(getter, name, *args, **kwargs):
+      del getter, args, kwargs  # Unused.
+      return unfused_variables[name.split("/", 1)[1]]
+    lstm = snt.LSTM(hidden_size, use_fused_kernel=True,
+                    custom_getter=share_variables, **lstm_kwargs)
+    self.assertTrue(lstm.use_fused_kernel)
+    output, state = lstm(inputs, prev_state)
+
+    fused_ops = [op for op in tf.get_default_graph().get_operations()
+                 if op.type == "LSTMBlockCell"]
+    self.assertEqual(bool(fused_ops), expect_fused)
+
+    self.evaluate(tf.global_variables_initializer())
+    self.assertAllClose(self.evaluate((unfused_output, unfused_state)),
+                        self.evaluate((output, state)), rtol=1e-5, atol=1e-5)
+
+    unfused_grads = tf.gradients(tf.reduce_sum(unfused_output),
+                                 [inputs] + list(prev_state))
+    grads = tf.gradients(tf.reduce_sum(output), [inputs] + list(prev_state))
+    self.assertAllClose(self.evaluate(unfused_grads), self.evaluate(grads),
+                        rtol=1e-5, atol=1e-5)
+
+  def testUnrollInvalidInputs(self):
+    cell = snt.LSTM(hidden_size=4)
+    initial_state = cell.initial_state(2, tf.float32)
+    with self.assertRaisesRegexp(ValueError, "Rank of input_sequence"):
+      cell.unroll(tf.ones([2, 3]), initial_state)
+    with self.assertRaisesRegexp(ValueError, "statically known"):
+      cell.unroll(tf.placeholder(tf.float32, [5, 2, None]), initial_state)
+
   def testLayerNormVariables(self):
     core = snt.LSTM(hidden_size=3, use_layer_norm=True)
 
@@ -1148,7 +1352,7 @@ class ConvLSTMTest(tf.test.TestCase, parameterized.TestCase):
 
 
 # @tf.contrib.eager.run_all_tests_in_graph_and_eager_modes
-class GRUTest(tf.test.TestCase):
+class GRUTest(tf.test.TestCase, parameterized.TestCase):
 
   def testShape(self):
     batch_size = 2
@@ -1227,6 +1431,46 @@ class GRUTest(tf.test.TestCase):
 
     self.assertAllClose(state_real, state_ex)
 
+  @parameterized.named_parameters(("Float32", tf.float32, True),
+                                  ("Float64", tf.float64, False))
+  def testFusedKernel(self, dtype, expect_fused):
+    batch_size = 3
+    input_size = 2
+    hidden_size = 4
+
+    inputs = tf.constant(np.random.randn(batch_size, input_size), dtype=dtype)
+    state_in = tf.constant(np.random.randn(batch_size, hidden_size),
+                           dtype=dtype)
+
+    unfused_gru = snt.GRU(hidden_size, name="unfused")
+    self.assertFalse(unfused_gru.use_fused_kernel)
+    unfused_output, _ = unfused_gru(inputs, state_in)
+    unfused_variables = {v.op.name.split("/", 1)[1]: v
+                         for v in unfused_gru.get_all_variables()}
+
+    def share_variables(getter, name, *args, **kwargs):
+      del getter, args, kwargs  # Unused.
+      return unfused_variables[name.split("/", 1)[1]]
+    gru = snt.GRU(hidden_size, use_fused_kernel=True,
+                  custom_getter=share_variables)
+    self.assertTrue(gru.use_fused_kernel)
+    output, state = gru(inputs, state_in)
+    self.assertIs(output, state)
+
+    fused_ops = [op for op in tf.get_default_graph().get_operations()
+                 if op.type == "GRUBlockCell"]
+    self.assertEqual(bool(fused_ops), expect_fused)
+
+    self.evaluate(tf.global_variables_initializer())
+    self.assertAllClose(self.evaluate(unfused_output), self.evaluate(output),
+                        rtol=1e-5, atol=1e-5)
+
+    variables = [unfused_variables[key] for key in sorted(unfused_variables)]
+    unfused_grads = tf.gradients(tf.reduce_sum(unfused_output), variables)
+    grads = tf.gradients(tf.reduce_sum(output), variables)
+    self.assertAllClose(self.evaluate(unfused_grads), self.evaluate(grads),
+                        rtol=1e-5, atol=1e-5)
+
   def testInitializers(self):
     batch_size = 2
     hidden_size = 4
@@ -1443,5 +1687,40 @@ class LSTMBlockCellTest(tf.test.TestCase, parameterized.TestCase):
                           tf.convert_to_tensor(param_map["kernel"]))
 
 
+class FusedKernelBenchmark(tf.test.Benchmark):
+  """Step latency of `snt.LSTM` and `snt.GRU` with and without fused kernels.
+
+  Run with `--benchmarks=FusedKernelBenchmark`.
+  """
+
+  def _benchmark_step(self, core_ctor, name, batch_size=32, input_size=128,
+                      hidden_size=512, num_steps=100):
+    for use_fused_kernel in (False, True):
+      with tf.Graph().as_default():
+        core = core_ctor(hidden_size, use_fused_kernel=use_fused_kernel)
+        inputs = tf.random_normal([num_steps, batch_size, input_size])
+        outputs, _ = tf.nn.dynamic_rnn(
+            core, inputs, initial_state=core.initial_state(batch_size),
+            time_major=True)
+        train_op = tf.gradients(tf.reduce_sum(outputs), core.get_variables())
+        with tf.Session() as sess:
+          sess.run(tf.global_variables_initializer())
+          for op, pass_name in ((outputs, "forward"),
+                                (train_op, "forward_backward")):
+            results = self.run_op_benchmark(
+                sess, op, min_iters=20, store_memory_usage=False,
+                name="{}_{}_{}".format(
+                    name, "fused" if use_fused_kernel else "unfused",
+                    pass_name))
+            tf.logging.info("%s: %.3f ms per step", results["name"],
+                            1000 * results["wall_time"] / num_steps)
+
+  def benchmarkLSTMStep(self):
+    self._benchmark_step(snt.LSTM, "lstm")
+
+  def benchmarkGRUStep(self):
+    self._benchmark_step(snt.GRU, "gru")
+
+
 if __name__ == "__main__":
   tf.test.main()
@@ -0,0 +1,301 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+
+"""Accounting of the memory taken by the variables of a model.
+
+Unlike `snt.summarize_variables`, which logs totals per dtype, this returns
+the memory taken by each variable, module, device and dtype as data, with the
+optimizer slot variables attributed to their primary variable and partitioned
+variables grouped under their full name. For example, to size parameter
+server shards:
+
+```python
+train_op = optimizer.minimize(model.loss)
+footprint = snt.get_memory_footprint(optimizers=[optimizer], modules=[model])
+print(footprint.report(by="device"))
+for device, usage in footprint.device_usage.items():
+  ...
+```
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+
+# Dependency imports
+from sonnet.python.modules import util
+import tensorflow as tf
+
+
+_USAGE_FIELDS = ("variables", "scalars", "bytes", "slot_variables",
+                 "slot_scalars", "slot_bytes")
+
+_BREAKDOWNS = ("variable", "module", "device", "dtype")
+
+_REPORT_COLUMNS = (
+    ("variables", "Vars", "{:d}"),
+    ("scalars", "Scalars", "{:d}"),
+    ("bytes", "Bytes", "{:d}"),
+    ("slot_variables", "Slot vars", "{:d}"),
+    ("slot_bytes", "Slot bytes", "{:d}"),
+    ("total_bytes", "Total bytes", "{:d}"),
+)
+
+
+class MemoryUsage(object):
+  """Memory taken by a set of variables and their optimizer slots.
+
+  Attributes:
+    variables: Number of variables, each partition of a partitioned variable
+      counting as one.
+    scalars: Number of scalars in the variables, for those whose shape is
+      fully defined.
+    bytes: Size in bytes of the variables, for those whose shape is fully
+      defined. Only the pointers of `tf.string` variables are counted.
+    slot_variables: Number of optimizer slot variables of the variables.
+    slot_scalars: Number of scalars in the slot variables.
+    slot_bytes: Size in bytes of the slot variables.
+  """
+
+  __slots__ = _USAGE_FIELDS
+
+  def __init__(self):
+    for field in _USAGE_FIELDS:
+      setattr(self, field, 0)
+
+  @property
+  def total_bytes(self):
+    """Size in bytes of the variables and of their slot variables."""
+    return self.bytes + self.slot_bytes
+
+  def add(self, other):
+    for field in _USAGE_FIELDS:
+      setattr(self, field, getattr(self, field) + getattr(other, field))
+
+  def to_dict(self):
+    return collections.OrderedDict(
+        (field, getattr(self, field)) for field in _USAGE_FIELDS)
+
+
+MemoryUsageChange = collections.namedtuple(
+    "MemoryUsageChange", ("name", "before", "after", "bytes_change"))
+
+
+def _num_scalars(variable):
+  shape = variable.get_shape()
+  if not shape.is_fully_defined():
+    return 0
+  return shape.num_elements()
+
+
+def _memory_usage(variable, is_slot):
+  """Returns the `MemoryUsage` of a single variable or slot variable."""
+  usage = MemoryUsage()
+  prefix = "slot_" if is_slot else ""
+  num_scalars = _num_scalars(variable)
+  setattr(usage, prefix + "variables", 1)
+  setattr(usage, prefix + "scalars", num_scalars)
+  setattr(usage, prefix + "bytes", num_scalars * variable.dtype.base_dtype.size)
+  return usage
+
+
+def _full_name(variable):
+  """Returns the name of a variable, or of the variable it is a partition of."""
+  # pylint: disable=protected-access
+  if variable._save_slice_info:
+    return variable._save_slice_info.full_name
+  # pylint: enable=protected-access
+  return variable.op.name
+
+
+class MemoryFootprint(object):
+  """Memory taken by variables, broken down by variable, module, device, dtype.
+
+  See `get_memory_footprint`.
+  """
+
+  def __init__(self):
+    self._usage = {breakdown: collections.OrderedDict()
+                   for breakdown in _BREAKDOWNS}
+    self._total = MemoryUsage()
+
+  @property
+  def variable_usage(self):
+    """Dict from variable name to `MemoryUsage`.
+
+    Partitioned variables are grouped under their full name.
+    """
+    return self._usage["variable"]
+
+  @property
+  def module_usage(self):
+    """Dict from module scope name to `MemoryUsage`.
+
+    The usage of a module includes the variables of the modules nested in it.
+    """
+    return self._usage["module"]
+
+  @property
+  def device_usage(self):
+    """Dict from device to `MemoryUsage`, with "" for unplaced variables."""
+    return self._usage["device"]
+
+  @property
+  def dtype_usage(self):
+    """Dict from dtype name, e.g. "float32", to `MemoryUsage`."""
+    return self._usage["dtype"]
+
+  @property
+  def total(self):
+    """`MemoryUsage` of all the variables."""
+    return self._total
+
+  def _add(self, breakdown, name, usage):
+    self._usage[breakdown].setdefault(name, MemoryUsage()).add(usage)
+
+  def _add_variable(self, variable, slots, modules):
+    """Adds a primary variable and its slot variables.
+
+    Args:
+      variable: The primary variable, possibly a partition.
+      slots: List of the slot variables of `variable`.
+      modules: List of the scope names of the modules `variable` belongs to.
+    """
+    name = _full_name(variable)
+    dtype = variable.dtype.base_dtype.name
+    for var, is_slot in [(variable, False)] + [(slot, True) for slot in slots]:
+      usage = _memory_usage(var, is_slot)
+      self._add("variable", name, usage)
+      self._add("device", var.device, usage)
+      self._add("dtype", dtype, usage)
+      for module_key in modules:
+        self._add("module", module_key, usage)
+      self._total.add(usage)
+
+  def _get_usage(self, by):
+    if by not in _BREAKDOWNS:
+      raise ValueError("by must be one of {}, not {!r}.".format(
+          _BREAKDOWNS, by))
+    return self._usage[by]
+
+  def report(self, by="variable", sort_by="total_bytes", max_rows=None):
+    """Returns a table of the memory usage as a string.
+
+    Args:
+      by: One of "variable", "module", "device" or "dtype", the breakdown of
+        the memory usage to report.
+      sort_by: Name of the `MemoryUsage` attribute by which to sort the rows
+        in decreasing order.
+      max_rows: Optional maximum number of rows to include.
+
+    Returns:
+      The report, as a string, with the total in the last row.
+
+    Raises:
+      ValueError: If `by` or `sort_by` is invalid.
+    """
+    usage = self._get_usage(by)
+    if sort_by not in _USAGE_FIELDS + ("total_bytes",):
+      raise ValueError("sort_by must be one of {}, not {!r}.".format(
+          _USAGE_FIELDS + ("total_bytes",), sort_by))
+    return util.format_stats_table(
+        by.capitalize(), usage, _REPORT_COLUMNS, sort_by, max_rows=max_rows,
+        total=("Total", self._total))
+
+  def compare(self, other, by="variable"):
+    """Compares the memory usage of this footprint with another one.
+
+    Args:
+      other: The `MemoryFootprint` to compare with, e.g. of a new version of
+        the model.
+      by: One of "variable", "module", "device" or "dtype", the breakdown of
+        the memory usage to compare.
+
+    Returns:
+      A list of `MemoryUsageChange`s, one per name whose usage differs between
+      the footprints, with the `MemoryUsage` in this footprint as `before` and
+      in `other` as `after`, an empty `MemoryUsage` if absent. They are sorted
+      by decreasing absolute change of total bytes.
+
+    Raises:
+      ValueError: If `by` is invalid.
+    """
+    before_usage = self._get_usage(by)
+    after_usage = other._get_usage(by)  # pylint: disable=protected-access
+    names = list(before_usage)
+    names += [name for name in after_usage if name not in before_usage]
+    changes = []
+    for name in names:
+      before = before_usage.get(name, MemoryUsage())
+      after = after_usage.get(name, MemoryUsage())
+      if before.to_dict() != after.to_dict():
+        changes.append(MemoryUsageChange(
+            name=name, before=before, after=after,
+            bytes_change=after.total_bytes - before.total_bytes))
+    changes.sort(key=lambda change: abs(change.bytes_change), reverse=True)
+    return changes
+
+
+def get_memory_footprint(variables=None, optimizers=(), modules=()):
+  """Returns the memory taken by variables and their optimizer slots.
+
+  The slot variables of the `optimizers`, e.g. the moments of `tf.train.Adam`,
+  are attributed to their primary variable, and are not counted on their own
+  when also in `variables`. Non-slot optimizer variables, such as the powers
+  of the betas of `tf.train.Adam`, are counted as any other variable.
+
+  Args:
+    variables: Iterable of variables, or None for all the global and local
+      variables of the default graph.
+    optimizers: Iterable of `tf.train.Optimizer`s, whose slot variables are
+      attributed to their primary variable. Slot variables are only created
+      when the optimizer is applied, e.g. by `minimize`.
+    modules: Iterable of Sonnet modules by which to break down the memory
+      usage, each including the global variables returned by its
+      `get_all_variables`.
+
+  Returns:
+    A `MemoryFootprint`.
+  """
+  if variables is None:
+    variables = tf.global_variables() + tf.local_variables()
+  variables = list(variables)
+
+  slots = collections.defaultdict(list)
+  slot_variables = set()
+  for optimizer in optimizers:
+    slot_names = optimizer.get_slot_names()
+    for variable in variables:
+      for slot_name in slot_names:
+        slot = optimizer.get_slot(variable, slot_name)
+        if slot is not None:
+          slots[variable].append(slot)
+          slot_variables.add(slot)
+
+  variable_modules = collections.defaultdict(list)
+  for module in modules:
+    for variable in module.get_all_variables(tf.GraphKeys.GLOBAL_VARIABLES):
+      variable_modules[variable].append(module.scope_name)
+
+  footprint = MemoryFootprint()
+  for variable in util.sort_by_name(variables):
+    if variable not in slot_variables:
+      # pylint: disable=protected-access
+      footprint._add_variable(
+          variable, slots[variable], variable_modules[variable])
+      # pylint: enable=protected-access
+  return footprint
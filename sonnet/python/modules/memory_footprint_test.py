@@ -0,0 +1,140 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+
+"""Tests for sonnet.python.modules.memory_footprint."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Dependency imports
+import sonnet as snt
+import tensorflow as tf
+
+
+_PS_0 = "/job:ps/task:0"
+_PS_1 = "/job:ps/task:1"
+
+
+class MemoryFootprintTest(tf.test.TestCase):
+
+  def _build_model(self, output_size=6):
+    """Trains a Linear with a partitioned weight, placed on two ps tasks."""
+    with tf.device(tf.train.replica_device_setter(ps_tasks=2)):
+      self.linear = snt.Linear(
+          output_size, partitioners={"w": tf.fixed_size_partitioner(2)})
+      outputs = self.linear(tf.zeros([3, 4]))
+      self.optimizer = tf.train.AdamOptimizer()
+      self.optimizer.minimize(tf.reduce_sum(outputs))
+
+  def testVariableUsage(self):
+    self._build_model()
+    footprint = snt.get_memory_footprint(optimizers=[self.optimizer],
+                                         modules=[self.linear])
+
+    # The slots are attributed to their primary variable, the partitions of
+    # `w` are grouped.
+    self.assertEqual({"beta1_power", "beta2_power", "linear/b", "linear/w"},
+                     set(footprint.variable_usage))
+    w = footprint.variable_usage["linear/w"]
+    self.assertEqual(2, w.variables)
+    self.assertEqual(4 * 6, w.scalars)
+    self.assertEqual(4 * 4 * 6, w.bytes)
+    self.assertEqual(2 * 2, w.slot_variables)
+    self.assertEqual(2 * 4 * 6, w.slot_scalars)
+    self.assertEqual(2 * w.bytes, w.slot_bytes)
+    self.assertEqual(3 * w.bytes, w.total_bytes)
+    b = footprint.variable_usage["linear/b"]
+    self.assertEqual(1, b.variables)
+    self.assertEqual(4 * 6, b.bytes)
+    self.assertEqual(2, b.slot_variables)
+    beta1_power = footprint.variable_usage["beta1_power"]
+    self.assertEqual(4, beta1_power.bytes)
+    self.assertEqual(0, beta1_power.slot_variables)
+
+    self.assertEqual(w.total_bytes + b.total_bytes + 2 * 4,
+                     footprint.total.total_bytes)
+    self.assertEqual(footprint.total.to_dict(),
+                     footprint.dtype_usage["float32"].to_dict())
+
+  def testModuleAndDeviceUsage(self):
+    self._build_model()
+    footprint = snt.get_memory_footprint(optimizers=[self.optimizer],
+                                         modules=[self.linear])
+
+    module_usage = footprint.module_usage[self.linear.scope_name]
+    self.assertEqual(3, module_usage.variables)
+    self.assertEqual(
+        footprint.variable_usage["linear/w"].total_bytes +
+        footprint.variable_usage["linear/b"].total_bytes,
+        module_usage.total_bytes)
+
+    self.assertEqual({_PS_0, _PS_1}, set(footprint.device_usage))
+    # One partition of `w` and its two slots are on the second task.
+    ps_1 = footprint.device_usage[_PS_1]
+    self.assertEqual(1, ps_1.variables)
+    self.assertEqual(2, ps_1.slot_variables)
+    self.assertEqual(footprint.total.total_bytes,
+                     sum(usage.total_bytes
+                         for usage in footprint.device_usage.values()))
+
+  def testWithoutOptimizers(self):
+    self._build_model()
+    footprint = snt.get_memory_footprint()
+    self.assertIn("linear/w/Adam", footprint.variable_usage)
+    self.assertEqual(0, footprint.total.slot_variables)
+
+  def testCompare(self):
+    with tf.Graph().as_default():
+      self._build_model(output_size=6)
+      before = snt.get_memory_footprint(optimizers=[self.optimizer])
+    with tf.Graph().as_default():
+      self._build_model(output_size=8)
+      after = snt.get_memory_footprint(optimizers=[self.optimizer])
+
+    changes = before.compare(after)
+    self.assertEqual(["linear/w", "linear/b"],
+                     [change.name for change in changes])
+    self.assertEqual(3 * 4 * 4 * 2, changes[0].bytes_change)
+    self.assertEqual(3 * 4 * 2, changes[1].bytes_change)
+    self.assertEqual(6, changes[1].before.scalars)
+    self.assertEqual(8, changes[1].after.scalars)
+    self.assertEqual([], before.compare(before, by="device"))
+
+    with self.assertRaisesRegexp(ValueError, "by must be"):
+      before.compare(after, by="op")
+
+  def testReport(self):
+    self._build_model()
+    footprint = snt.get_memory_footprint(optimizers=[self.optimizer])
+
+    lines = footprint.report().splitlines()
+    self.assertTrue(lines[0].startswith("Variable"))
+    self.assertEqual(["linear/w", "linear/b"],
+                     [line.split()[0] for line in lines[2:4]])
+    self.assertTrue(lines[-1].startswith("Total"))
+
+    lines = footprint.report(by="device", max_rows=1).splitlines()
+    self.assertTrue(lines[0].startswith("Device"))
+    self.assertEqual(5, len(lines))
+
+    with self.assertRaisesRegexp(ValueError, "by must be"):
+      footprint.report(by="op")
+    with self.assertRaisesRegexp(ValueError, "sort_by must be"):
+      footprint.report(sort_by="flops")
+
+
+if __name__ == "__main__":
+  tf.test.main()
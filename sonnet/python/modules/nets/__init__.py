@@ -19,14 +19,21 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-from sonnet.python.modules.nets.alexnet import AlexNet
-from sonnet.python.modules.nets.alexnet import AlexNetFull
-from sonnet.python.modules.nets.alexnet import AlexNetMini
-from sonnet.python.modules.nets.convnet import ConvNet2D
-from sonnet.python.modules.nets.convnet import ConvNet2DTranspose
-from sonnet.python.modules.nets.dilation import Dilation
-from sonnet.python.modules.nets.dilation import identity_kernel_initializer
-from sonnet.python.modules.nets.dilation import noisy_identity_kernel_initializer
-from sonnet.python.modules.nets.mlp import MLP
-from sonnet.python.modules.nets.vqvae import VectorQuantizer
-from sonnet.python.modules.nets.vqvae import VectorQuantizerEMA
+# Dependency imports
+from sonnet.python import lazy_loader
+
+
+# Must be the last statement, as it replaces this module.
+lazy_loader.install(__name__, [
+    ("sonnet.python.modules.nets.alexnet", "AlexNet"),
+    ("sonnet.python.modules.nets.alexnet", "AlexNetFull"),
+    ("sonnet.python.modules.nets.alexnet", "AlexNetMini"),
+    ("sonnet.python.modules.nets.convnet", "ConvNet2D"),
+    ("sonnet.python.modules.nets.convnet", "ConvNet2DTranspose"),
+    ("sonnet.python.modules.nets.dilation", "Dilation"),
+    ("sonnet.python.modules.nets.dilation", "identity_kernel_initializer"),
+    ("sonnet.python.modules.nets.dilation", "noisy_identity_kernel_initializer"),
+    ("sonnet.python.modules.nets.mlp", "MLP"),
+    ("sonnet.python.modules.nets.vqvae", "VectorQuantizer"),
+    ("sonnet.python.modules.nets.vqvae", "VectorQuantizerEMA"),
+])
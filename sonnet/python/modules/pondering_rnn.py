@@ -44,6 +44,18 @@ def _nested_zeros_like(nested_a):
   return nest.map(tf.zeros_like, nested_a)
 
 
+def _nested_gather(nested_a, indices):
+  """Gathers the rows `indices` of each `Tensor` in `nested_a`."""
+  return nest.map(lambda a: tf.gather(a, indices), nested_a)
+
+
+def _nested_scatter_add(nested_a, indices, nested_updates):
+  """Adds `nested_updates` to the rows `indices` of `nested_a`."""
+  def scatter_add(a, update):
+    return a + tf.scatter_nd(tf.expand_dims(indices, 1), update, tf.shape(a))
+  return nest.map(scatter_add, nested_a, nested_updates)
+
+
 class ACTCore(rnn_core.RNNCore):
   """Adaptive computation time core.
 
@@ -61,10 +73,17 @@ class ACTCore(rnn_core.RNNCore):
     * `remainder` is the remainder as defined in the ACT paper;
     * `act_out` is the weighted average output of all pondering steps (see ACT
     paper for more info).
+
+  By default every element of the batch keeps running the `core` until the
+  slowest one halts, with the contributions of the halted ones masked out. If
+  `compact_halted` is `True`, halted elements are instead dropped from the
+  batch fed to the `core` at every pondering step, so the cost of the
+  pondering loop follows the mean number of pondering steps in the batch
+  rather than the maximum. Both modes compute the same outputs and state.
   """
 
   def __init__(self, core, output_size, threshold, get_state_for_halting,
-               name="act_core"):
+               compact_halted=False, name="act_core"):
     """Constructor.
 
     Args:
@@ -75,6 +94,8 @@ class ACTCore(rnn_core.RNNCore):
           pondering.
       get_state_for_halting: A callable that can take the `core` state and
           return the input to the halting function.
+      compact_halted: Boolean. If `True`, only the elements of the batch that
+          have not halted yet are passed to the `core` at each pondering step.
       name: A string. The name of this module.
 
     Raises:
@@ -87,6 +108,7 @@ class ACTCore(rnn_core.RNNCore):
     self._output_size = output_size
     self._threshold = threshold
     self._get_state_for_halting = get_state_for_halting
+    self._compact_halted = compact_halted
 
     if not isinstance(self._core.output_size, tf.TensorShape):
       raise ValueError("Output of core should be single Tensor.")
@@ -109,6 +131,10 @@ class ACTCore(rnn_core.RNNCore):
   def state_size(self):
     return self._core.state_size
 
+  @property
+  def compact_halted(self):
+    return self._compact_halted
+
   @property
   def batch_size(self):
     self._ensure_is_connected()
@@ -150,6 +176,75 @@ class ACTCore(rnn_core.RNNCore):
     return (x_ones, next_cumul_out, next_state, next_cumul_state,
             next_cumul_halting, next_iteration, next_remainder)
 
+  def _compacting_cond(self, unused_x, active_rows, *unused_args):
+    """The `cond` of the `tf.while_loop` when compacting halted elements."""
+    return tf.size(active_rows) > 0
+
+  def _compacting_body(self, x, active_rows, prev_state, cumul_out,
+                       cumul_state, cumul_halting, iteration, remainder,
+                       halting_linear, x_ones):
+    """The `body` of `tf.while_loop` when compacting halted elements.
+
+    `x` and `prev_state` only contain the rows `active_rows` of the batch, all
+    of which are still running. The accumulators have the full batch size and
+    are only updated for the active rows.
+
+    Args:
+      x: Input of the `core` for the active rows.
+      active_rows: int32 `Tensor` with the indices of the active rows.
+      prev_state: State of the `core` for the active rows.
+      cumul_out: Weighted sum of the `core` outputs.
+      cumul_state: Weighted sum of the `core` states.
+      cumul_halting: Cumulative halting probability.
+      iteration: Number of pondering steps.
+      remainder: The ACT remainder.
+      halting_linear: Module computing the halting logits.
+      x_ones: Input of the `core` after the first step, for the full batch.
+
+    Returns:
+      The next loop variables.
+    """
+    out, next_state = self._core(x, prev_state)
+    halting_input = halting_linear(self._get_state_for_halting(next_state))
+    halting = tf.sigmoid(halting_input, name="halting")
+
+    active_cumul_halting = tf.gather(cumul_halting, active_rows)
+    next_cumul_halting_raw = active_cumul_halting + halting
+    over_threshold = next_cumul_halting_raw > self._threshold
+    next_active_cumul_halting = tf.where(
+        over_threshold, tf.ones_like(next_cumul_halting_raw),
+        next_cumul_halting_raw)
+    next_active_remainder = tf.where(
+        over_threshold, tf.gather(remainder, active_rows),
+        1 - next_cumul_halting_raw)
+    p = next_active_cumul_halting - active_cumul_halting
+
+    next_cumul_out = _nested_scatter_add(cumul_out, active_rows, p * out)
+    next_cumul_state = _nested_scatter_add(
+        cumul_state, active_rows, _nested_unary_mul(next_state, p))
+    # `tf.dynamic_stitch` gives precedence to the later indices, so this
+    # overwrites the rows `active_rows` with the updated values.
+    all_rows = tf.range(self._batch_size)
+    next_cumul_halting = tf.dynamic_stitch(
+        [all_rows, active_rows], [cumul_halting, next_active_cumul_halting])
+    next_remainder = tf.dynamic_stitch(
+        [all_rows, active_rows], [remainder, next_active_remainder])
+    next_iteration = tf.dynamic_stitch(
+        [all_rows, active_rows],
+        [iteration, tf.gather(iteration, active_rows) + 1])
+    for t in (next_cumul_halting, next_remainder, next_iteration):
+      t.set_shape(cumul_halting.get_shape())
+
+    still_running = tf.squeeze(tf.where(next_active_cumul_halting[:, 0] < 1),
+                               axis=1)
+    next_active_rows = tf.gather(active_rows, still_running)
+    next_x = tf.gather(x_ones, next_active_rows)
+    next_state = _nested_gather(next_state, still_running)
+
+    return (next_x, next_active_rows, next_state, next_cumul_out,
+            next_cumul_state, next_cumul_halting, next_iteration,
+            next_remainder)
+
   def _build(self, x, prev_state):
     """Connects the core to the graph.
 
@@ -187,6 +282,16 @@ class ACTCore(rnn_core.RNNCore):
                         dtype=self._dtype)
     cumul_state_init = _nested_zeros_like(prev_state)
     remainder_init = tf.zeros(shape=(self._batch_size, 1), dtype=self._dtype)
+    if self._compact_halted:
+      (final_out, final_cumul_state, final_iteration,
+       final_remainder) = self._compacting_loop(
+           x_zeros, x_ones, prev_state, out_init, cumul_state_init,
+           cumul_halting_init, iteration_init, remainder_init, halting_linear)
+      act_output = basic.Linear(
+          name="act_output_linear", output_size=self._output_size)(final_out)
+      return ((act_output, (final_iteration, final_remainder)),
+              final_cumul_state)
+
     (unused_final_x, final_out, unused_final_state, final_cumul_state,
      unused_final_halting, final_iteration, final_remainder) = tf.while_loop(
          self._cond, body, [x_zeros, out_init, prev_state, cumul_state_init,
@@ -196,3 +301,30 @@ class ACTCore(rnn_core.RNNCore):
         name="act_output_linear", output_size=self._output_size)(final_out)
 
     return (act_output, (final_iteration, final_remainder)), final_cumul_state
+
+  def _compacting_loop(self, x_zeros, x_ones, prev_state, out_init,
+                       cumul_state_init, cumul_halting_init, iteration_init,
+                       remainder_init, halting_linear):
+    """Runs the pondering loop, dropping halted elements from the batch."""
+    body = functools.partial(
+        self._compacting_body, halting_linear=halting_linear, x_ones=x_ones)
+    active_rows_init = tf.range(self._batch_size)
+
+    def unknown_batch(t):
+      return tf.TensorShape([None]).concatenate(t.get_shape()[1:])
+
+    loop_vars = (x_zeros, active_rows_init, prev_state, out_init,
+                 cumul_state_init, cumul_halting_init, iteration_init,
+                 remainder_init)
+    # Only the inputs and state of the active rows change size.
+    shape_invariants = (
+        (unknown_batch(x_zeros), tf.TensorShape([None]),
+         nest.map(unknown_batch, prev_state)) +
+        nest.map(lambda t: t.get_shape(), loop_vars[3:]))
+
+    (unused_final_x, unused_final_active_rows, unused_final_state, final_out,
+     final_cumul_state, unused_final_halting, final_iteration,
+     final_remainder) = tf.while_loop(
+         self._compacting_cond, body, loop_vars,
+         shape_invariants=shape_invariants)
+    return final_out, final_cumul_state, final_iteration, final_remainder
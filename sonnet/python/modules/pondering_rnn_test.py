@@ -22,6 +22,7 @@ from __future__ import print_function
 # Dependency imports
 from absl.testing import parameterized
 import numpy as np
+from sonnet.python.modules import basic
 from sonnet.python.modules import basic_rnn
 from sonnet.python.modules import gated_rnn
 from sonnet.python.modules import pondering_rnn
@@ -157,6 +158,44 @@ class ACTCoreTest(tf.test.TestCase, parameterized.TestCase):
     self._testACT(input_size, hidden_size, output_size, seq_len, batch_size,
                   vanilla, get_state)
 
+  @parameterized.parameters(("lstm", 1), ("lstm", 7), ("vanilla", 7))
+  def testCompactHalted(self, core_type, batch_size):
+    """Tests that compacting halted elements does not change the results."""
+    input_size, hidden_size, output_size, seq_len = 3, 5, 4, 3
+    if core_type == "lstm":
+      core = gated_rnn.LSTM(hidden_size)
+      get_state_for_halting = lambda state: state.hidden
+    else:
+      core = basic_rnn.VanillaRNN(hidden_size)
+      get_state_for_halting = lambda state: state
+    seq_input = tf.random_uniform(shape=(seq_len, batch_size, input_size))
+    initial_state = core.initial_state(batch_size)
+
+    results = []
+    for compact_halted in (False, True):
+      act = pondering_rnn.ACTCore(
+          core, output_size, 0.9, get_state_for_halting,
+          compact_halted=compact_halted)
+      self.assertEqual(compact_halted, act.compact_halted)
+      seq_output = tf.nn.dynamic_rnn(
+          act, seq_input, time_major=True, initial_state=initial_state)
+      loss = sum(tf.reduce_sum(t) for t in nest.flatten(seq_output))
+      grads = tf.gradients(loss, [seq_input] + list(core.get_variables()))
+      results.append((act, seq_output, grads))
+
+    (act, seq_output, grads), (compact_act, compact_seq_output,
+                               compact_grads) = results
+    self.evaluate(tf.global_variables_initializer())
+    # Share the ACT weights between the two cores.
+    self.evaluate([tf.assign(compact_var, var) for var, compact_var in zip(
+        act.get_variables(), compact_act.get_variables())])
+
+    expected, actual = self.evaluate(
+        ((seq_output, grads), (compact_seq_output, compact_grads)))
+    for expected_value, actual_value in zip(nest.flatten(expected),
+                                            nest.flatten(actual)):
+      self.assertAllClose(expected_value, actual_value, atol=1e-5)
+
   def testOutputTuple(self):
     core = OutputTupleCore(name="output_tuple_core")
     err = "Output of core should be single Tensor."
@@ -170,5 +209,72 @@ class ACTCoreTest(tf.test.TestCase, parameterized.TestCase):
       pondering_rnn.ACTCore(core, 1, 0.99, lambda state: state)
 
 
+class DifficultyCore(rnn_core.RNNCore):
+  """Core whose state carries a fixed per-element difficulty for halting."""
+
+  def __init__(self, hidden_size, name="difficulty_core"):
+    super(DifficultyCore, self).__init__(name=name)
+    self._hidden_size = hidden_size
+
+  @property
+  def output_size(self):
+    return tf.TensorShape([self._hidden_size])
+
+  @property
+  def state_size(self):
+    return tf.TensorShape([self._hidden_size]), tf.TensorShape([1])
+
+  def _build(self, inputs, prev_state):
+    prev_hidden, difficulty = prev_state
+    hidden = tf.tanh(basic.Linear(self._hidden_size)(
+        tf.concat([inputs, prev_hidden], 1)))
+    return hidden, (hidden, difficulty)
+
+
+class ACTCoreBenchmark(tf.test.Benchmark):
+  """Benchmarks the ponder loop on a skewed halting distribution."""
+
+  def _benchmark_act(self, compact_halted, batch_size=128, hidden_size=512,
+                     num_slow=4, slow_difficulty=4.):
+    """Most elements halt after one step, `num_slow` ponder for ~55 steps."""
+    with tf.Graph().as_default():
+      core = DifficultyCore(hidden_size)
+      act = pondering_rnn.ACTCore(
+          core, hidden_size, 0.99, lambda state: state[1],
+          compact_halted=compact_halted)
+      inputs = tf.random_normal([batch_size, hidden_size])
+      difficulty = np.full([batch_size, 1], -5., dtype=np.float32)
+      difficulty[:num_slow] = slow_difficulty
+      initial_state = (tf.zeros([batch_size, hidden_size]),
+                       tf.constant(difficulty))
+      (output, (iteration, _)), _ = act(inputs, initial_state)
+      grads = tf.gradients(output, core.get_variables())
+
+      # Halting probability is sigmoid(-difficulty).
+      halting_linear = [v for v in act.get_variables()
+                        if "halting_linear" in v.name]
+      set_halting_weights = [
+          tf.assign(v, tf.zeros_like(v) - (1. if "w:" in v.name else 0.))
+          for v in halting_linear]
+
+      with tf.Session() as sess:
+        sess.run(tf.global_variables_initializer())
+        sess.run(set_halting_weights)
+        iterations = sess.run(iteration)
+        name = "act_{}".format("compact" if compact_halted else "masked")
+        for mode, op in (("forward", output.op),
+                         ("forward_backward", tf.group(*grads))):
+          self.run_op_benchmark(
+              sess, op, min_iters=10, name="{}_{}".format(name, mode),
+              extras={"mean_iterations": float(np.mean(iterations)),
+                      "max_iterations": float(np.max(iterations))})
+
+  def benchmarkACTMasked(self):
+    self._benchmark_act(compact_halted=False)
+
+  def benchmarkACTCompact(self):
+    self._benchmark_act(compact_halted=True)
+
+
 if __name__ == "__main__":
   tf.test.main()
@@ -27,15 +27,99 @@ from sonnet.python.modules import basic
 from sonnet.python.modules import layer_norm
 from sonnet.python.modules import rnn_core
 from sonnet.python.modules.nets import mlp
+import six
 import tensorflow as tf
 
 
+def _chunked_attention(q, k, v, chunk_size):
+  """Computes softmax attention, processing the keys in chunks.
+
+  The softmax normalizer is accumulated across the chunks of keys, so at most
+  `[B, N, H, chunk_size]` attention weights exist at any time, both in the
+  forward pass and in the backward pass, which recomputes the weights of each
+  chunk from the saved log normalizer rather than keeping them alive. Each
+  chunk has a control dependency on the results of the previous one, so that
+  the chunks are computed one after the other rather than all at once.
+
+  Args:
+    q: Queries of shape `[B, N, H, K]`.
+    k: Keys of shape `[B, M, H, K]`, with `M` statically known.
+    v: Values of shape `[B, M, H, V]`.
+    chunk_size: Number of keys to process at a time.
+
+  Returns:
+    The attention output of shape `[B, N, H, V]`.
+  """
+  num_keys = k.get_shape()[1].value
+  starts = six.moves.range(0, num_keys, chunk_size)
+
+  def split_chunks(t):
+    return [t[:, start:start + chunk_size] for start in starts]
+
+  @tf.custom_gradient
+  def attention(q, k, v):
+    """Forward pass with a running max and sum for the softmax."""
+    k_chunks, v_chunks = split_chunks(k), split_chunks(v)
+    running_max = running_sum = accumulator = None
+    previous_chunk = []
+    for i, (k_chunk, v_chunk) in enumerate(zip(k_chunks, v_chunks)):
+      with tf.name_scope('chunk_{}'.format(i)), \
+          tf.control_dependencies(previous_chunk):
+        logits = tf.einsum('bnhk,bmhk->bnhm', q, k_chunk)
+        chunk_max = tf.reduce_max(logits, axis=-1)
+        if running_max is None:
+          next_max = chunk_max
+        else:
+          next_max = tf.maximum(running_max, chunk_max)
+        weights = tf.exp(logits - tf.expand_dims(next_max, -1))
+        chunk_sum = tf.reduce_sum(weights, axis=-1)
+        chunk_output = tf.einsum('bnhm,bmhv->bnhv', weights, v_chunk)
+        if running_max is None:
+          running_sum = chunk_sum
+          accumulator = chunk_output
+        else:
+          correction = tf.exp(running_max - next_max)
+          running_sum = running_sum * correction + chunk_sum
+          accumulator = (accumulator * tf.expand_dims(correction, -1) +
+                         chunk_output)
+        running_max = next_max
+      previous_chunk = [running_sum, accumulator]
+
+    output = accumulator / tf.expand_dims(running_sum, -1)
+    log_normalizer = tf.expand_dims(running_max + tf.log(running_sum), -1)
+
+    def grad(d_output):
+      """Backward pass, recomputing the attention weights chunk by chunk."""
+      delta = tf.reduce_sum(d_output * output, axis=-1, keepdims=True)
+      d_q = tf.zeros_like(q)
+      d_k_chunks = []
+      d_v_chunks = []
+      previous_chunk = []
+      for i, (k_chunk, v_chunk) in enumerate(zip(k_chunks, v_chunks)):
+        with tf.name_scope('chunk_{}'.format(i)), \
+            tf.control_dependencies(previous_chunk):
+          logits = tf.einsum('bnhk,bmhk->bnhm', q, k_chunk)
+          weights = tf.exp(logits - log_normalizer)
+          d_v_chunks.append(tf.einsum('bnhm,bnhv->bmhv', weights, d_output))
+          d_weights = tf.einsum('bnhv,bmhv->bnhm', d_output, v_chunk)
+          d_logits = weights * (d_weights - delta)
+          d_q += tf.einsum('bnhm,bmhk->bnhk', d_logits, k_chunk)
+          d_k_chunks.append(tf.einsum('bnhm,bnhk->bmhk', d_logits, q))
+        previous_chunk = [d_q, d_k_chunks[-1], d_v_chunks[-1]]
+      return d_q, tf.concat(d_k_chunks, axis=1), tf.concat(d_v_chunks, axis=1)
+
+    return output, grad
+
+  return attention(q, k, v)
+
+
 class RelationalMemory(rnn_core.RNNCore):
   """Relational Memory Core."""
 
   def __init__(self, mem_slots, head_size, num_heads=1, num_blocks=1,
                forget_bias=1.0, input_bias=0.0, gate_style='unit',
-               attention_mlp_layers=2, key_size=None, name='relational_memory'):
+               attention_mlp_layers=2, key_size=None, attention_chunk_size=None,
+               name='relational_memory'):
     """Constructs a `RelationalMemory` object.
 
     Args:
@@ -55,12 +139,22 @@ class RelationalMemory(rnn_core.RNNCore):
         MLP. Defaults to 2.
       key_size: Size of vector to use for key & query vectors in the attention
         computation. Defaults to None, in which case we use `head_size`.
+      attention_chunk_size: Optional number of memory slots to attend over at
+        a time. If set, the attention is computed in chunks of keys with a
+        running softmax normalizer, so that at most
+        `[batch_size, mem_slots, num_heads, attention_chunk_size]` attention
+        weights are kept in memory, both in the forward and backward passes,
+        and the heads are split without transposing the projected memory.
+        This computes the same function with the same variables, and is
+        intended for large numbers of memory slots. Defaults to None, in
+        which case the full attention weights are computed at once.
       name: Name of the module.
 
     Raises:
       ValueError: gate_style not one of [None, 'memory', 'unit'].
       ValueError: num_blocks is < 1.
       ValueError: attention_mlp_layers is < 1.
+      ValueError: attention_chunk_size is < 1.
     """
     super(RelationalMemory, self).__init__(name=name)
 
@@ -89,6 +183,11 @@ class RelationalMemory(rnn_core.RNNCore):
 
     self._key_size = key_size if key_size else self._head_size
 
+    if attention_chunk_size is not None and attention_chunk_size < 1:
+      raise ValueError('attention_chunk_size must be >= 1. Got: {}.'.format(
+          attention_chunk_size))
+    self._attention_chunk_size = attention_chunk_size
+
   def initial_state(self, batch_size, trainable=False):
     """Creates the initial memory.
 
@@ -139,6 +238,15 @@ class RelationalMemory(rnn_core.RNNCore):
 
     mem_slots = memory.get_shape().as_list()[1]  # Denoted as N.
 
+    if self._attention_chunk_size is not None:
+      # [B, N, F] -> [B, N, H, F/H], keeping the heads in place.
+      qkv = tf.reshape(qkv, [-1, mem_slots, self._num_heads, qkv_size])
+      q, k, v = tf.split(qkv, [key_size, key_size, value_size], -1)
+      q *= key_size ** -0.5
+      output = _chunked_attention(q, k, v, self._attention_chunk_size)
+      # [B, N, H, V] -> [B, N, H * V]
+      return tf.reshape(output, [-1, mem_slots, self._num_heads * value_size])
+
     # [B, N, F] -> [B, N, H, F/H]
     qkv_reshape = basic.BatchReshape([mem_slots, self._num_heads,
                                       qkv_size])(qkv)
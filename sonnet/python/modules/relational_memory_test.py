@@ -19,6 +19,9 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
+import re
+
 # Dependency imports
 from absl.testing import parameterized
 import numpy as np
@@ -26,6 +29,19 @@ from sonnet.python.modules import relational_memory
 import tensorflow as tf
 
 
+def _ancestors(op):
+  """Returns the ops `op` depends on through data or control edges."""
+  visited = set()
+  stack = [op]
+  while stack:
+    current = stack.pop()
+    for parent in [t.op for t in current.inputs] + current.control_inputs:
+      if parent not in visited:
+        visited.add(parent)
+        stack.append(parent)
+  return visited
+
+
 class RelationalMemoryTest(parameterized.TestCase, tf.test.TestCase):
 
   def testStateSizeOutputSize(self):
@@ -111,6 +127,11 @@ class RelationalMemoryTest(parameterized.TestCase, tf.test.TestCase):
       relational_memory.RelationalMemory(mem_slots, head_size,
                                          gate_style="bad_gate")
 
+    with self.assertRaisesRegexp(ValueError,
+                                 "attention_chunk_size must be >= 1"):
+      relational_memory.RelationalMemory(mem_slots, head_size,
+                                         attention_chunk_size=0)
+
   @parameterized.named_parameters(
       ("GateStyleUnit", "unit"), ("GateStyleMemory", "memory")
   )
@@ -214,5 +235,92 @@ class RelationalMemoryTest(parameterized.TestCase, tf.test.TestCase):
     self.assertTrue(np.any(np.not_equal(results["memory_0"],
                                         results["memory_1"])))
 
+  @parameterized.named_parameters(
+      ("SingleSlotChunks", 1), ("UnevenChunks", 3), ("SingleChunk", 100)
+  )
+  def testChunkedAttention(self, attention_chunk_size):
+    """Checks chunked attention matches the full attention and gradients."""
+    mem_slots = 6
+    head_size = 4
+    num_heads = 2
+    batch_size = 3
+
+    inputs = tf.random_normal((batch_size, 2, 5))
+    mem = relational_memory.RelationalMemory(
+        mem_slots, head_size, num_heads, num_blocks=2, key_size=3)
+    chunked_mem = relational_memory.RelationalMemory(
+        mem_slots, head_size, num_heads, num_blocks=2, key_size=3,
+        attention_chunk_size=attention_chunk_size)
+
+    results = []
+    for module in (mem, chunked_mem):
+      initial_state = module.initial_state(batch_size)
+      output, next_memory = module(inputs, initial_state,
+                                   treat_input_as_matrix=True)
+      loss = tf.reduce_sum(tf.sin(output)) + tf.reduce_sum(next_memory ** 2)
+      grads = tf.gradients(loss, [inputs] + list(module.get_variables()))
+      results.append((output, next_memory, grads))
+
+    self.assertEqual([v.get_shape() for v in mem.get_variables()],
+                     [v.get_shape() for v in chunked_mem.get_variables()])
+    with self.test_session() as session:
+      tf.global_variables_initializer().run()
+      session.run([tf.assign(chunked_v, v) for v, chunked_v in zip(
+          mem.get_variables(), chunked_mem.get_variables())])
+      expected, actual = session.run(results)
+
+    for expected_value, actual_value in zip(tf.contrib.framework.nest.flatten(
+        expected), tf.contrib.framework.nest.flatten(actual)):
+      self.assertAllClose(expected_value, actual_value, atol=1e-5)
+
+  def testChunkedAttentionComputesChunksInOrder(self):
+    """Checks each chunk waits for the previous one, forward and backward."""
+    q = tf.random_normal([2, 5, 2, 3])
+    k = tf.random_normal([2, 5, 2, 3])
+    v = tf.random_normal([2, 5, 2, 4])
+    output = relational_memory._chunked_attention(q, k, v, chunk_size=2)
+    tf.gradients(output, [q, k, v])
+
+    # Ops by pass and chunk, e.g. `("gradients/.../", 1)`.
+    chunk_ops = collections.defaultdict(set)
+    for op in tf.get_default_graph().get_operations():
+      match = re.match(r"(.*)chunk_(\d+)/", op.name)
+      if match:
+        chunk_ops[match.group(1), int(match.group(2))].add(op)
+    self.assertEqual([("", 0), ("", 1), ("", 2)],
+                     sorted(key for key in chunk_ops if not key[0]))
+    self.assertLen(chunk_ops, 6)
+
+    for (prefix, index), ops in chunk_ops.items():
+      if index:
+        for op in ops:
+          self.assertTrue(_ancestors(op) & chunk_ops[prefix, index - 1],
+                          op.name)
+
+
+class ChunkedAttentionBenchmark(tf.test.Benchmark):
+  """Peak memory of the attention with and without chunks.
+
+  Run with `--benchmarks=ChunkedAttentionBenchmark`.
+  """
+
+  def benchmarkPeakMemory(self):
+    batch_size, mem_slots, num_heads, key_size = 8, 1024, 4, 64
+    for chunk_size in (None, 64):
+      with tf.Graph().as_default():
+        q, k, v = [tf.random_normal([batch_size, mem_slots, num_heads,
+                                     key_size]) for _ in range(3)]
+        if chunk_size is None:
+          weights = tf.nn.softmax(tf.einsum("bnhk,bmhk->bnhm", q, k))
+          output = tf.einsum("bnhm,bmhv->bnhv", weights, v)
+        else:
+          output = relational_memory._chunked_attention(q, k, v, chunk_size)
+        grads = tf.gradients(tf.reduce_sum(output), [q, k, v])
+        with tf.Session() as sess:
+          self.run_op_benchmark(
+              sess, grads, min_iters=5, store_memory_usage=True,
+              name="attention_chunk_size_{}".format(chunk_size or "none"))
+
+
 if __name__ == "__main__":
   tf.test.main()
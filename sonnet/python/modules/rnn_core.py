@@ -35,6 +35,7 @@ from sonnet.python.modules import basic
 import tensorflow as tf
 import wrapt
 
+from tensorflow.python.framework import tensor_shape
 from tensorflow.python.ops import rnn_cell_impl
 from tensorflow.python.util import nest
 
@@ -165,6 +166,160 @@ def trainable_initial_state(batch_size, state_size, dtype, initializers=None,
                                flat_sequence=flat_initial_state)
 
 
+def compacting_dynamic_rnn(core, input_sequence, initial_state,
+                           sequence_length, compaction_interval=8,
+                           name="compacting_dynamic_rnn"):
+  """Unrolls a core over a time-major batch, dropping finished sequences.
+
+  This computes the same outputs and final state as
+  `tf.nn.dynamic_rnn(core, input_sequence, initial_state=initial_state,
+  sequence_length=sequence_length, time_major=True)`, but the core is only
+  connected to the rows of the batch that have not yet finished.
+
+  Every `compaction_interval` timesteps the rows whose sequence is still
+  running are gathered into a smaller batch, and the state of the rows that
+  are dropped is scattered back into the full batch state, where it stays
+  until the end of the unroll. In between compactions, rows which finish are
+  masked as in `tf.nn.dynamic_rnn`. The amount of computation is thus
+  proportional to the total number of timesteps in the batch (rounded up to
+  `compaction_interval` for each sequence) rather than
+  `batch_size * max_time`, at the cost of one gather and one
+  `tf.dynamic_stitch` of the state per compaction. The unroll also stops at
+  the longest sequence in the batch rather than at `max_time`.
+
+  Args:
+    core: An `RNNCore` (or any `tf.contrib.rnn.RNNCell`) with arbitrarily
+      nested inputs, outputs and state, each with a leading batch dimension.
+    input_sequence: A Tensor or nested structure of Tensors, each of size
+      `[max_time, batch_size, ...]`.
+    initial_state: The initial state of `core` for the batch.
+    sequence_length: An int32 Tensor of size `[batch_size]`.
+    compaction_interval: Number of timesteps between compactions of the
+      batch. Small intervals keep the batch tight when lengths vary a lot,
+      large ones amortize the cost of the compaction.
+    name: Name of the name scope for the unroll.
+
+  Returns:
+    A tuple (output_sequence, final_state), where `output_sequence` has the
+    structure of `core.output_size` with Tensors of size
+    `[max_time, batch_size, ...]`, zero past the end of each sequence, and
+    `final_state` has the structure of `initial_state`.
+
+  Raises:
+    ValueError: if `compaction_interval` is not a positive integer.
+  """
+  if compaction_interval < 1:
+    raise ValueError("compaction_interval must be a positive integer, not "
+                     "{}.".format(compaction_interval))
+
+  with tf.name_scope(name):
+    flat_input = [tf.convert_to_tensor(i) for i in nest.flatten(input_sequence)]
+    flat_initial_state = nest.flatten(initial_state)
+    flat_output_size = [tensor_shape.as_shape(size)
+                        for size in nest.flatten(core.output_size)]
+    dtype = flat_input[0].dtype
+    input_shape = flat_input[0].get_shape()
+
+    sequence_length = tf.to_int32(sequence_length)
+    batch_size = tf.shape(sequence_length)[0]
+    num_steps = tf.reduce_max(sequence_length)
+    all_rows = tf.range(batch_size)
+
+    input_tas = [
+        tf.TensorArray(dtype=i.dtype, size=tf.shape(i)[0]).unstack(i)
+        for i in flat_input]
+
+    def compact(time, active_rows, compact_state, full_state):
+      """Moves the rows which are no longer running out of the batch."""
+      # In `tf.dynamic_stitch` later indices take precedence, so the latest
+      # states of the active rows overwrite their stale full batch states.
+      full_state = [
+          tf.dynamic_stitch([all_rows, active_rows], [full_s, compact_s])
+          for full_s, compact_s in zip(full_state, compact_state)]
+      still_running = tf.squeeze(
+          tf.where(tf.gather(sequence_length, active_rows) > time), axis=1)
+      active_rows = tf.gather(active_rows, still_running)
+      compact_state = [tf.gather(s, still_running) for s in compact_state]
+      return active_rows, compact_state, full_state
+
+    def loop_body(time, active_rows, compact_state, full_state, output_tas):
+      """Steps the core on the active rows, compacting them if it is time."""
+      active_rows, compact_state, full_state = tf.cond(
+          tf.equal(time % compaction_interval, 0),
+          lambda: compact(time, active_rows, compact_state, full_state),
+          lambda: (active_rows, compact_state, full_state))
+
+      inputs = nest.pack_sequence_as(
+          input_sequence,
+          [tf.gather(ta.read(time), active_rows) for ta in input_tas])
+      prev_state = nest.pack_sequence_as(initial_state, compact_state)
+      output, next_state = core(inputs, prev_state)
+
+      # Rows which finished since the last compaction are masked.
+      is_running = tf.gather(sequence_length, active_rows) > time
+      next_compact_state = [
+          tf.where(is_running, next_s, prev_s)
+          for next_s, prev_s in zip(nest.flatten(next_state), compact_state)]
+
+      scatter_indices = tf.expand_dims(active_rows, 1)
+      next_output_tas = []
+      for ta, o in zip(output_tas, nest.flatten(output)):
+        o = tf.where(is_running, o, tf.zeros_like(o))
+        full_output = tf.scatter_nd(
+            scatter_indices, o,
+            tf.concat([[batch_size], tf.shape(o)[1:]], 0))
+        next_output_tas.append(ta.write(time, full_output))
+
+      return (time + 1, active_rows, next_compact_state, full_state,
+              next_output_tas)
+
+    time = tf.constant(0)
+    active_rows = all_rows
+    compact_state = list(flat_initial_state)
+    full_state = list(flat_initial_state)
+    output_tas = [tf.TensorArray(dtype=dtype, size=num_steps)
+                  for _ in flat_output_size]
+
+    unknown_batch = lambda s: tf.TensorShape([None]).concatenate(  # pylint: disable=g-long-lambda
+        s.get_shape()[1:])
+    shape_invariants = (
+        time.get_shape(), tf.TensorShape([None]),
+        [unknown_batch(s) for s in compact_state],
+        [s.get_shape() for s in full_state],
+        [tf.TensorShape(None) for _ in output_tas])
+
+    _, active_rows, compact_state, full_state, output_tas = tf.while_loop(
+        cond=lambda time, *unused_args: time < num_steps,
+        body=loop_body,
+        loop_vars=(time, active_rows, compact_state, full_state, output_tas),
+        shape_invariants=shape_invariants)
+
+    final_state = [
+        tf.dynamic_stitch([all_rows, active_rows], [full_s, compact_s])
+        for full_s, compact_s in zip(full_state, compact_state)]
+    for final_s, initial_s in zip(final_state, flat_initial_state):
+      final_s.set_shape(initial_s.get_shape())
+
+    # The unroll stopped at the longest sequence; pad back to `max_time`.
+    flat_output = []
+    for ta, size in zip(output_tas, flat_output_size):
+      # Stacking an empty TensorArray requires a fully defined element shape,
+      # which the batch dimension is not, so all empty sequences are special
+      # cased.
+      output = tf.cond(
+          num_steps > 0, ta.stack,
+          lambda size=size: tf.zeros(  # pylint: disable=g-long-lambda
+              tf.concat([[0, batch_size], size.as_list()], 0), dtype=dtype))
+      padding = [[0, tf.shape(flat_input[0])[0] - num_steps]]
+      padding += [[0, 0]] * (size.ndims + 1)
+      output = tf.pad(output, padding)
+      output.set_shape(input_shape[:2].concatenate(size))
+      flat_output.append(output)
+
+    return (nest.pack_sequence_as(core.output_size, flat_output),
+            nest.pack_sequence_as(initial_state, final_state))
+
+
 @six.add_metaclass(abc.ABCMeta)
 class RNNCore(base.AbstractModule):
   """Superclass for Recurrent Neural Network Cores.
@@ -187,5 +187,88 @@ class TrainableInitialState(tf.test.TestCase, parameterized.TestCase):
       self.evaluate(tf.global_variables_initializer())
 
 
+class CompactingDynamicRNNTest(tf.test.TestCase, parameterized.TestCase):
+
+  def _make_core(self, core_type):
+    if core_type == "lstm":
+      return snt.LSTM(4)
+    elif core_type == "fused_lstm":
+      return snt.LSTM(4, use_fused_kernel=True)
+    elif core_type == "deep_rnn":
+      return snt.DeepRNN([snt.LSTM(4), snt.VanillaRNN(3), snt.GRU(2)])
+    else:
+      return snt.VanillaRNN(3)
+
+  @parameterized.named_parameters(
+      ("VanillaRNN", "vanilla", 1),
+      ("LSTM", "lstm", 3),
+      ("FusedLSTM", "fused_lstm", 3),
+      ("DeepRNN", "deep_rnn", 2),
+      ("LargeInterval", "deep_rnn", 100))
+  def testSameAsDynamicRNN(self, core_type, compaction_interval):
+    max_time, input_size = 7, 3
+    input_sequence = tf.random_normal([max_time, BATCH_SIZE, input_size])
+    sequence_length = tf.constant([7, 0, 2, 5, 3])
+    core = self._make_core(core_type)
+    initial_state = nest.map_structure(
+        lambda s: s + 0.1, core.initial_state(BATCH_SIZE))
+
+    output, final_state = snt.compacting_dynamic_rnn(
+        core, input_sequence, initial_state, sequence_length,
+        compaction_interval=compaction_interval)
+    expected_output, expected_final_state = tf.nn.dynamic_rnn(
+        core, input_sequence, initial_state=initial_state,
+        sequence_length=sequence_length, time_major=True)
+
+    self.assertEqual(output.get_shape(), expected_output.get_shape())
+    nest.assert_same_structure(final_state, expected_final_state)
+
+    loss = tf.reduce_sum(output) + sum(
+        tf.reduce_sum(s) for s in nest.flatten(final_state))
+    expected_loss = tf.reduce_sum(expected_output) + sum(
+        tf.reduce_sum(s) for s in nest.flatten(expected_final_state))
+    variables = core.get_variables()
+    grads = tf.gradients(loss, variables)
+    expected_grads = tf.gradients(expected_loss, variables)
+
+    self.evaluate(tf.global_variables_initializer())
+    values, expected_values = self.evaluate(
+        ((output, final_state, grads),
+         (expected_output, expected_final_state, expected_grads)))
+    for value, expected_value in zip(nest.flatten(values),
+                                     nest.flatten(expected_values)):
+      self.assertAllClose(value, expected_value, atol=1e-5)
+
+  def testAllSequencesShorter(self):
+    """Checks the outputs are padded past the longest sequence."""
+    core = snt.VanillaRNN(3)
+    input_sequence = tf.random_normal([6, 2, 3])
+    output, _ = snt.compacting_dynamic_rnn(
+        core, input_sequence, core.initial_state(2), [2, 3])
+    self.evaluate(tf.global_variables_initializer())
+    output = self.evaluate(output)
+    self.assertEqual(output.shape, (6, 2, 3))
+    self.assertAllEqual(output[3:], np.zeros((3, 2, 3)))
+    self.assertAllEqual(output[2, 0], np.zeros(3))
+
+  def testAllSequencesEmpty(self):
+    core = snt.VanillaRNN(3)
+    input_sequence = tf.random_normal([4, 2, 3])
+    initial_state = core.initial_state(2) + 0.5
+    output, final_state = snt.compacting_dynamic_rnn(
+        core, input_sequence, initial_state, [0, 0])
+    self.evaluate(tf.global_variables_initializer())
+    output, final_state = self.evaluate((output, final_state))
+    self.assertAllEqual(output, np.zeros((4, 2, 3)))
+    self.assertAllEqual(final_state, np.full((2, 3), 0.5))
+
+  def testBadCompactionInterval(self):
+    core = snt.VanillaRNN(3)
+    with self.assertRaisesRegexp(ValueError, "compaction_interval"):
+      snt.compacting_dynamic_rnn(
+          core, tf.zeros([2, 2, 3]), core.initial_state(2), [1, 2],
+          compaction_interval=0)
+
+
 if __name__ == "__main__":
   tf.test.main()
@@ -0,0 +1,227 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+
+"""Generation of sequences from recurrent cores.
+
+Both functions feed the tokens they generate back into an `RNNCore` inside a
+single `tf.while_loop`, so the size of the graph does not depend on the
+number of generated tokens or on the batch size.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Dependency imports
+import tensorflow as tf
+
+from tensorflow.python.util import nest
+
+
+def _filter_top_k(logits, top_k):
+  """Sets all but the `top_k` largest logits of each row to the minimum."""
+  values, _ = tf.nn.top_k(logits, k=top_k)
+  threshold = values[:, -1:]
+  return tf.where(logits < threshold,
+                  tf.fill(tf.shape(logits), logits.dtype.min),
+                  logits)
+
+
+def sample_sequence(core, input_fn, output_fn, initial_logits, initial_state,
+                    num_steps, temperature=1.0, top_k=None, seed=None,
+                    name="sample_sequence"):
+  """Samples sequences of tokens from a core, feeding back each sample.
+
+  At every step a token is sampled for each element of the batch from the
+  current logits, then `input_fn` maps it to the next input of `core`, and
+  `output_fn` maps the output of `core` to the logits of the next step:
+
+  ```python
+  samples, _ = snt.sample_sequence(
+      core,
+      input_fn=lambda ids: embed(tf.one_hot(ids, vocab_size)),
+      output_fn=output_linear,
+      initial_logits=logits,
+      initial_state=state,
+      num_steps=10000,
+      temperature=0.8)
+  ```
+
+  Args:
+    core: An `RNNCore`.
+    input_fn: Callable mapping an int32 Tensor of token ids of shape
+        `[batch_size]` to the inputs of `core`.
+    output_fn: Callable mapping the output of `core` to logits of shape
+        `[batch_size, num_tokens]`, for example an output `Linear` module.
+    initial_logits: Tensor of shape `[batch_size, num_tokens]`, the logits of
+        the first token.
+    initial_state: The state of `core` from which to sample.
+    num_steps: Number of tokens to sample, either an integer or a scalar int32
+        Tensor.
+    temperature: Temperature by which the logits are divided before sampling.
+        Values lower than 1 make the samples more conservative.
+    top_k: Optional integer. If set, each token is sampled from the `top_k`
+        most likely tokens only.
+    seed: Optional random seed for the sampling.
+    name: Name of the name scope for the sampling ops.
+
+  Returns:
+    A tuple `(samples, final_state)`, where `samples` is an int32 Tensor of
+    shape `[num_steps, batch_size]` and `final_state` is the state of `core`
+    after the last sampled token has been fed to it.
+
+  Raises:
+    ValueError: If `temperature` is not positive or `top_k` is less than 1.
+  """
+  if temperature <= 0:
+    raise ValueError("temperature must be positive, not {}.".format(
+        temperature))
+  if top_k is not None and top_k < 1:
+    raise ValueError("top_k must be at least 1, not {}.".format(top_k))
+
+  with tf.name_scope(name):
+    initial_logits = tf.convert_to_tensor(initial_logits)
+
+    def loop_body(time, logits, state, samples_ta):
+      """Samples a token from `logits` and steps the core with it."""
+      logits /= temperature
+      if top_k is not None:
+        logits = _filter_top_k(logits, top_k)
+      samples = tf.squeeze(
+          tf.multinomial(logits, 1, seed=seed, output_dtype=tf.int32), axis=1)
+      output, next_state = core(input_fn(samples), state)
+      next_logits = output_fn(output)
+      next_logits.set_shape(initial_logits.get_shape())
+      return time + 1, next_logits, next_state, samples_ta.write(time, samples)
+
+    _, _, final_state, samples_ta = tf.while_loop(
+        cond=lambda time, *unused_args: time < num_steps,
+        body=loop_body,
+        loop_vars=(tf.constant(0), initial_logits, initial_state,
+                   tf.TensorArray(dtype=tf.int32, size=num_steps)))
+
+    samples = samples_ta.stack()
+    samples.set_shape([None, initial_logits.get_shape()[0]])
+    return samples, final_state
+
+
+def beam_search(core, input_fn, output_fn, initial_logits, initial_state,
+                num_steps, beam_width, name="beam_search"):
+  """Finds the most likely sequences of tokens under a core with beam search.
+
+  The state of `core` is tracked for `beam_width` hypotheses per element of
+  the batch. At every step all the continuations of all the hypotheses are
+  scored, and the `beam_width` most likely ones are kept. The sequences are
+  recovered at the end by following the parent of each hypothesis backwards,
+  so no step copies the sequences generated so far.
+
+  Args:
+    core: An `RNNCore`.
+    input_fn: Callable mapping an int32 Tensor of token ids of shape
+        `[batch_size * beam_width]` to the inputs of `core`.
+    output_fn: Callable mapping the output of `core` to logits of shape
+        `[batch_size * beam_width, num_tokens]`.
+    initial_logits: Tensor of shape `[batch_size, num_tokens]`, the logits of
+        the first token.
+    initial_state: The state of `core` from which to search, with a leading
+        batch dimension of size `batch_size`.
+    num_steps: Number of tokens to generate, either an integer or a scalar
+        int32 Tensor.
+    beam_width: Number of hypotheses to keep for each element of the batch.
+    name: Name of the name scope for the search ops.
+
+  Returns:
+    A tuple `(sequences, log_probs)`, where `sequences` is an int32 Tensor of
+    shape `[num_steps, batch_size, beam_width]` and `log_probs` is a Tensor of
+    shape `[batch_size, beam_width]` with the log-probability of each
+    sequence. The sequences are sorted from most to least likely.
+
+  Raises:
+    ValueError: If `beam_width` is less than 1.
+  """
+  if beam_width < 1:
+    raise ValueError("beam_width must be at least 1, not {}.".format(
+        beam_width))
+
+  with tf.name_scope(name):
+    initial_logits = tf.convert_to_tensor(initial_logits)
+    batch_size = tf.shape(initial_logits)[0]
+    num_tokens = tf.shape(initial_logits)[1]
+    batch_offsets = tf.expand_dims(tf.range(batch_size) * beam_width, 1)
+
+    def tile_beams(t):
+      """Repeats each row of `t` `beam_width` times."""
+      tiled = tf.tile(tf.expand_dims(t, 1),
+                      [1, beam_width] + [1] * (t.get_shape().ndims - 1))
+      tiled = tf.reshape(tiled, tf.concat([[batch_size * beam_width],
+                                           tf.shape(t)[1:]], 0))
+      tiled.set_shape(tf.TensorShape([None]).concatenate(t.get_shape()[1:]))
+      return tiled
+
+    def loop_body(time, logits, state, scores, tokens_ta, parents_ta):
+      """Extends each hypothesis by one token and keeps the best ones."""
+      log_probs = tf.reshape(tf.nn.log_softmax(logits),
+                             [batch_size, beam_width, num_tokens])
+      candidate_scores = tf.expand_dims(scores, 2) + log_probs
+      next_scores, indices = tf.nn.top_k(
+          tf.reshape(candidate_scores, [batch_size, -1]), k=beam_width)
+      parents = indices // num_tokens
+      tokens = indices % num_tokens
+
+      parent_rows = tf.reshape(parents + batch_offsets, [-1])
+      state = nest.map_structure(lambda s: tf.gather(s, parent_rows), state)
+      output, next_state = core(input_fn(tf.reshape(tokens, [-1])), state)
+      next_logits = output_fn(output)
+      next_logits.set_shape(logits.get_shape())
+      return (time + 1, next_logits, next_state, next_scores,
+              tokens_ta.write(time, tokens), parents_ta.write(time, parents))
+
+    # All hypotheses start from the same state, so only the first one is kept
+    # alive for the first step.
+    initial_scores = tf.concat(
+        [tf.zeros([batch_size, 1], dtype=initial_logits.dtype),
+         tf.fill([batch_size, beam_width - 1], initial_logits.dtype.min)], 1)
+    loop_vars = (tf.constant(0), tile_beams(initial_logits),
+                 nest.map_structure(tile_beams, initial_state),
+                 initial_scores,
+                 tf.TensorArray(dtype=tf.int32, size=num_steps),
+                 tf.TensorArray(dtype=tf.int32, size=num_steps))
+    _, _, _, log_probs, tokens_ta, parents_ta = tf.while_loop(
+        cond=lambda time, *unused_args: time < num_steps,
+        body=loop_body,
+        loop_vars=loop_vars)
+
+    tokens = tokens_ta.stack()
+    parents = parents_ta.stack()
+
+    def backtrack_body(time, beams, sequences_ta):
+      """Reads the tokens of `beams` at `time` and moves to their parents."""
+      indices = tf.stack([tf.tile(tf.expand_dims(tf.range(batch_size), 1),
+                                  [1, beam_width]), beams], axis=2)
+      sequences_ta = sequences_ta.write(time, tf.gather_nd(tokens[time],
+                                                           indices))
+      return time - 1, tf.gather_nd(parents[time], indices), sequences_ta
+
+    _, _, sequences_ta = tf.while_loop(
+        cond=lambda time, *unused_args: time >= 0,
+        body=backtrack_body,
+        loop_vars=(tf.shape(tokens)[0] - 1,
+                   tf.tile(tf.expand_dims(tf.range(beam_width), 0),
+                           [batch_size, 1]),
+                   tf.TensorArray(dtype=tf.int32, size=tf.shape(tokens)[0])))
+
+    sequences = sequences_ta.stack()
+    sequences.set_shape([None, initial_logits.get_shape()[0], beam_width])
+    return sequences, log_probs
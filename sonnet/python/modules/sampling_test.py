@@ -0,0 +1,182 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+
+"""Tests for sonnet.python.modules.sampling."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import itertools
+
+# Dependency imports
+from absl.testing import parameterized
+import numpy as np
+import sonnet as snt
+import tensorflow as tf
+
+from tensorflow.python.util import nest
+
+
+NUM_TOKENS = 4
+BATCH_SIZE = 3
+
+
+def _repeat_rows(t, multiple):
+  """Repeats each row of the rank-2 Tensor `t` `multiple` times."""
+  return tf.reshape(tf.tile(tf.expand_dims(t, 1), [1, multiple, 1]),
+                    [-1, t.get_shape()[1].value])
+
+
+class SamplingTest(tf.test.TestCase, parameterized.TestCase):
+
+  def setUp(self):
+    super(SamplingTest, self).setUp()
+    self.core = snt.DeepRNN([snt.LSTM(5), snt.VanillaRNN(6)],
+                            skip_connections=False)
+    self.embed = snt.Embed(NUM_TOKENS, 3)
+    self.output_linear = snt.Linear(NUM_TOKENS)
+    self.initial_logits = tf.random_normal([BATCH_SIZE, NUM_TOKENS])
+
+  def _initial_state(self, batch_size=BATCH_SIZE):
+    return nest.map_structure(lambda s: s + 0.1,
+                              self.core.initial_state(batch_size))
+
+  def _log_prob(self, sequences, initial_logits, initial_state):
+    """Scores `[num_steps, batch_size]` sequences with a static unroll."""
+    logits = initial_logits
+    state = initial_state
+    log_prob = 0.
+    for tokens in tf.unstack(sequences):
+      log_prob -= tf.nn.sparse_softmax_cross_entropy_with_logits(
+          labels=tokens, logits=logits)
+      output, state = self.core(self.embed(tokens), state)
+      logits = self.output_linear(output)
+    return log_prob
+
+  def _greedy(self, num_steps):
+    """Decodes greedily with a static unroll."""
+    logits = self.initial_logits
+    state = self._initial_state()
+    tokens = []
+    for _ in range(num_steps):
+      tokens.append(tf.argmax(logits, axis=1, output_type=tf.int32))
+      output, state = self.core(self.embed(tokens[-1]), state)
+      logits = self.output_linear(output)
+    return tf.stack(tokens)
+
+  def testGreedySample(self):
+    num_steps = tf.placeholder(tf.int32, [])
+    samples, final_state = snt.sample_sequence(
+        self.core, self.embed, self.output_linear, self.initial_logits,
+        self._initial_state(), num_steps, top_k=1)
+    nest.assert_same_structure(final_state, self.core.initial_state(1))
+    expected_samples = self._greedy(7)
+
+    self.evaluate(tf.global_variables_initializer())
+    with self.test_session() as sess:
+      samples, expected_samples = sess.run((samples, expected_samples),
+                                           feed_dict={num_steps: 7})
+    self.assertAllEqual(expected_samples, samples)
+
+  @parameterized.parameters((1.0, None), (0.5, 2), (2.0, NUM_TOKENS))
+  def testSample(self, temperature, top_k):
+    initial_logits = tf.constant([[0., 1., 2., 3.]] * BATCH_SIZE)
+    samples, _ = snt.sample_sequence(
+        self.core, self.embed, lambda unused_output: initial_logits,
+        initial_logits, self._initial_state(), 200, temperature=temperature,
+        top_k=top_k, seed=1)
+    self.assertEqual([None, BATCH_SIZE], samples.get_shape().as_list())
+
+    self.evaluate(tf.global_variables_initializer())
+    samples = self.evaluate(samples)
+    self.assertEqual((200, BATCH_SIZE), samples.shape)
+    top_k = top_k or NUM_TOKENS
+    self.assertAllEqual(np.arange(NUM_TOKENS - top_k, NUM_TOKENS),
+                        np.unique(samples))
+
+  def testBadSampleArguments(self):
+    with self.assertRaisesRegexp(ValueError, "temperature"):
+      snt.sample_sequence(self.core, self.embed, self.output_linear,
+                          self.initial_logits, self._initial_state(), 2,
+                          temperature=0.)
+    with self.assertRaisesRegexp(ValueError, "top_k"):
+      snt.sample_sequence(self.core, self.embed, self.output_linear,
+                          self.initial_logits, self._initial_state(), 2,
+                          top_k=0)
+
+  def testBeamWidthOneIsGreedy(self):
+    sequences, log_probs = snt.beam_search(
+        self.core, self.embed, self.output_linear, self.initial_logits,
+        self._initial_state(), 6, beam_width=1)
+    expected_sequences = self._greedy(6)
+    expected_log_probs = self._log_prob(
+        expected_sequences, self.initial_logits, self._initial_state())
+
+    self.evaluate(tf.global_variables_initializer())
+    values, expected_values = self.evaluate(
+        ((sequences, log_probs), (expected_sequences, expected_log_probs)))
+    self.assertAllEqual(expected_values[0], values[0][:, :, 0])
+    self.assertAllClose(expected_values[1], values[1][:, 0], atol=1e-5)
+
+  def testBeamSearchIsExact(self):
+    """Checks a wide enough beam finds the most likely sequences."""
+    num_steps = 3
+    beam_width = NUM_TOKENS ** (num_steps - 1)
+    initial_state = self._initial_state()
+    sequences, log_probs = snt.beam_search(
+        self.core, self.embed, self.output_linear, self.initial_logits,
+        initial_state, num_steps, beam_width=beam_width)
+    self.assertEqual([None, BATCH_SIZE, beam_width],
+                     sequences.get_shape().as_list())
+
+    # Score every possible sequence for every element of the batch.
+    all_sequences = np.array(
+        list(itertools.product(range(NUM_TOKENS), repeat=num_steps)),
+        dtype=np.int32).T
+    num_sequences = all_sequences.shape[1]
+    all_log_probs = self._log_prob(
+        tf.constant(np.tile(all_sequences, [1, BATCH_SIZE])),
+        _repeat_rows(self.initial_logits, num_sequences),
+        nest.map_structure(lambda s: _repeat_rows(s, num_sequences),
+                           initial_state))
+    all_log_probs = tf.reshape(all_log_probs, [BATCH_SIZE, num_sequences])
+    # The log-probabilities returned by beam search match its sequences.
+    beam_log_probs = self._log_prob(
+        tf.reshape(sequences, [num_steps, -1]),
+        _repeat_rows(self.initial_logits, beam_width),
+        nest.map_structure(lambda s: _repeat_rows(s, beam_width),
+                           initial_state))
+
+    self.evaluate(tf.global_variables_initializer())
+    sequences, log_probs, all_log_probs, beam_log_probs = self.evaluate(
+        (sequences, log_probs, all_log_probs, beam_log_probs))
+    for i in range(BATCH_SIZE):
+      best = np.argmax(all_log_probs[i])
+      self.assertAllEqual(all_sequences[:, best], sequences[:, i, 0])
+      self.assertAllClose(all_log_probs[i, best], log_probs[i, 0], atol=1e-5)
+    self.assertTrue(np.all(np.diff(log_probs, axis=1) <= 0))
+    self.assertAllClose(beam_log_probs.reshape([BATCH_SIZE, beam_width]),
+                        log_probs, atol=1e-5)
+
+  def testBadBeamWidth(self):
+    with self.assertRaisesRegexp(ValueError, "beam_width"):
+      snt.beam_search(self.core, self.embed, self.output_linear,
+                      self.initial_logits, self._initial_state(), 2,
+                      beam_width=0)
+
+
+if __name__ == "__main__":
+  tf.test.main()
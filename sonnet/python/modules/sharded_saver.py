@@ -0,0 +1,271 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+
+"""Saving and restoring variables as size-balanced checkpoint shards.
+
+A `tf.train.Saver` writes all its variables with a single op. `ShardedSaver`
+instead splits the variables in shards of similar size, each written to its
+own checkpoint by its own op, and runs the ops of all the shards at once so
+that TensorFlow reads and writes the shards in parallel on its inter-op
+threads. A JSON manifest records which shard holds each variable:
+
+```python
+saver = snt.get_sharded_saver(model, num_shards=8)
+manifest_path = saver.save(sess, "/tmp/model", global_step=step)
+...
+saver.restore(sess, manifest_path)
+```
+
+Each shard is a regular checkpoint, keyed by the normalized variable names
+like the checkpoints of `snt.get_saver`.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import json
+import os
+
+# Dependency imports
+import six
+from sonnet.python.modules import util
+import tensorflow as tf
+
+
+_MANIFEST_SUFFIX = ".manifest"
+_MANIFEST_VERSION = 1
+
+
+def _num_bytes(variables):
+  """Returns the size in bytes of a variable or list of partitions."""
+  if not isinstance(variables, (list, tuple)):
+    variables = [variables]
+  num_bytes = 0
+  for variable in variables:
+    shape = variable.get_shape()
+    if shape.is_fully_defined():
+      num_bytes += shape.num_elements() * variable.dtype.base_dtype.size
+  return num_bytes
+
+
+def _balance_shards(var_list, num_shards):
+  """Splits a variable map in shards of similar size.
+
+  Args:
+    var_list: Dict from name to variable or list of partitions.
+    num_shards: Maximum number of shards.
+
+  Returns:
+    A list of dicts from name to variable or list of partitions, without empty
+    shards.
+  """
+  shards = [{} for _ in range(num_shards)]
+  shard_bytes = [0] * num_shards
+  # Largest first, each variable to the smallest shard so far. The partitions
+  # of a variable stay together, in a single shard.
+  sizes = sorted(((_num_bytes(variables), name)
+                  for name, variables in six.iteritems(var_list)),
+                 key=lambda item: (-item[0], item[1]))
+  for num_bytes, name in sizes:
+    index = min(range(num_shards), key=lambda i: (shard_bytes[i], i))
+    shards[index][name] = var_list[name]
+    shard_bytes[index] += num_bytes
+  return [shard for shard in shards if shard]
+
+
+class ShardedSaver(object):
+  """Saves and restores variables as size-balanced checkpoint shards.
+
+  Saving to `save_path` writes one checkpoint per shard, with prefixes
+  `save_path-shard-<index>-of-<number of shards>`, and then the manifest
+  `save_path.manifest` listing the variables in each shard. The manifest is
+  written last, so a manifest always refers to complete shards.
+
+  Restoring looks up each variable by name in the manifest, so a checkpoint
+  can be restored by a `ShardedSaver` with a different number of shards, or
+  whose variables are a subset of those saved. Restoring shards whose
+  variables were saved in the same checkpoint is fastest, as it runs the ops
+  built with the saver; otherwise new restore ops are added to the graph.
+
+  Unlike `tf.train.Saver`, the `checkpoint` state file and the MetaGraph are
+  not written.
+  """
+
+  def __init__(self, var_list, num_shards=8, name="sharded_saver"):
+    """Constructs a `ShardedSaver`.
+
+    Args:
+      var_list: Dict from name to `tf.Variable` or list of partitions of a
+        `tf.Variable`, as returned by `snt.get_normalized_variable_map`.
+      num_shards: Maximum number of shards. There are fewer shards if there
+        are fewer variables.
+      name: Name of the scope of the ops of the saver.
+
+    Raises:
+      ValueError: If `var_list` is empty or `num_shards` is not positive.
+    """
+    if not var_list:
+      raise ValueError("No variables to save.")
+    if num_shards < 1:
+      raise ValueError("num_shards must be positive, not {}.".format(
+          num_shards))
+    self._var_list = dict(var_list)
+    with tf.name_scope(name) as scope_name:
+      self._scope_name = scope_name
+      self._shards = []
+      for index, shard in enumerate(_balance_shards(var_list, num_shards)):
+        saver = tf.train.Saver(var_list=shard,
+                               name="shard_{}".format(index),
+                               write_version=tf.train.SaverDef.V2)
+        self._shards.append((sorted(shard), saver))
+    # Restore ops for variables saved in different checkpoints, by tuple of
+    # variable names.
+    self._restore_savers = {}
+
+  @property
+  def shards(self):
+    """List of the sorted lists of the variable names in each shard."""
+    return [names for names, _ in self._shards]
+
+  def _shard_path(self, save_path, index):
+    return "{}-shard-{:05d}-of-{:05d}".format(
+        save_path, index, len(self._shards))
+
+  def save(self, sess, save_path, global_step=None):
+    """Saves the variables.
+
+    Args:
+      sess: A `tf.Session` to run the save ops in.
+      save_path: Prefix of the paths of the checkpoint shards and manifest.
+      global_step: Optional step number, or tensor holding it, appended to
+        `save_path`.
+
+    Returns:
+      The path of the manifest, to pass to `restore`.
+    """
+    if global_step is not None:
+      if not isinstance(global_step, tf.compat.integral_types):
+        global_step = tf.train.global_step(sess, global_step)
+      save_path = "{}-{:d}".format(save_path, global_step)
+
+    feed_dict = {}
+    fetches = []
+    manifest_shards = []
+    for index, (names, saver) in enumerate(self._shards):
+      shard_path = self._shard_path(save_path, index)
+      feed_dict[saver.saver_def.filename_tensor_name] = shard_path
+      fetches.append(saver.saver_def.save_tensor_name)
+      manifest_shards.append({
+          "checkpoint": os.path.basename(shard_path),
+          "variables": names,
+          "bytes": sum(_num_bytes(self._var_list[name]) for name in names),
+      })
+    # The shards are independent, so a single run writes them in parallel.
+    sess.run(fetches, feed_dict=feed_dict)
+
+    manifest_path = save_path + _MANIFEST_SUFFIX
+    temp_path = manifest_path + ".tmp"
+    with tf.gfile.GFile(temp_path, "w") as f:
+      f.write(json.dumps({"version": _MANIFEST_VERSION,
+                          "shards": manifest_shards}, indent=2))
+    tf.gfile.Rename(temp_path, manifest_path, overwrite=True)
+    return manifest_path
+
+  def _get_restore_saver(self, names, graph):
+    """Returns a `tf.train.Saver` restoring the given variables."""
+    saver = self._restore_savers.get(names)
+    if saver is None:
+      with graph.as_default(), tf.name_scope(self._scope_name):
+        saver = tf.train.Saver(
+            var_list={name: self._var_list[name] for name in names},
+            name="restore_{}".format(len(self._restore_savers)),
+            write_version=tf.train.SaverDef.V2)
+      self._restore_savers[names] = saver
+    return saver
+
+  def restore(self, sess, manifest_path):
+    """Restores the variables.
+
+    Args:
+      sess: A `tf.Session` to run the restore ops in.
+      manifest_path: Path of the manifest returned by `save`.
+
+    Raises:
+      ValueError: If the manifest is invalid or does not list some of the
+        variables.
+    """
+    with tf.gfile.GFile(manifest_path) as f:
+      manifest = json.loads(f.read())
+    if manifest.get("version") != _MANIFEST_VERSION:
+      raise ValueError("Unsupported manifest version {!r} in {}.".format(
+          manifest.get("version"), manifest_path))
+    directory = os.path.dirname(manifest_path)
+    checkpoints = {}
+    for shard in manifest["shards"]:
+      shard_path = os.path.join(directory, shard["checkpoint"])
+      for name in shard["variables"]:
+        checkpoints[name] = shard_path
+    missing = sorted(name for name in self._var_list if name not in checkpoints)
+    if missing:
+      raise ValueError("Variables {} are not in the checkpoint {}.".format(
+          missing, manifest_path))
+
+    feed_dict = {}
+    fetches = []
+    def add_restore(saver, shard_path):
+      feed_dict[saver.saver_def.filename_tensor_name] = shard_path
+      fetches.append(saver.saver_def.restore_op_name)
+    for names, saver in self._shards:
+      names_by_checkpoint = collections.defaultdict(list)
+      for name in names:
+        names_by_checkpoint[checkpoints[name]].append(name)
+      if len(names_by_checkpoint) == 1:
+        add_restore(saver, checkpoints[names[0]])
+      else:
+        for shard_path, shard_names in sorted(names_by_checkpoint.items()):
+          add_restore(self._get_restore_saver(tuple(shard_names), sess.graph),
+                      shard_path)
+    # The shards are independent, so a single run reads them in parallel.
+    sess.run(fetches, feed_dict=feed_dict)
+
+
+def get_sharded_saver(scope, num_shards=8,
+                      collections=(tf.GraphKeys.GLOBAL_VARIABLES,),  # pylint: disable=redefined-outer-name
+                      context=None, name="sharded_saver"):
+  """Builds a `ShardedSaver` for the scope or module, with normalized names.
+
+  As `snt.get_saver`, but saving and restoring the variables in parallel as
+  size-balanced shards.
+
+  Args:
+    scope: Scope or module. Variables within will be saved or restored.
+    num_shards: Maximum number of shards.
+    collections: Sequence of collections of variables to restrict the saver
+        to. By default this is `tf.GraphKeys.GLOBAL_VARIABLES` which includes
+        moving averages variables as well as trainable variables.
+    context: Scope or module, identical to or parent of `scope`. If given, this
+        will be used as the stripped prefix.
+    name: Name of the scope of the ops of the saver.
+
+  Returns:
+    A `ShardedSaver` object for Variables in the scope or module.
+  """
+  variable_map = {}
+  for collection in collections:
+    variable_map.update(
+        util.get_normalized_variable_map(scope, collection, context))
+  return ShardedSaver(variable_map, num_shards=num_shards, name=name)
@@ -0,0 +1,170 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+
+"""Tests for sonnet.python.modules.sharded_saver."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import os
+import tempfile
+import timeit
+
+# Dependency imports
+import sonnet as snt
+from sonnet.python.modules import sharded_saver
+import tensorflow as tf
+
+
+class ShardedSaverTest(tf.test.TestCase):
+
+  def _create_mlp(self, name="mlp", partitioned=False):
+    if partitioned:
+      partitioners = {"w": tf.variable_axis_size_partitioner(64)}
+    else:
+      partitioners = None
+    mlp = snt.nets.MLP([16, 8, 4], partitioners=partitioners, name=name)
+    mlp(tf.ones([1, 32]))
+    return mlp
+
+  def _values(self, sess, mlp):
+    return sess.run([tf.convert_to_tensor(v) for v in
+                     (mlp.layers[0].w, mlp.layers[1].w, mlp.layers[2].b)])
+
+  def testBalanceShards(self):
+    sizes = {"a": [8], "b": [6], "c": [5], "d": [4], "e": [3]}
+    var_list = {name: tf.get_variable(name, shape=shape)
+                for name, shape in sizes.items()}
+    shards = sharded_saver._balance_shards(var_list, 2)
+    self.assertEqual([{"a", "d"}, {"b", "c", "e"}],
+                     [set(shard) for shard in shards])
+    # Empty shards are dropped.
+    self.assertEqual(5, len(sharded_saver._balance_shards(var_list, 8)))
+
+  def testShards(self):
+    mlp = self._create_mlp()
+    saver = snt.get_sharded_saver(mlp, num_shards=2)
+    self.assertEqual(2, len(saver.shards))
+    self.assertEqual(
+        {"linear_0/w", "linear_0/b", "linear_1/w", "linear_1/b",
+         "linear_2/w", "linear_2/b"},
+        set(name for names in saver.shards for name in names))
+    # The largest weight is as large as all the other variables together.
+    self.assertEqual(["linear_0/w"], saver.shards[0])
+
+    with self.assertRaisesRegexp(ValueError, "num_shards must be positive"):
+      snt.get_sharded_saver(mlp, num_shards=0)
+    with self.assertRaisesRegexp(ValueError, "No variables"):
+      sharded_saver.ShardedSaver({})
+
+  def testSaveRestore(self):
+    save_path = os.path.join(tempfile.mkdtemp(), "ckpt")
+    with self.test_session() as sess:
+      mlp = self._create_mlp(partitioned=True)
+      saver = snt.get_sharded_saver(mlp, num_shards=3)
+      sess.run(tf.global_variables_initializer())
+      values = self._values(sess, mlp)
+      manifest_path = saver.save(sess, save_path, global_step=7)
+      self.assertEqual(save_path + "-7.manifest", manifest_path)
+
+      with tf.gfile.GFile(manifest_path) as f:
+        manifest = json.loads(f.read())
+      self.assertEqual(saver.shards,
+                       [shard["variables"] for shard in manifest["shards"]])
+      # Each shard is a regular checkpoint.
+      shard_path = os.path.join(os.path.dirname(save_path),
+                                manifest["shards"][0]["checkpoint"])
+      reader = tf.train.NewCheckpointReader(shard_path)
+      for name in manifest["shards"][0]["variables"]:
+        self.assertTrue(reader.has_tensor(name))
+
+      sess.run(tf.global_variables_initializer())
+      saver.restore(sess, manifest_path)
+      for expected, actual in zip(values, self._values(sess, mlp)):
+        self.assertAllEqual(expected, actual)
+
+  def testRestoreWithDifferentShards(self):
+    save_path = os.path.join(tempfile.mkdtemp(), "ckpt")
+    with self.test_session() as sess:
+      mlp = self._create_mlp(name="a")
+      sess.run(tf.global_variables_initializer())
+      values = self._values(sess, mlp)
+      manifest_path = snt.get_sharded_saver(mlp, num_shards=2).save(
+          sess, save_path)
+
+    with self.test_session() as sess:
+      mlp = self._create_mlp(name="b", partitioned=True)
+      saver = snt.get_sharded_saver(mlp, num_shards=4)
+      saver.restore(sess, manifest_path)
+      for expected, actual in zip(values, self._values(sess, mlp)):
+        self.assertAllEqual(expected, actual)
+
+  def testRestoreMissingVariables(self):
+    save_path = os.path.join(tempfile.mkdtemp(), "ckpt")
+    with self.test_session() as sess:
+      linear = snt.Linear(4, name="a")
+      linear(tf.ones([1, 3]))
+      sess.run(tf.global_variables_initializer())
+      manifest_path = snt.get_sharded_saver(linear).save(sess, save_path)
+
+      mlp = self._create_mlp()
+      saver = snt.get_sharded_saver(mlp)
+      with self.assertRaisesRegexp(ValueError, "linear_0/b"):
+        saver.restore(sess, manifest_path)
+
+
+class ShardedSaverBenchmark(tf.test.Benchmark):
+  """Benchmarks saving and restoring large embeddings."""
+
+  def _benchmark_save_restore(self, num_shards, num_embeddings=16,
+                              vocab_size=2 ** 16, embedding_dim=64):
+    save_path = os.path.join(tempfile.mkdtemp(), "ckpt")
+    with tf.Graph().as_default(), tf.Session() as sess:
+      with tf.variable_scope("model") as scope:
+        for i in range(num_embeddings):
+          tf.get_variable("embeddings_{}".format(i),
+                          shape=[vocab_size, embedding_dim])
+      sess.run(tf.global_variables_initializer())
+      if num_shards:
+        saver = snt.get_sharded_saver(scope, num_shards=num_shards)
+        save_kwargs = {}
+      else:
+        saver = snt.get_saver(scope)
+        # The sharded saver does not write the MetaGraph either.
+        save_kwargs = {"write_meta_graph": False}
+
+      start_time = timeit.default_timer()
+      restore_path = saver.save(sess, save_path, **save_kwargs)
+      save_time = timeit.default_timer() - start_time
+      start_time = timeit.default_timer()
+      saver.restore(sess, restore_path)
+      restore_time = timeit.default_timer() - start_time
+
+    self.report_benchmark(
+        iters=1, wall_time=save_time + restore_time,
+        name="save_restore_{}_shards".format(num_shards),
+        extras={"save_time": save_time, "restore_time": restore_time})
+
+  def benchmarkSaver(self):
+    self._benchmark_save_restore(num_shards=0)
+
+  def benchmarkShardedSaver(self):
+    self._benchmark_save_restore(num_shards=8)
+
+
+if __name__ == "__main__":
+  tf.test.main()
@@ -60,9 +60,164 @@ def get_variable_scope_name(value):
     raise ValueError("Not a variable scope: {}".format(value))
 
 
+def _get_graph_registry(name, graph=None):
+  """Returns a dict stored on a graph, created on first access.
+
+  Sonnet keeps per-graph state, e.g. indices of the graph's collections, in
+  these dicts rather than in dicts keyed by graph: their values reference the
+  graph's tensors, which reference the graph, so such a key would never be
+  released.
+
+  Args:
+    name: Name of the registry.
+    graph: The graph, by default the default graph.
+
+  Returns:
+    The dict named `name` of the graph.
+  """
+  if graph is None:
+    graph = tf.get_default_graph()
+  # pylint: disable=protected-access
+  try:
+    registries = graph._sonnet_registries
+  except AttributeError:
+    registries = graph._sonnet_registries = {}
+  # pylint: enable=protected-access
+  return registries.setdefault(name, {})
+
+
+class _ScopeTrieNode(object):
+  """Node of a `_ScopeIndex`, for one variable scope."""
+
+  __slots__ = ("children", "items")
+
+  def __init__(self):
+    self.children = {}
+    # All the items in this scope and its sub-scopes, in collection order.
+    self.items = []
+
+
+class _ScopeIndex(object):
+  """Index of the items of a graph collection by variable scope.
+
+  Querying a graph collection by scope with `tf.get_collection` matches a
+  regular expression against the name of every item in the collection. This
+  index instead keeps the items in a trie of their scopes, so the items of a
+  scope are found in time proportional to their number.
+
+  The index is brought up to date with the collection before each query.
+  Collections almost always only grow by appending, so only the new items are
+  indexed. Removals, and replacing the last indexed item, are detected in
+  constant time and cause the collection to be indexed again from scratch;
+  replacing any other item in place is not detected.
+  """
+
+  def __init__(self):
+    self._reset(None)
+
+  def _reset(self, collection):
+    self._collection = collection
+    self._num_indexed = 0
+    self._last_indexed = None
+    self._root = _ScopeTrieNode()
+    self._members = set()
+
+  def update(self, collection):
+    """Indexes the items of `collection`, the list of a graph collection."""
+    num_indexed = self._num_indexed
+    if (collection is not self._collection or
+        len(collection) < num_indexed or
+        (num_indexed and
+         collection[num_indexed - 1] is not self._last_indexed)):
+      self._reset(collection)
+      num_indexed = 0
+
+    for item in collection[num_indexed:]:
+      try:
+        name = item.name
+      except AttributeError:
+        # Items without a name are never in a scope, see `tf.get_collection`.
+        continue
+      self._members.add(item)
+      node = self._root
+      node.items.append(item)
+      # An item is in a scope if its name starts with the scope name followed
+      # by a "/", so it is added to all nodes but its own.
+      for scope_name in name.split("/")[:-1]:
+        child = node.children.get(scope_name)
+        if child is None:
+          child = node.children[scope_name] = _ScopeTrieNode()
+        child.items.append(item)
+        node = child
+
+    if collection:
+      self._last_indexed = collection[-1]
+    self._num_indexed = len(collection)
+
+  def get_items_in_scope(self, scope_name):
+    """Returns the indexed items in the given scope, in collection order."""
+    node = self._root
+    if scope_name:
+      for name in scope_name.split("/"):
+        node = node.children.get(name)
+        if node is None:
+          return ()
+    return tuple(node.items)
+
+  def __contains__(self, item):
+    return item in self._members
+
+
+def _get_scope_index(collection, graph=None):
+  """Returns an up to date `_ScopeIndex` of a collection of `graph`.
+
+  Args:
+    collection: Name of the graph collection.
+    graph: The graph holding the collection, by default the default graph.
+
+  Returns:
+    A `_ScopeIndex` of the collection.
+  """
+  if graph is None:
+    graph = tf.get_default_graph()
+  graph_indices = _get_graph_registry("scope_indices", graph)
+  scope_index = graph_indices.get(collection)
+  if scope_index is None:
+    scope_index = graph_indices[collection] = _ScopeIndex()
+  # `get_collection_ref` would add missing collections to the graph.
+  if collection in graph.get_all_collection_keys():
+    scope_index.update(graph.get_collection_ref(collection))
+  else:
+    scope_index.update([])
+  return scope_index
+
+
+def filter_by_collection(variables,
+                         collection=tf.GraphKeys.TRAINABLE_VARIABLES):
+  """Returns the variables in `variables` which are in a graph collection.
+
+  Unlike checking membership of `tf.get_collection(collection)`, this takes
+  time proportional to the number of variables, not to the size of the
+  collection.
+
+  Args:
+    variables: Iterable of `tf.Variable`s.
+    collection: Name of a collection of the default graph.
+
+  Returns:
+    A tuple of the variables in the collection, in the order of `variables`.
+  """
+  scope_index = _get_scope_index(collection)
+  return tuple(v for v in variables if v in scope_index)
+
+
 def get_variables_in_scope(scope, collection=tf.GraphKeys.TRAINABLE_VARIABLES):
   """Returns a tuple `tf.Variable`s in a scope for a given collection.
 
+  The variables are looked up in an index of the collection by scope, so this
+  takes time proportional to the number of variables returned rather than to
+  the size of the collection.
+
   Args:
     scope: `tf.VariableScope` or string to retrieve variables from.
     collection: Collection to restrict query to. By default this is
@@ -73,14 +228,9 @@ def get_variables_in_scope(scope, collection=tf.GraphKeys.TRAINABLE_VARIABLES):
     A tuple of `tf.Variable` objects.
   """
   scope_name = get_variable_scope_name(scope)
-
-  if scope_name:
-    # Escape the name in case it contains any "." characters. Add a closing
-    # slash so we will not search any scopes that have this scope name as a
-    # prefix.
-    scope_name = re.escape(scope_name) + "/"
-
-  return tuple(tf.get_collection(collection, scope_name))
+  # Variables whose scope only has this scope name as a prefix are excluded,
+  # as with a query for the scope name followed by a closing slash.
+  return _get_scope_index(collection).get_items_in_scope(scope_name)
 
 
 def get_variables_in_module(module,
@@ -470,6 +620,45 @@ def _format_table(rows, join_lines=True):
   return "\n".join(output_rows) if join_lines else output_rows
 
 
+def format_stats_table(title, stats, columns, sort_by, max_rows=None,
+                       total=None):
+  """Formats statistics as a table, one row per name, sorted by a statistic.
+
+  Args:
+    title: Title of the first column, holding the names.
+    stats: Dict from name to an object with the statistics as attributes.
+    columns: Sequence of `(attribute, title, format string)` triples, one per
+      column after the names.
+    sort_by: Name of the attribute by which to sort the rows in decreasing
+      order.
+    max_rows: Optional maximum number of rows to include.
+    total: Optional `(name, statistics)` pair, formatted as a last row below a
+      separator.
+
+  Returns:
+    The table, as a string.
+  """
+  rows = sorted(stats.items(), key=lambda item: getattr(item[1], sort_by),
+                reverse=True)[:max_rows]
+  if total is not None:
+    rows.append(total)
+  table = [[title] + [column_title for _, column_title, _ in columns]]
+  for name, row_stats in rows:
+    table.append([name or "-"] + [fmt.format(getattr(row_stats, attribute))
+                                  for attribute, _, fmt in columns])
+
+  widths = [max(len(row[i]) for row in table) for i in range(len(table[0]))]
+  lines = []
+  for row in table:
+    cells = [row[0].ljust(widths[0])]
+    cells += [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+    lines.append("  ".join(cells).rstrip())
+  lines.insert(1, "-" * len(lines[0]))
+  if total is not None:
+    lines.insert(-1, "-" * len(lines[0]))
+  return "\n".join(lines)
+
+
 def variable_map_items(variable_map):
   """Yields an iterator over (string, variable) pairs in the variable map.
 
@@ -934,6 +1123,45 @@ def convert_gradient_to_tensor(x):
   return x
 
 
+GaussianWeights = collections.namedtuple(
+    "GaussianWeights", ("mean", "stddev", "sample"))
+
+
+def register_gaussian_weights(weights, mean, stddev, sample):
+  """Registers the diagonal Gaussian distribution of weights.
+
+  Custom getters returning samples of the weights, such as
+  `bayes_by_backprop_getter(local_reparameterization=True)`, register their
+  distribution so that modules may sample their pre-activations instead, with
+  the local reparameterization trick (https://arxiv.org/abs/1506.02557):
+  `snt.Linear` samples `inputs * weights` from its Gaussian distribution,
+  without sampling `weights`.
+
+  Args:
+    weights: The weights returned by the custom getter, in the default graph.
+    mean: Tensor of the mean of the weights, of the shape of the variable.
+    stddev: Tensor of the standard deviation of each weight, of the shape of
+      the variable.
+    sample: Boolean scalar Tensor, whether to sample the pre-activations, or
+      use those of the mean.
+  """
+  _get_graph_registry("gaussian_weights")[weights] = GaussianWeights(
+      mean, stddev, sample)
+
+
+def get_gaussian_weights(weights):
+  """Returns the `GaussianWeights` registered for weights, or None.
+
+  Args:
+    weights: Weights returned by a custom getter, in the default graph.
+  """
+  try:
+    return _get_graph_registry("gaussian_weights").get(weights)
+  except TypeError:
+    # Weights which cannot be hashed are never registered.
+    return None
+
+
 def sort_by_name(variables):
   """Returns a tuple of `variables` sorted ascending by name."""
   return tuple(sorted(variables, key=lambda v: v.name))
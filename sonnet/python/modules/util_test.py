@@ -17,10 +17,14 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
 import functools
+import gc
 import itertools
 import os
+import re
 import tempfile
+import weakref
 
 # Dependency imports
 from absl.testing import parameterized
@@ -77,6 +81,94 @@ class UtilTest(parameterized.TestCase, tf.test.TestCase):
     self.assertEqual(set(snt.get_variables_in_scope(s2.name)), {v2, v3})
     self.assertEqual(set(snt.get_variables_in_scope("")), {v1, v2, v3})
 
+  def testScopeQueryMatchesGetCollection(self):
+    def check(scope_names):
+      for scope_name in scope_names:
+        expected = tf.get_collection(
+            tf.GraphKeys.GLOBAL_VARIABLES,
+            scope=(re.escape(scope_name) + "/") if scope_name else "")
+        self.assertEqual(
+            tuple(expected),
+            snt.get_variables_in_scope(
+                scope_name, collection=tf.GraphKeys.GLOBAL_VARIABLES))
+
+    scope_names = ("", "a", "a/b", "a/b/c", "a.b", "ab", "a/b/c/d", "missing")
+    with tf.variable_scope("a"):
+      tf.get_variable("w", shape=[1])
+      with tf.variable_scope("b"):
+        tf.get_variable("w", shape=[1])
+    with tf.variable_scope("a.b"):
+      tf.get_variable("w", shape=[1])
+    check(scope_names)
+
+    # Variables created after a query are indexed too.
+    with tf.variable_scope("a/b/c"):
+      tf.get_variable("w", shape=[1], trainable=False)
+    with tf.variable_scope("ab"):
+      tf.get_variable("w", shape=[1])
+    check(scope_names)
+
+    # As are those of a collection modified other than by appending to it.
+    collection = tf.get_collection_ref(tf.GraphKeys.GLOBAL_VARIABLES)
+    del collection[1]
+    check(scope_names)
+    with tf.variable_scope("a/b"):
+      collection[-1] = tf.get_variable("v", shape=[1],
+                                       collections=["replacement"])
+    check(scope_names)
+    tf.get_default_graph().clear_collection(tf.GraphKeys.GLOBAL_VARIABLES)
+    check(scope_names)
+
+  def testScopeIndexDoesNotKeepGraphAlive(self):
+    graph = tf.Graph()
+    with graph.as_default():
+      with tf.variable_scope("a") as scope:
+        tf.get_variable("w", shape=[1])
+      self.assertLen(snt.get_variables_in_scope(scope), 1)
+    graph_ref = weakref.ref(graph)
+    del graph, scope
+    gc.collect()
+    self.assertIsNone(graph_ref())
+
+  def testGaussianWeights(self):
+    weights = tf.zeros([2, 3])
+    self.assertIsNone(util.get_gaussian_weights(weights))
+    mean, stddev, sample = tf.zeros([2, 3]), tf.ones([2, 3]), tf.constant(True)
+    util.register_gaussian_weights(weights, mean, stddev, sample)
+    self.assertEqual(util.GaussianWeights(mean, stddev, sample),
+                     util.get_gaussian_weights(weights))
+
+    # The registry is per graph, and does not keep its graph alive.
+    graph = tf.Graph()
+    with graph.as_default():
+      self.assertIsNone(util.get_gaussian_weights(weights))
+      other_weights = tf.zeros([2, 3])
+      util.register_gaussian_weights(
+          other_weights, tf.zeros([2, 3]), tf.ones([2, 3]), tf.constant(True))
+    graph_ref = weakref.ref(graph)
+    del graph, other_weights
+    gc.collect()
+    self.assertIsNone(graph_ref())
+
+  def testScopeQueryIgnoresUnnamedItems(self):
+    with tf.variable_scope("prefix") as s1:
+      v1 = tf.get_variable("a", shape=[1], collections=["test"])
+    tf.add_to_collection("test", 42)
+    self.assertEqual((v1,), snt.get_variables_in_scope(s1, collection="test"))
+    self.assertEqual((v1,), snt.get_variables_in_scope("", collection="test"))
+
+  def testFilterByCollection(self):
+    v1 = tf.get_variable("a", shape=[1])
+    v2 = tf.get_variable("b", shape=[1], trainable=False)
+    v3 = tf.get_variable("c", shape=[1])
+    self.assertEqual((v3, v1), util.filter_by_collection([v3, v2, v1]))
+    self.assertEqual(
+        (v3, v2, v1),
+        util.filter_by_collection([v3, v2, v1],
+                                  collection=tf.GraphKeys.GLOBAL_VARIABLES))
+    self.assertEqual((), util.filter_by_collection([v1], collection="missing"))
+    self.assertNotIn("missing", tf.get_default_graph().get_all_collection_keys())
+
   def testIsScopePrefix(self):
     self.assertTrue(util._is_scope_prefix("a/b/c", ""))
     self.assertTrue(util._is_scope_prefix("a/b/c", "a/b/c"))
@@ -427,6 +519,24 @@ class UtilTest(parameterized.TestCase, tf.test.TestCase):
     var_map = {"vv1": v1, "vv2": v2}
     self.assertEqual(snt.format_variable_map(var_map), expected)
 
+  def testFormatStatsTable(self):
+    stats = collections.namedtuple("Stats", ["count", "size"])
+    table = util.format_stats_table(
+        "Name", {"x": stats(1, 2.5), "": stats(3, 0.25)},
+        [("count", "Count", "{:d}"), ("size", "Size", "{:.2f}")], "count",
+        total=("Total", stats(4, 2.75)))
+    self.assertEqual("\n".join([
+        "Name   Count  Size",
+        "------------------",
+        "-          3  0.25",
+        "x          1  2.50",
+        "------------------",
+        "Total      4  2.75"]), table)
+    table = util.format_stats_table(
+        "Name", {"x": stats(1, 2.5), "y": stats(3, 0.25)},
+        [("count", "Count", "{:d}")], "size", max_rows=1)
+    self.assertEqual("Name  Count\n-----------\nx         1", table)
+
   def testLogVariables(self):
     tf.get_default_graph().add_to_collection("config", {"version": 1})
     with tf.variable_scope("m1"):
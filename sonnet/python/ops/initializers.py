@@ -19,6 +19,8 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import contextlib
+
 # Dependency imports
 
 import tensorflow as tf
@@ -27,6 +29,93 @@ from tensorflow.python.ops import init_ops
 from tensorflow.python.ops import io_ops
 
 
+# Stack of the `_RestoreBatch`es of the enclosing `batch_restore_initializers`.
+_RESTORE_BATCH_STACK = []
+
+
+class _RestoreBatch(object):
+  """Tensors of checkpoints, each checkpoint restored by a single op."""
+
+  def __init__(self):
+    # Dict from `(graph, filename)` to dict from tensor name to the restored
+    # tensor.
+    self._restored = {}
+
+  def _restore_checkpoint(self, filename):
+    """Returns a dict from name to tensor of all the tensors of a checkpoint."""
+    key = (tf.get_default_graph(), filename)
+    if key not in self._restored:
+      reader = tf.train.NewCheckpointReader(filename)
+      dtypes = reader.get_variable_to_dtype_map()
+      shapes = reader.get_variable_to_shape_map()
+      tensor_names = sorted(dtypes)
+      with tf.name_scope(None), tf.control_dependencies(None):
+        restored = io_ops.restore_v2(
+            filename, tensor_names, [''] * len(tensor_names),
+            [dtypes[name] for name in tensor_names],
+            name='batch_restore_initializers')
+      for tensor_name, tensor in zip(tensor_names, restored):
+        tensor.set_shape(shapes[tensor_name])
+      self._restored[key] = dict(zip(tensor_names, restored))
+    return self._restored[key]
+
+  def get(self, filename, tensor_name, dtype, shape, partition_info):
+    """Returns the restored tensor, or the slice of it for a partition."""
+    restored = self._restore_checkpoint(filename)
+    if tensor_name not in restored:
+      raise ValueError('Tensor {!r} not found in checkpoint {!r}.'.format(
+          tensor_name, filename))
+    tensor = restored[tensor_name]
+    if dtype is not None and tensor.dtype != tf.as_dtype(dtype).base_dtype:
+      raise ValueError(
+          'Tensor {!r} of checkpoint {!r} has dtype {}, not {}.'.format(
+              tensor_name, filename, tensor.dtype.name,
+              tf.as_dtype(dtype).name))
+    if partition_info is not None:
+      tensor = tf.slice(tensor, partition_info.var_offset, shape)
+    tensor.set_shape(shape)
+    return tensor
+
+
+@contextlib.contextmanager
+def batch_restore_initializers():
+  """Restores the tensors of all restore initializers with one op.
+
+  Each `restore_initializer` normally adds its own RestoreV2 op to the graph,
+  each of them opening the checkpoint again when run. Within this context,
+  the first restore initializer reading a checkpoint instead adds a single
+  RestoreV2 op restoring all the tensors of the checkpoint, and it and all the
+  following restore initializers reading the checkpoint use its outputs. This
+  includes the restore initializers set by the
+  `snt.custom_getters.restore_initializer` custom getter:
+
+  ```python
+  custom_getter = snt.custom_getters.restore_initializer(filename)
+  with snt.batch_restore_initializers():
+    with tf.variable_scope('', custom_getter=custom_getter):
+      outputs = model(inputs)
+  init = tf.global_variables_initializer()
+  ```
+
+  The tensors of the checkpoint are listed when the graph is built, so the
+  filenames must be paths to existing checkpoints. As the whole checkpoint is
+  read when the variables are initialized, this is best suited to checkpoints
+  of which most tensors are restored. Contexts may be nested, in which case
+  the outermost context is used.
+
+  Yields:
+    None.
+  """
+  if _RESTORE_BATCH_STACK:
+    yield
+    return
+  _RESTORE_BATCH_STACK.append(_RestoreBatch())
+  try:
+    yield
+  finally:
+    _RESTORE_BATCH_STACK.pop()
+
+
 class _Restore(init_ops.Initializer):
   """Initializer that restores tensors from a checkpoint."""
 
@@ -69,7 +158,8 @@ class _Restore(init_ops.Initializer):
   def __call__(self, shape, dtype=None, partition_info=None):
     # Creating different RestoreV2 ops when a single one could
     # output several tensors seems inefficient, but that's actually
-    # what tf.Saver.restore_op (via tf.BaseSaverBuilder) does too.
+    # what tf.Saver.restore_op (via tf.BaseSaverBuilder) does too. Within
+    # `batch_restore_initializers`, a single one is created instead.
     if self._scope is None:
       scope_name = tf.get_variable_scope().name
     elif callable(self._scope):
@@ -79,6 +169,9 @@ class _Restore(init_ops.Initializer):
     tensor_name = self._var_name
     if scope_name:
       tensor_name = '{}/{}'.format(scope_name, tensor_name)
+    if _RESTORE_BATCH_STACK:
+      return _RESTORE_BATCH_STACK[-1].get(
+          self._filename, tensor_name, dtype, shape, partition_info)
     tensor = io_ops.restore_v2(
         self._filename,
         [tensor_name],
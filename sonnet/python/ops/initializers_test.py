@@ -239,5 +239,104 @@ class RestoreInitializerTest(tf.test.TestCase):
     self.assertAllEqual(v2, 42)
 
 
+class BatchRestoreInitializersTest(tf.test.TestCase):
+
+  def _restore_ops(self):
+    return [op for op in tf.get_default_graph().get_operations()
+            if op.type == 'RestoreV2']
+
+  def testMultipleRestore(self):
+    restore_initializers = {
+        'w': initializers.restore_initializer(_checkpoint(), 'w'),
+        'b': initializers.restore_initializer(_checkpoint(), 'b')
+    }
+
+    with initializers.batch_restore_initializers():
+      with tf.variable_scope('agent/conv_net_2d'):
+        c1 = conv.Conv2D(16, 8, 4, name='conv_2d_0', padding=conv.VALID,
+                         initializers=restore_initializers)
+        c2 = conv.Conv2D(32, 4, 2, name='conv_2d_1', padding=conv.VALID,
+                         initializers=restore_initializers)
+      inputs = tf.constant(1 / 255.0, shape=[1, 86, 86, 3])
+      intermediate_1 = c1(inputs)
+      intermediate_2 = c2(tf.nn.relu(intermediate_1))
+
+    restore_ops = self._restore_ops()
+    self.assertEqual(1, len(restore_ops))
+    self.assertEqual(len(tf.train.list_variables(_checkpoint())),
+                     len(restore_ops[0].outputs))
+    # The variables are initialized from the outputs of the op directly.
+    self.assertEqual([], [op for op in tf.get_default_graph().get_operations()
+                          if op.type == 'Placeholder'])
+    init = tf.global_variables_initializer()
+    tf.get_default_graph().finalize()
+    with self.test_session() as session:
+      session.run(init)
+      i1, i2 = session.run([intermediate_1, intermediate_2])
+
+    self.assertAllClose(np.linalg.norm(i1), _ONE_CONV_LAYER, atol=_TOLERANCE)
+    self.assertAllClose(np.linalg.norm(i2), _TWO_CONV_LAYERS, atol=_TOLERANCE)
+
+  def testDuplicateRequests(self):
+    with initializers.batch_restore_initializers():
+      with tf.variable_scope('agent/conv_net_2d/conv_2d_0'):
+        biases = [
+            tf.get_variable(
+                'b_{}'.format(i), shape=[16],
+                initializer=initializers.restore_initializer(_checkpoint(),
+                                                             'b'))
+            for i in range(2)]
+      # Nested contexts restore with the outermost one.
+      with initializers.batch_restore_initializers():
+        with tf.variable_scope('agent/conv_net_2d/conv_2d_1'):
+          bias = tf.get_variable(
+              'b', shape=[32],
+              initializer=initializers.restore_initializer(_checkpoint(), 'b'))
+
+    # The duplicate request is only restored once.
+    self.assertEqual(1, len(self._restore_ops()))
+    with self.test_session() as session:
+      session.run(tf.global_variables_initializer())
+      b0, b1, b = session.run(biases + [bias])
+    self.assertAllEqual(b0, b1)
+    self.assertAllClose(np.linalg.norm(b0), 3.9685926, atol=_TOLERANCE)
+    self.assertEqual((32,), b.shape)
+
+  def testMissingTensor(self):
+    with initializers.batch_restore_initializers():
+      with self.assertRaisesRegexp(ValueError, 'not found in checkpoint'):
+        tf.get_variable(
+            'missing', shape=[16],
+            initializer=initializers.restore_initializer(_checkpoint(),
+                                                         'missing'))
+
+  def testPartitionedVariable(self):
+    save_path = os.path.join(self.get_temp_dir(), 'batch_partitioned_variable')
+    var_name = 'my_partitioned_var'
+
+    g1 = tf.Graph()
+    with g1.as_default():
+      partitioned_var1 = tf.create_partitioned_variables(
+          [1 << 3, 10], [4, 1], tf.random_uniform_initializer(), name=var_name)
+      with self.test_session(graph=g1) as session:
+        tf.global_variables_initializer().run()
+        pv1 = session.run(partitioned_var1)
+        tf.train.Saver(partitioned_var1).save(session, save_path)
+
+    g2 = tf.Graph()
+    with g2.as_default():
+      with initializers.batch_restore_initializers():
+        partitioned_var2 = tf.create_partitioned_variables(
+            [1 << 3, 10], [4, 1],
+            initializers.restore_initializer(save_path, var_name, ''),
+            name=var_name)
+      self.assertEqual(1, len(self._restore_ops()))
+      with self.test_session(graph=g2) as session:
+        tf.global_variables_initializer().run()
+        pv2 = session.run(partitioned_var2)
+
+    self.assertAllEqual(pv1, pv2)
+
+
 if __name__ == '__main__':
   tf.test.main()
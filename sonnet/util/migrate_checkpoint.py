@@ -13,19 +13,52 @@
 # limitations under the License.
 # ============================================================================
 
-"""Removes the ":0" suffix from names in a checkpoint."""
+"""Removes the ":0" suffix from names in a checkpoint.
+
+With `--streaming`, the tensors are instead copied in batches of bounded size
+without creating variables, so the checkpoint is never held in memory at
+once, and can also be renamed, cast or dropped:
+
+```
+migrate_checkpoint --source=/tmp/old --target=/tmp/new --streaming \
+    --rename=linear/w=mlp/linear_0/w --cast=.*/w=bfloat16 --drop=.*/Adam.*
+```
+"""
 
 from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import os
+import re
+import uuid
+
 # Dependency imports
 import tensorflow as tf
+from tensorflow.python.ops import io_ops
 
 
 tf.app.flags.DEFINE_string("source", None, "Source checkpoint")
 tf.app.flags.DEFINE_string("target", None, "Target checkpoint")
 tf.app.flags.DEFINE_boolean("dry_run", False, "Whether to do a dry run")
+tf.app.flags.DEFINE_boolean("streaming", False,
+                            "Whether to copy the tensors in batches, without "
+                            "creating variables")
+tf.app.flags.DEFINE_integer("max_batch_bytes", 2 ** 30,
+                            "Maximum size of the tensors copied at once when "
+                            "streaming")
+tf.app.flags.DEFINE_integer("num_readers", 4,
+                            "Number of tensor groups read and written in "
+                            "parallel when streaming")
+tf.app.flags.DEFINE_list("rename", [],
+                         "Comma-separated old_name=new_name pairs, when "
+                         "streaming")
+tf.app.flags.DEFINE_list("cast", [],
+                         "Comma-separated name_regex=dtype pairs, casting the "
+                         "matching tensors when streaming")
+tf.app.flags.DEFINE_list("drop", [],
+                         "Comma-separated regexes of the names of the tensors "
+                         "to drop when streaming")
 
 FLAGS = tf.app.flags.FLAGS
 
@@ -66,7 +99,177 @@ def remove_colon_zero(name):
   return name[:-2] if name.endswith(":0") else name
 
 
+def _lookup(name, mapping):
+  """Looks `name` up in a dict or callable, returning None if missing."""
+  if mapping is None:
+    return None
+  if callable(mapping):
+    return mapping(name)
+  return mapping.get(name)
+
+
+def _split_balanced(items, num_groups):
+  """Splits `(num_bytes, item)` pairs in groups of similar total size."""
+  groups = [[] for _ in range(num_groups)]
+  group_bytes = [0] * num_groups
+  for num_bytes, item in sorted(items, key=lambda pair: -pair[0]):
+    index = group_bytes.index(min(group_bytes))
+    groups[index].append(item)
+    group_bytes[index] += num_bytes
+  return [group for group in groups if group]
+
+
+def _plan_migration(checkpoint_reader, rename, cast, drop, max_batch_bytes):
+  """Lists the tensors to migrate, in batches of bounded size.
+
+  Args:
+    checkpoint_reader: A `tf.train.NewCheckPointReader` of the checkpoint to
+      be read from.
+    rename: See `migrate_checkpoint_streaming`.
+    cast: See `migrate_checkpoint_streaming`.
+    drop: See `migrate_checkpoint_streaming`.
+    max_batch_bytes: See `migrate_checkpoint_streaming`.
+
+  Returns:
+    Tuple of a list of batches, each a list of `(num_bytes, (name, new_name,
+    dtype, new_dtype))` tuples, and a dictionary that maps the old tensor
+    names to the new tensor names.
+
+  Raises:
+    ValueError: If several tensors are renamed to the same name.
+  """
+  names_to_shapes = checkpoint_reader.get_variable_to_shape_map()
+  names_to_dtypes = checkpoint_reader.get_variable_to_dtype_map()
+  drop_regexes = [re.compile(regex) for regex in drop]
+
+  batches = [[]]
+  batch_bytes = 0
+  name_to_new_name = {}
+  new_names = set()
+  for name in sorted(names_to_shapes):
+    if any(regex.match(name) for regex in drop_regexes):
+      continue
+    new_name = _lookup(name, rename) or name
+    if new_name in new_names:
+      raise ValueError("Several tensors would be named {!r}.".format(new_name))
+    new_names.add(new_name)
+    name_to_new_name[name] = new_name
+
+    dtype = tf.as_dtype(names_to_dtypes[name])
+    new_dtype = tf.as_dtype(_lookup(name, cast) or dtype)
+    num_elements = 1
+    for dim in names_to_shapes[name]:
+      num_elements *= dim
+    num_bytes = num_elements * max(dtype.size, new_dtype.size)
+    # A tensor larger than `max_batch_bytes` is copied on its own.
+    if batches[-1] and batch_bytes + num_bytes > max_batch_bytes:
+      batches.append([])
+      batch_bytes = 0
+    batches[-1].append((num_bytes, (name, new_name, dtype, new_dtype)))
+    batch_bytes += num_bytes
+
+  return [batch for batch in batches if batch], name_to_new_name
+
+
+def migrate_checkpoint_streaming(source, target, rename=None, cast=None,
+                                 drop=(), max_batch_bytes=2 ** 30,
+                                 num_readers=4, dry_run=False):
+  """Copies the tensors of a checkpoint in batches of bounded size.
+
+  The tensors are read, cast and written by TensorFlow ops, without creating
+  variables or fetching them into Python. Each batch of tensors is written to
+  temporary checkpoints, which are merged into `target` once all batches are
+  written, so memory use is bounded by about twice `max_batch_bytes` (or the
+  size of the largest tensor, if larger). Within a batch, the tensors are
+  split in `num_readers` groups read and written in parallel.
+
+  Args:
+    source: Path of the checkpoint to read from.
+    target: Path of the checkpoint to write.
+    rename: Optional dict or callable mapping the name of a tensor to its new
+      name, or to None to keep the name.
+    cast: Optional dict or callable mapping the name of a tensor to the dtype
+      to cast it to, or to None to keep the dtype.
+    drop: Iterable of regexes, the tensors whose names match one of them are
+      not copied.
+    max_batch_bytes: Maximum size in bytes of the tensors of a batch.
+    num_readers: Number of groups of tensors read and written in parallel.
+    dry_run: Whether to only return the new names, without writing `target`.
+
+  Returns:
+    A dictionary that maps the old tensor names to the new tensor names.
+
+  Raises:
+    ValueError: If several tensors are renamed to the same name.
+  """
+  reader = tf.train.NewCheckpointReader(source)
+  batches, name_to_new_name = _plan_migration(
+      reader, rename, cast, drop, max_batch_bytes)
+  if dry_run or not batches:
+    return name_to_new_name
+
+  temp_dir = "{}_temp_{}".format(target, uuid.uuid4().hex)
+  temp_prefixes = []
+  with tf.Graph().as_default() as graph:
+    batch_ops = []
+    for batch in batches:
+      save_ops = []
+      for group in _split_balanced(batch, num_readers):
+        names, new_names, dtypes, new_dtypes = zip(*group)
+        tensors = io_ops.restore_v2(source, list(names), [""] * len(names),
+                                    list(dtypes))
+        tensors = [tf.cast(tensor, new_dtype) if new_dtype != dtype else tensor
+                   for tensor, dtype, new_dtype
+                   in zip(tensors, dtypes, new_dtypes)]
+        temp_prefix = os.path.join(
+            temp_dir, "part-{:05d}".format(len(temp_prefixes)))
+        temp_prefixes.append(temp_prefix)
+        save_ops.append(io_ops.save_v2(temp_prefix, list(new_names),
+                                       [""] * len(new_names), tensors))
+      batch_ops.append(save_ops)
+    merge_op = io_ops.merge_v2_checkpoints(
+        temp_prefixes, target, delete_old_dirs=True)
+    graph.finalize()
+
+    with tf.Session() as sess:
+      # Only the ops of one batch run at once, bounding the memory use.
+      for save_ops in batch_ops:
+        sess.run(save_ops)
+      sess.run(merge_op)
+
+  tf.train.update_checkpoint_state(os.path.dirname(target) or ".", target)
+  return name_to_new_name
+
+
+def _parse_pairs(flag_values, flag_name):
+  """Parses the `key=value` entries of a list flag."""
+  pairs = []
+  for flag_value in flag_values:
+    key, separator, value = flag_value.rpartition("=")
+    if not separator:
+      raise ValueError("Invalid --{} entry {!r}, expected key=value.".format(
+          flag_name, flag_value))
+    pairs.append((key, value))
+  return pairs
+
+
 def main(unused_args):
+  if FLAGS.streaming:
+    renames = dict(_parse_pairs(FLAGS.rename, "rename"))
+    casts = [(re.compile(regex), dtype)
+             for regex, dtype in _parse_pairs(FLAGS.cast, "cast")]
+    def rename(name):
+      return renames.get(name) or remove_colon_zero(name)
+    def cast(name):
+      for regex, dtype in casts:
+        if regex.match(name):
+          return dtype
+      return None
+    return migrate_checkpoint_streaming(
+        FLAGS.source, FLAGS.target, rename=rename, cast=cast, drop=FLAGS.drop,
+        max_batch_bytes=FLAGS.max_batch_bytes, num_readers=FLAGS.num_readers,
+        dry_run=FLAGS.dry_run)
+
   with tf.Graph().as_default():
     reader = tf.train.NewCheckpointReader(FLAGS.source)
     name_value_fn = lambda name, value: (remove_colon_zero(name), value)
@@ -0,0 +1,99 @@
+# Copyright 2017 The Sonnet Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or  implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+
+"""Tests for sonnet.util.migrate_checkpoint."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+# Dependency imports
+import numpy as np
+from sonnet.util import migrate_checkpoint
+import tensorflow as tf
+
+
+class MigrateCheckpointStreamingTest(tf.test.TestCase):
+
+  def setUp(self):
+    super(MigrateCheckpointStreamingTest, self).setUp()
+    self._values = {
+        "linear/w:0": np.arange(12, dtype=np.float32).reshape([3, 4]),
+        "linear/b:0": np.arange(4, dtype=np.float32),
+        "linear/w/Adam:0": np.ones([3, 4], dtype=np.float32),
+        "global_step": np.array(7, dtype=np.int64),
+    }
+    self._source = os.path.join(self.get_temp_dir(), "source")
+    with tf.Graph().as_default():
+      variables = {name: tf.Variable(value)
+                   for name, value in self._values.items()}
+      # A partitioned variable is read as a whole.
+      partitioned = tf.get_variable(
+          "embeddings", shape=[10, 2], initializer=tf.ones_initializer(),
+          partitioner=tf.fixed_size_partitioner(3))
+      variables["embeddings"] = list(partitioned)
+      self._values["embeddings"] = np.ones([10, 2], dtype=np.float32)
+      saver = tf.train.Saver(variables)
+      with tf.Session() as sess:
+        sess.run(tf.global_variables_initializer())
+        saver.save(sess, self._source)
+
+  def testMigrate(self):
+    target = os.path.join(self.get_temp_dir(), "target")
+    name_to_new_name = migrate_checkpoint.migrate_checkpoint_streaming(
+        self._source, target,
+        rename=lambda name: "model/" + migrate_checkpoint.remove_colon_zero(
+            name),
+        cast={"linear/w:0": tf.float16},
+        drop=[".*/Adam"],
+        # Two tensors per batch at most.
+        max_batch_bytes=100,
+        num_readers=2)
+
+    self.assertEqual({"linear/w:0": "model/linear/w",
+                      "linear/b:0": "model/linear/b",
+                      "global_step": "model/global_step",
+                      "embeddings": "model/embeddings"},
+                     name_to_new_name)
+    reader = tf.train.NewCheckpointReader(target)
+    self.assertEqual(set(name_to_new_name.values()),
+                     set(reader.get_variable_to_shape_map()))
+    self.assertEqual(tf.float16,
+                     reader.get_variable_to_dtype_map()["model/linear/w"])
+    for name, new_name in name_to_new_name.items():
+      self.assertAllEqual(self._values[name], reader.get_tensor(new_name))
+    self.assertEqual(target, tf.train.latest_checkpoint(self.get_temp_dir()))
+    # The temporary checkpoints were deleted.
+    self.assertEqual([], tf.gfile.Glob(target + "_temp_*"))
+
+  def testDryRun(self):
+    target = os.path.join(self.get_temp_dir(), "dry_run")
+    name_to_new_name = migrate_checkpoint.migrate_checkpoint_streaming(
+        self._source, target, rename={"global_step": "step"}, dry_run=True)
+    self.assertEqual("step", name_to_new_name["global_step"])
+    self.assertEqual("linear/b:0", name_to_new_name["linear/b:0"])
+    self.assertEqual([], tf.gfile.Glob(target + "*"))
+
+  def testDuplicateNames(self):
+    target = os.path.join(self.get_temp_dir(), "duplicate")
+    with self.assertRaisesRegexp(ValueError, "Several tensors"):
+      migrate_checkpoint.migrate_checkpoint_streaming(
+          self._source, target, rename=lambda name: "same")
+
+
+if __name__ == "__main__":
+  tf.test.main()